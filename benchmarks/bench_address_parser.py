@@ -0,0 +1,91 @@
+"""
+地址解析效能測試
+比較舊版（多次 str.extract 惰性正規表示式）與新版（行政區劃字典樹 + 不重複地址快取）的行政區解析；
+正規表示式也可以只處理不重複地址，因此另以「不重複地址 + 正規表示式」作為基準，
+新版相對此基準的倍數才是字典樹解析本身的效益
+
+執行方式：python benchmarks/bench_address_parser.py [筆數] [不重複地址數]
+"""
+
+import os
+import sys
+import time
+import random
+
+os.environ.setdefault('ENABLE_CACHE', 'False')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+
+from src.data.address_parser import AddressParser
+from src.data.area_analyzer import AreaAnalyzer
+from src.data.gazetteer import TAIWAN_DIVISIONS
+
+ROADS = ['民權東路', '中山路', '中正路', '信義路', '文化路', '成功路', '復興路', '光復路']
+
+LEGACY_PATTERNS = [r'(.+?市)(.+?區)', r'(.+?縣)(.+?市)', r'(.+?縣)(.+?鄉)', r'(.+?縣)(.+?鎮)']
+
+def build_addresses(rows: int, unique: int) -> pd.Series:
+    """產生測試用地址，從固定數量的不重複地址中抽樣"""
+    rng = random.Random(42)
+    divisions = [(city, district) for city, districts in TAIWAN_DIVISIONS.items() for district in districts]
+    pool = []
+    for _ in range(unique):
+        city, district = rng.choice(divisions)
+        village = f"{rng.choice('中正仁愛和平')}{rng.choice('興安福德')}里" if rng.random() < 0.3 else ''
+        pool.append(f"{city}{district}{village}{rng.choice(ROADS)}{rng.randint(1, 500)}號")
+    return pd.Series([rng.choice(pool) for _ in range(rows)])
+
+def legacy_parse(locations: pd.Series):
+    """舊版流程：extract_area_info 的四次擷取，加上 _extract_all_districts 的三次擷取"""
+    for pattern in LEGACY_PATTERNS:
+        matches = locations.str.extract(pattern, expand=False)
+        (matches[0] + matches[1]).dropna().unique()
+    
+    matches = locations.str.extract(r'(.+?市)(.+?區)', expand=False)
+    districts = matches[0] + matches[1]
+    county = locations.str.extract(r'(.+?縣)(.+?市)', expand=False)
+    township = locations.str.extract(r'(.+?縣)(.+?[鄉鎮])', expand=False)
+    return districts.fillna(county[0] + county[1]).fillna(township[0] + township[1])
+
+def memoized_legacy_parse(locations: pd.Series):
+    """舊版流程加上相同的不重複地址快取：只對不重複地址執行正規表示式，再以代碼展開回每一列"""
+    codes, uniques = pd.factorize(locations)
+    parsed = legacy_parse(pd.Series(uniques)).to_numpy()
+    return pd.Series(parsed[codes], index=locations.index)
+
+def current_parse(locations: pd.Series):
+    """新版流程：只解析不重複地址，並由字典樹單次掃描"""
+    analyzer = AreaAnalyzer()
+    df = pd.DataFrame({'地點': locations})
+    analyzer.add_area_columns(df)
+    analyzer.extract_area_info(df)
+    return analyzer.district_labels(df)
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    unique = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    locations = build_addresses(rows, unique)
+    uniques = list(locations.unique())
+    
+    print(f"筆數：{rows}，不重複地址：{len(uniques)}")
+    
+    legacy = timed(legacy_parse, locations)
+    memoized = timed(memoized_legacy_parse, locations)
+    current = timed(current_parse, locations)
+    print(f"整欄解析  舊版：{legacy:.2f}s  舊版＋不重複快取：{memoized:.2f}s  新版：{current:.2f}s")
+    print(f"  相對舊版：{legacy / current:.1f}x（主要來自不重複地址快取）  相對同樣快取的正規表示式：{memoized / current:.1f}x")
+    
+    # 不計快取，只比較單一地址的解析成本
+    parser = AddressParser()
+    regex_only = timed(legacy_parse, pd.Series(uniques))
+    trie_only = timed(lambda: [parser._parse(address) for address in uniques])
+    print(f"不重複地址  正規表示式：{regex_only:.2f}s  字典樹：{trie_only:.2f}s  加速：{regex_only / trie_only:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+CSV 編碼檢測與解析效能測試
+比較舊版（完整 chardet + 逐一解碼）與新版的 CSV 載入：新版直接呼叫 DataProcessor.load_csv_data（不使用快照），
+舊版在解碼解析後套用相同的欄位映射、日期處理與型別精簡，兩者只差在編碼檢測與解析階段
+
+執行方式：python benchmarks/bench_csv_encoding.py [筆數]
+"""
+
+import os
+import sys
+import io
+import time
+import random
+import tempfile
+
+os.environ.setdefault('ENABLE_CACHE', 'False')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import chardet
+
+from src.data.processor import DataProcessor
+
+CASE_TYPES = ['竊盜', '詐欺', '傷害', '機車竊盜', '住宅竊盜']
+TIME_SLOTS = ['00~02', '03~05', '06~08', '09~11', '12~14', '15~17', '18~20', '21~23']
+DISTRICTS = ['臺北市中山區', '臺北市信義區', '新北市板橋區', '臺中市西屯區', '高雄市前金區', '新竹縣竹北市']
+
+def build_csv(rows: int) -> str:
+    """產生測試用 CSV 內容"""
+    rng = random.Random(42)
+    lines = ['編號,案類,日期,時段,地點']
+    for i in range(rows):
+        date = f"1{rng.randint(10, 13)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+        location = f"{rng.choice(DISTRICTS)}民權東路{rng.randint(1, 300)}號"
+        lines.append(f"{i},{rng.choice(CASE_TYPES)},{date},{rng.choice(TIME_SLOTS)},{location}")
+    return '\n'.join(lines) + '\n'
+
+def legacy_read(processor: DataProcessor, path: str) -> pd.DataFrame:
+    """舊版流程：對整份內容執行 chardet，再逐一完整解碼嘗試，之後套用與新版相同的後續處理"""
+    with open(path, 'rb') as f:
+        file_content = f.read()
+    encoding = chardet.detect(file_content)['encoding']
+    encodings_to_try = [encoding, 'utf-8', 'big5', 'cp950', 'gb2312', 'gbk', 'utf-8-sig', 'latin1']
+    for enc in dict.fromkeys(filter(None, encodings_to_try)):
+        try:
+            df = pd.read_csv(io.StringIO(file_content.decode(enc)))
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+        return processor._normalize_schema(processor._prepare_csv_frame(df))
+    raise ValueError("無法解析檔案")
+
+def current_read(processor: DataProcessor, path: str) -> pd.DataFrame:
+    """新版流程：實際的 DataProcessor.load_csv_data"""
+    with open(path, 'rb') as f:
+        return processor.load_csv_data(f.read())
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    text = build_csv(rows)
+    # 不使用快照，每次都實際解析
+    processor = DataProcessor(snapshot_cache=None)
+    
+    print(f"筆數：{rows}")
+    with tempfile.TemporaryDirectory() as directory:
+        for encoding in ('utf-8', 'big5'):
+            path = os.path.join(directory, f"crime_{encoding}.csv")
+            with open(path, 'wb') as f:
+                f.write(text.encode(encoding))
+            size = os.path.getsize(path)
+            legacy = timed(legacy_read, processor, path)
+            current = timed(current_read, processor, path)
+            print(f"{encoding:>6} ({size / 1024 / 1024:.1f}MB)  舊版：{legacy:.2f}s  新版：{current:.2f}s  加速：{legacy / current:.1f}x")
+
+if __name__ == '__main__':
+    main()
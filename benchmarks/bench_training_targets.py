@@ -0,0 +1,69 @@
+"""
+訓練目標建立效能測試
+比較舊版（年份 × 縣市巢狀迴圈，每次以 str.contains 掃描整欄地點）與新版（單次分組聚合）的訓練前處理時間
+
+執行方式：python benchmarks/bench_training_targets.py [筆數,筆數,...] [年份數]
+"""
+
+import os
+import sys
+import time
+import random
+
+os.environ.setdefault('ENABLE_CACHE', 'False')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+
+from src.data.gazetteer import TAIWAN_DIVISIONS
+from src.utils.ml_predictor import CrimePredictionModel
+
+CASE_TYPES = ['竊盜', '詐欺', '傷害', '搶奪', '毒品']
+
+def build_dataframe(rows: int, years: int) -> pd.DataFrame:
+    """產生測試用資料，地點涵蓋全國行政區"""
+    rng = random.Random(42)
+    divisions = [(city.replace('臺', '台'), district) for city, districts in TAIWAN_DIVISIONS.items() for district in districts]
+    pool = [f"{city}{district}中山路{n}號" for city, district in divisions for n in range(1, 6)]
+    first_year = 2024 - years + 1
+    year_values = [rng.randrange(first_year, 2025) for _ in range(rows)]
+    return pd.DataFrame({
+        '案類': [rng.choice(CASE_TYPES) for _ in range(rows)],
+        '日期': [f"{year - 1911}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}" for year in year_values],
+        '時段': '0-6',
+        '地點': [rng.choice(pool) for _ in range(rows)],
+        '年份': year_values
+    })
+
+def legacy_targets(df: pd.DataFrame) -> pd.DataFrame:
+    """舊版流程：每個年份 × 縣市組合重新掃描整個 DataFrame"""
+    target_data = []
+    for year in df['年份'].unique():
+        for area in df['地點'].str.extract(r'(.+?市)', expand=False).dropna().unique():
+            count = len(df[(df['年份'] == year) & (df['地點'].str.contains(area, na=False))])
+            if count > 0:
+                target_data.append({'年份': year, '地區': area, '案件數': count})
+    return pd.DataFrame(target_data)
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(',')] if len(sys.argv) > 1 else [10000, 50000, 200000]
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    
+    model = CrimePredictionModel()
+    
+    print(f"年份數：{years}")
+    for rows in sizes:
+        df = build_dataframe(rows, years)
+        legacy = timed(legacy_targets, df)
+        current = timed(model.build_targets, df)
+        extra = timed(model.build_targets, df, ['年份', '縣市', '區/鄉/鎮', '案類', '月份'])
+        print(f"{rows:>8} 筆  舊版：{legacy:.2f}s  新版：{current:.3f}s  加速：{legacy / current:.0f}x  "
+              f"（加上區/鄉/鎮、案類、月份：{extra:.3f}s）")
+
+if __name__ == '__main__':
+    main()
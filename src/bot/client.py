@@ -11,6 +11,7 @@ from src.data.processor import DataProcessor
 from src.bot.commands import setup_commands
 from src.bot.views import *
 from src.utils.config import config
+from src.utils.http_pool import session_pool
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +60,11 @@ class CrimeBotClient(commands.Bot):
         )
         await self.change_presence(activity=activity)
     
+    async def close(self):
+        """關閉機器人時一併關閉共用的 HTTP 連線"""
+        await session_pool.aclose()
+        await super().close()
+    
     async def on_guild_join(self, guild):
         """加入新伺服器事件"""
         logger.info(f"加入新伺服器：{guild.name} (ID: {guild.id})")
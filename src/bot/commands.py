@@ -2,6 +2,7 @@
 Discord 機器人指令設定
 """
 
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -10,6 +11,7 @@ from typing import TYPE_CHECKING
 
 from src.bot.views import AreaYearSelectView, AreaRankSelectView
 from src.bot.government_commands import setup_government_data_commands
+from src.utils.config import config
 
 if TYPE_CHECKING:
     from src.bot.client import CrimeBotClient
@@ -34,18 +36,37 @@ def setup_commands(bot: 'CrimeBotClient'):
             await interaction.response.defer()
             
             # 檢查檔案大小
-            max_size = bot.data_processor.config.MAX_FILE_SIZE_MB * 1024 * 1024
+            max_size = config.MAX_FILE_SIZE_MB * 1024 * 1024
             if file.size > max_size:
                 await interaction.followup.send(
-                    f"❌ 檔案過大，最大允許 {bot.data_processor.config.MAX_FILE_SIZE_MB}MB",
+                    f"❌ 檔案過大，最大允許 {config.MAX_FILE_SIZE_MB}MB",
                     ephemeral=True
                 )
                 return
             
             file_content = await file.read()
+            progress_message = await interaction.followup.send("⏳ 正在處理檔案... 0%", wait=True)
+            
+            # 於背景執行緒分批處理 CSV，避免阻塞事件迴圈
+            loop = asyncio.get_running_loop()
+            last_reported = [0]
+            
+            def report_progress(rows: int, progress: float):
+                percent = int(progress * 100)
+                if percent - last_reported[0] < 10 and percent < 100:
+                    return
+                last_reported[0] = percent
+                asyncio.run_coroutine_threadsafe(
+                    progress_message.edit(content=f"⏳ 正在處理檔案... {percent}%（已處理 {rows:,} 筆）"),
+                    loop
+                )
             
-            # 處理 CSV 資料
-            df = bot.data_processor.load_csv_data(file_content)
+            df = await asyncio.to_thread(
+                bot.data_processor.load_csv_data,
+                file_content,
+                config.CSV_CHUNK_ROWS,
+                report_progress
+            )
             bot.data_processor.set_current_data(df)
             
             # 生成統計資料
@@ -64,7 +85,7 @@ def setup_commands(bot: 'CrimeBotClient'):
                     area_text += f"{area_type}: {', '.join(areas[:5])}\n"
                 embed.add_field(name="可用地區", value=f"```\n{area_text}\n```", inline=False)
             
-            await interaction.followup.send(embed=embed)
+            await progress_message.edit(content=None, embed=embed)
             logger.info(f"用戶 {interaction.user} 成功上傳檔案: {file.filename}")
             
         except Exception as e:
@@ -95,7 +116,7 @@ def setup_commands(bot: 'CrimeBotClient'):
                 color=0x2ecc71
             )
             
-            view = AreaYearSelectView(df)
+            view = AreaYearSelectView(df, bot.data_processor.get_cube(df))
             await interaction.response.send_message(embed=embed, view=view)
             logger.info(f"用戶 {interaction.user} 查看統計總覽")
             
@@ -125,7 +146,7 @@ def setup_commands(bot: 'CrimeBotClient'):
                 color=0xe74c3c
             )
             
-            view = AreaRankSelectView(df)
+            view = AreaRankSelectView(df, bot.data_processor.get_cube(df))
             await interaction.response.send_message(embed=embed, view=view)
             logger.info(f"用戶 {interaction.user} 查看地區排名")
             
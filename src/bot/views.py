@@ -6,27 +6,29 @@ import discord
 from discord.ui import View, Select, Button
 import os
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from src.charts.generator import ChartGenerator
 from src.data.area_analyzer import AreaAnalyzer
 
 if TYPE_CHECKING:
     import pandas as pd
+    from src.data.cube import CrimeCube
 
 logger = logging.getLogger(__name__)
 
 class AreaYearSelectView(View):
     """地區和年份選擇視圖"""
     
-    def __init__(self, df: 'pd.DataFrame'):
+    def __init__(self, df: 'pd.DataFrame', cube: Optional['CrimeCube'] = None):
         super().__init__(timeout=300)
         self.df = df
+        self.cube = cube
         self.current_area = None
         self.current_year = None
         self.chart_generator = ChartGenerator()
         self.area_analyzer = AreaAnalyzer()
-        self.areas_info = self.area_analyzer.extract_area_info(df)
+        self.areas_info = cube.areas_info if cube is not None else self.area_analyzer.extract_area_info(df)
         self._setup_selects()
     
     def _setup_selects(self):
@@ -53,7 +55,7 @@ class AreaYearSelectView(View):
         )
         
         # 年份選擇
-        years = sorted(self.df['年份'].unique())
+        years = self.cube.years if self.cube is not None else sorted(self.df['年份'].unique())
         year_options = []
         
         for year in years:
@@ -113,7 +115,7 @@ class AreaYearSelectView(View):
         area = self.current_area if self.current_area else "全部地區"
         
         try:
-            filename = self.chart_generator.generate_yearly_plot(self.df, area)
+            filename = self.chart_generator.generate_yearly_plot(self.df, area, cube=self.cube)
             if not filename or not os.path.exists(filename):
                 embed = discord.Embed(
                     title="❌ 錯誤",
@@ -159,7 +161,7 @@ class AreaYearSelectView(View):
         if self.current_area and self.current_year:
             try:
                 filename = self.chart_generator.generate_area_year_plot(
-                    self.df, self.current_area, self.current_year
+                    self.df, self.current_area, self.current_year, cube=self.cube
                 )
                 
                 if not filename or not os.path.exists(filename):
@@ -218,13 +220,14 @@ class AreaYearSelectView(View):
 class AreaRankSelectView(View):
     """地區排名選擇視圖"""
     
-    def __init__(self, df: 'pd.DataFrame'):
+    def __init__(self, df: 'pd.DataFrame', cube: Optional['CrimeCube'] = None):
         super().__init__(timeout=300)
         self.df = df
+        self.cube = cube
         self.current_area = None
         self.chart_generator = ChartGenerator()
         self.area_analyzer = AreaAnalyzer()
-        self.areas_info = self.area_analyzer.extract_area_info(df)
+        self.areas_info = cube.areas_info if cube is not None else self.area_analyzer.extract_area_info(df)
         self._setup_controls()
     
     def _setup_controls(self):
@@ -271,7 +274,7 @@ class AreaRankSelectView(View):
                     try:
                         await interaction.response.defer()
                         
-                        filename = self.chart_generator.generate_area_rank_plot(self.df, self.current_area, n)
+                        filename = self.chart_generator.generate_area_rank_plot(self.df, self.current_area, n, cube=self.cube)
                         
                         if not filename:
                             await interaction.followup.send("❌ 無法產生圖表", ephemeral=True)
@@ -11,6 +11,7 @@ import logging
 from typing import Optional
 from src.utils.config import config
 from src.data.area_analyzer import AreaAnalyzer
+from src.data.cube import CrimeCube
 
 logger = logging.getLogger(__name__)
 
@@ -47,35 +48,34 @@ class ChartGenerator:
         
         logger.info("Matplotlib 字型設定完成")
     
-    def generate_area_year_plot(self, df: pd.DataFrame, area: str, year: int) -> Optional[str]:
+    def _extract_area_data(self, df: pd.DataFrame, area: str) -> pd.DataFrame:
+        """篩選地區並提取行政區欄位"""
+        if area != '全部地區':
+            df = df[self.area_analyzer.location_mask(df, area)]
+        if df.empty:
+            return df
+        return self.area_analyzer.extract_district_by_area(df, area)
+    
+    def _district_counts(self, df: pd.DataFrame, area: str, year: Optional[int] = None,
+                         cube: Optional[CrimeCube] = None) -> pd.Series:
+        """各行政區案件數（由多到少），有聚合立方體時直接查詢"""
+        if cube is not None:
+            return cube.district_counts(area, year)
+        
+        if year is not None:
+            df = df[df['年份'] == year]
+        area_data = self._extract_area_data(df, area)
+        if area_data.empty:
+            return pd.Series(dtype=int)
+        counts = area_data['區'].value_counts()
+        return counts[counts > 0]
+    
+    def generate_area_year_plot(self, df: pd.DataFrame, area: str, year: int,
+                                cube: Optional[CrimeCube] = None) -> Optional[str]:
         """生成地區年度統計圖"""
         try:
-            # 篩選年份
-            year_data = df[df['年份'] == year]
-            
-            if year_data.empty:
-                logger.warning(f"沒有 {year} 年的資料")
-                return None
-            
-            # 篩選地區
-            if area != '全部地區':
-                area_data = year_data[year_data['地點'].str.contains(area, na=False)]
-            else:
-                area_data = year_data
-            
-            if area_data.empty:
-                logger.warning(f"沒有 {area} 地區的資料")
-                return None
-            
-            # 提取行政區
-            area_data = self.area_analyzer.extract_district_by_area(area_data, area)
-            
-            if area_data.empty:
-                logger.warning("提取行政區後沒有資料")
-                return None
-            
             # 計算案件數
-            district_counts = area_data['區'].value_counts().sort_values(ascending=False)
+            district_counts = self._district_counts(df, area, year, cube)
             
             if district_counts.empty:
                 logger.warning("沒有有效的行政區資料")
@@ -129,28 +129,16 @@ class ChartGenerator:
             plt.close('all')
             return None
     
-    def generate_area_rank_plot(self, df: pd.DataFrame, area: str, top_n: int = 10) -> Optional[str]:
+    def generate_area_rank_plot(self, df: pd.DataFrame, area: str, top_n: int = 10,
+                                cube: Optional[CrimeCube] = None) -> Optional[str]:
         """生成地區排名圖表"""
         try:
-            # 篩選地區
-            if area != '全部地區':
-                area_data = df[df['地點'].str.contains(area, na=False)]
-            else:
-                area_data = df
+            district_counts = self._district_counts(df, area, cube=cube).head(top_n)
             
-            if area_data.empty:
-                logger.warning(f"沒有 {area} 地區的資料")
-                return None
-            
-            # 提取行政區
-            area_data = self.area_analyzer.extract_district_by_area(area_data, area)
-            
-            if area_data.empty:
-                logger.warning("提取行政區後沒有資料")
+            if district_counts.empty:
+                logger.warning(f"沒有 {area} 地區的行政區資料")
                 return None
             
-            district_counts = area_data['區'].value_counts().head(top_n)
-            
             # 創建圖表
             fig, ax = plt.subplots(figsize=(config.DEFAULT_CHART_WIDTH/100, config.DEFAULT_CHART_HEIGHT/100))
             bars = ax.bar(range(len(district_counts)), district_counts.values, color='tomato')
@@ -192,28 +180,19 @@ class ChartGenerator:
             plt.close('all')
             return None
     
-    def generate_yearly_plot(self, df: pd.DataFrame, area: str) -> Optional[str]:
+    def generate_yearly_plot(self, df: pd.DataFrame, area: str,
+                             cube: Optional[CrimeCube] = None) -> Optional[str]:
         """生成全年度統計圖表"""
         try:
-            # 篩選地區
-            if area != '全部地區':
-                area_data = df[df['地點'].str.contains(area, na=False)]
-            else:
-                area_data = df
-            
-            if area_data.empty:
-                logger.warning(f"沒有 {area} 地區的資料")
-                return None
-            
-            # 提取行政區
-            area_data = self.area_analyzer.extract_district_by_area(area_data, area)
-            
-            if area_data.empty:
-                logger.warning("提取行政區後沒有資料")
-                return None
-            
             # 按年份分組計算案件數
-            yearly_counts = area_data.groupby(['年份', '區']).size().unstack(fill_value=0)
+            if cube is not None:
+                yearly_counts = cube.district_counts_by_year(area)
+            else:
+                area_data = self._extract_area_data(df, area)
+                if area_data.empty:
+                    logger.warning(f"沒有 {area} 地區的行政區資料")
+                    return None
+                yearly_counts = area_data.groupby(['年份', '區'], observed=True).size().unstack(fill_value=0)
             
             if yearly_counts.empty:
                 logger.warning("年度計數結果為空")
@@ -0,0 +1,173 @@
+"""
+地址解析模組
+以行政區劃字典樹（trie）由左至右單次掃描地址，解析出縣市、鄉鎮市區與村里
+"""
+
+import sys
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.data.gazetteer import TAIWAN_DIVISIONS, LEGACY_CITIES
+
+logger = logging.getLogger(__name__)
+
+# 解析結果快取上限，超過時整批清除
+ADDRESS_CACHE_SIZE = 500000
+
+# 無法對應官方名稱時，鄉鎮市區與村里名稱（不含字尾）的最大字數
+MAX_NAME_STEM = 3
+
+# 地址開頭可略過的郵遞區號字元
+POSTAL_CHARS = frozenset('0123456789０１２３４５６７８９')
+
+# 出現即代表已進入路街門牌，不再屬於行政區名稱
+STOP_CHARS = frozenset('路街道巷弄段號樓鄰0123456789０１２３４５６７８９')
+
+# 行政區字尾後緊接這些字元時視為路名（例如 大里路）
+ROAD_CHARS = frozenset('路街道巷')
+
+_END = ''
+
+class AddressParts(NamedTuple):
+    """地址解析結果"""
+    city: Optional[str]
+    district: Optional[str]
+    village: Optional[str]
+
+EMPTY_PARTS = AddressParts(None, None, None)
+
+def normalize_name(name: str) -> str:
+    """統一臺/台寫法"""
+    return name.replace('臺', '台')
+
+class AddressParser:
+    """行政區劃字典樹地址解析器"""
+    
+    def __init__(self, cache_size: int = ADDRESS_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: Dict[str, AddressParts] = {}
+        self._city_trie: Dict = {}
+        self._district_tries: Dict[str, Dict] = {}
+        self._district_only_trie: Dict = {}
+        self._build()
+    
+    def _build(self):
+        """建立縣市、各縣市轄下鄉鎮市區與全國唯一鄉鎮市區名稱的字典樹"""
+        district_cities: Dict[str, List[str]] = {}
+        
+        for city, districts in TAIWAN_DIVISIONS.items():
+            city = normalize_name(city)
+            names = [normalize_name(district) for district in districts]
+            self._insert(self._city_trie, city, (city, city))
+            self._district_tries[city] = {}
+            for name in names:
+                self._insert(self._district_tries[city], name, name)
+                district_cities.setdefault(name, []).append(city)
+        
+        # 舊縣名轄下的鄉鎮市已改制為區，接受舊字尾並對應到新名稱
+        for legacy, city in LEGACY_CITIES.items():
+            districts = TAIWAN_DIVISIONS[city]
+            legacy, city = normalize_name(legacy), normalize_name(city)
+            self._insert(self._city_trie, legacy, (city, legacy))
+            trie = self._district_tries[legacy] = {}
+            for name in (normalize_name(district) for district in districts):
+                self._insert(trie, name, name)
+                stem = name[:-1]
+                if len(stem) >= 2:
+                    for suffix in '市鎮鄉':
+                        self._insert(trie, stem + suffix, name)
+        
+        # 省略縣市的地址，只有全國唯一的鄉鎮市區名稱能推回縣市
+        for name, cities in district_cities.items():
+            if len(cities) == 1:
+                self._insert(self._district_only_trie, name, (cities[0], name))
+    
+    @staticmethod
+    def _insert(trie: Dict, key: str, value):
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[_END] = value
+    
+    @staticmethod
+    def _longest_match(trie: Dict, text: str, start: int) -> Tuple[Optional[object], int]:
+        """由 start 起沿字典樹前進，回傳最長的完整名稱與結束位置"""
+        node = trie
+        value, end = None, start
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if _END in node:
+                value, end = node[_END], i + 1
+        return value, end
+    
+    @staticmethod
+    def _scan_suffix(text: str, start: int, suffixes: str) -> Optional[int]:
+        """尋找 1~MAX_NAME_STEM 個字後接指定字尾的名稱，回傳結束位置"""
+        for i in range(start, min(len(text), start + MAX_NAME_STEM + 1)):
+            ch = text[i]
+            if i > start and ch in suffixes and (i + 1 == len(text) or text[i + 1] not in ROAD_CHARS):
+                return i + 1
+            if ch in STOP_CHARS:
+                return None
+        return None
+    
+    def parse(self, address) -> AddressParts:
+        """解析單一地址，相同地址只解析一次"""
+        if not isinstance(address, str):
+            return EMPTY_PARTS
+        
+        parts = self._cache.get(address)
+        if parts is not None:
+            self.cache_hits += 1
+            return parts
+        
+        self.cache_misses += 1
+        parts = self._parse(address)
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[sys.intern(address)] = parts
+        return parts
+    
+    def parse_many(self, addresses: Iterable) -> List[AddressParts]:
+        """批次解析地址"""
+        return [self.parse(address) for address in addresses]
+    
+    def _parse(self, address: str) -> AddressParts:
+        text = normalize_name(''.join(address.split()))
+        pos = 0
+        while pos < len(text) and text[pos] in POSTAL_CHARS:
+            pos += 1
+        
+        match, end = self._longest_match(self._city_trie, text, pos)
+        if match is None:
+            match, end = self._longest_match(self._district_only_trie, text, pos)
+            if match is None:
+                return EMPTY_PARTS
+            city, district = match
+        else:
+            city, trie_key = match
+            district, district_end = self._longest_match(self._district_tries[trie_key], text, end)
+            if district is None:
+                # 不在官方名稱中（例如改制前的舊名），依縣市層級接受對應字尾
+                district_end = self._scan_suffix(text, end, '區' if trie_key.endswith('市') else '市鄉鎮')
+                if district_end is None:
+                    return AddressParts(city, None, None)
+                district = sys.intern(text[end:district_end])
+            end = district_end
+        
+        village_end = self._scan_suffix(text, end, '村里')
+        village = sys.intern(text[end:village_end]) if village_end else None
+        return AddressParts(city, district, village)
+    
+    def clear_cache(self):
+        """清除解析快取"""
+        self._cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+# 全域解析器，讓所有地區分析共用同一份快取
+address_parser = AddressParser()
@@ -4,40 +4,94 @@
 """
 
 import pandas as pd
-import re
+import numpy as np
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List
+
+from src.data.address_parser import AddressParts, address_parser, normalize_name
+from src.data.schema import factorize_column, broadcast_codes, map_unique
 
 logger = logging.getLogger(__name__)
 
+# 地點解析後的行政區欄位：縣市、區/鄉/鎮、里
+AREA_COLUMNS = ['縣市', '區/鄉/鎮', '里']
+
+# 地區類型，依 extract_area_info 回傳順序排列
+AREA_TYPES = ['市區', '縣市', '縣鄉', '縣鎮']
+
 class AreaAnalyzer:
     """地區分析器類"""
     
-    def __init__(self):
-        self.area_patterns = [
-            (r'(.+?市)(.+?區)', '市區'),
-            (r'(.+?縣)(.+?市)', '縣市'),
-            (r'(.+?縣)(.+?鄉)', '縣鄉'),
-            (r'(.+?縣)(.+?鎮)', '縣鎮'),
-        ]
+    def parse_address(self, address) -> AddressParts:
+        """將單一地址解析為 (縣市, 區/鄉/鎮, 里)，無法解析的層級為 None"""
+        return address_parser.parse(address)
+    
+    def add_area_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """解析地點並回傳加上縣市、區/鄉/鎮、里欄位（category）的 DataFrame
+        
+        不修改傳入的 DataFrame：新增欄位加在淺複本上，原有欄位的資料不會複製；已有行政區欄位時直接回傳原物件。
+        """
+        if '地點' not in df.columns or self._has_area_columns(df):
+            return df
+        
+        df = df.copy(deep=False)
+        for col, values in self._parse_locations(df['地點']).items():
+            df[col] = values
+        return df
+    
+    def get_area_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """取得行政區欄位，資料已預先解析時直接使用，否則即時解析"""
+        if self._has_area_columns(df):
+            return df[AREA_COLUMNS]
+        if '地點' not in df.columns:
+            return pd.DataFrame({col: pd.Categorical([]) for col in AREA_COLUMNS})
+        return pd.DataFrame(self._parse_locations(df['地點']))
+    
+    def location_mask(self, df: pd.DataFrame, keyword: str) -> pd.Series:
+        """地點包含關鍵字的布林遮罩，只比對不重複的地點（臺/台視為相同）"""
+        keyword = normalize_name(keyword)
+        return map_unique(
+            df['地點'],
+            lambda uniques: uniques.astype(str).str.replace('臺', '台', regex=False)
+                                   .str.contains(keyword, regex=False).to_numpy(dtype=bool),
+            vectorized=True,
+            fill_value=False
+        )
+    
+    def district_labels(self, df: pd.DataFrame) -> pd.Series:
+        """組合縣市與區/鄉/鎮為完整行政區名稱（例如 台北市中山區），以類別代碼運算避免逐列串接字串"""
+        return self.combine_labels(self.get_area_columns(df))
+    
+    def combine_labels(self, areas: pd.DataFrame) -> pd.Series:
+        """由 category 型別的縣市與區/鄉/鎮欄位組合完整行政區名稱"""
+        city, district = areas['縣市'], areas['區/鄉/鎮']
+        width = max(len(district.cat.categories), 1)
+        city_codes = city.cat.codes.to_numpy(dtype=np.int64)
+        district_codes = district.cat.codes.to_numpy(dtype=np.int64)
+        
+        valid = (city_codes >= 0) & (district_codes >= 0)
+        pairs, inverse = np.unique(city_codes[valid] * width + district_codes[valid], return_inverse=True)
+        codes = np.full(len(areas), -1, dtype=np.int64)
+        codes[valid] = inverse
+        names = [city.cat.categories[pair // width] + district.cat.categories[pair % width] for pair in pairs]
+        
+        return pd.Series(pd.Categorical.from_codes(codes, categories=names), index=areas.index, name='區')
     
     def extract_area_info(self, df: pd.DataFrame) -> Dict[str, List[str]]:
         """提取地區資訊並返回可用的地區列表"""
-        df_copy = df.copy()
         areas_found = {}
         
-        for pattern, area_type in self.area_patterns:
-            try:
-                matches = df_copy['地點'].str.extract(pattern, expand=False)
-                if area_type in ['市區', '縣市', '縣鄉', '縣鎮']:
-                    if isinstance(matches, pd.DataFrame) and len(matches.columns) >= 2:
-                        combined = matches.iloc[:, 0] + matches.iloc[:, 1]
-                        valid_matches = combined.dropna().unique()
-                        if len(valid_matches) > 0:
-                            areas_found[area_type] = list(valid_matches)
-            except Exception as e:
-                logger.warning(f"提取地區資訊時發生錯誤 ({area_type}): {e}")
-                continue
+        try:
+            areas = df if self._has_area_columns(df, AREA_COLUMNS[:2]) else self.get_area_columns(df)
+            pairs = areas[['縣市', '區/鄉/鎮']].dropna().drop_duplicates()
+            
+            grouped = {area_type: [] for area_type in AREA_TYPES}
+            for city, district in zip(pairs['縣市'], pairs['區/鄉/鎮']):
+                area_type = '市區' if city.endswith('市') else f'縣{district[-1]}'
+                grouped[area_type].append(city + district)
+            areas_found = {area_type: names for area_type, names in grouped.items() if names}
+        except Exception as e:
+            logger.warning(f"提取地區資訊時發生錯誤: {e}")
         
         if areas_found:
             logger.info("提取到的地區資訊:")
@@ -50,6 +104,7 @@ class AreaAnalyzer:
     def extract_district_by_area(self, df: pd.DataFrame, selected_area: str) -> pd.DataFrame:
         """根據選擇的地區提取行政區，避免誤判里名中的市字"""
         df_copy = df.copy()
+        selected_area = normalize_name(selected_area)
         
         try:
             if selected_area == '全部地區':
@@ -61,46 +116,32 @@ class AreaAnalyzer:
             elif '縣' in selected_area:
                 df_copy = self._extract_county_districts(df_copy, selected_area)
             
-            # 清理資料
+            # 行政區名稱於解析時已去除空白，只需移除無法對應的資料
             df_copy = df_copy.dropna(subset=['區'])
-            df_copy = df_copy[df_copy['區'].str.len() > 0]
-            df_copy['區'] = df_copy['區'].str.strip()
-            df_copy['區'] = df_copy['區'].str.replace(r'\s+', '', regex=True)
+            if isinstance(df_copy['區'].dtype, pd.CategoricalDtype):
+                df_copy['區'] = df_copy['區'].cat.remove_unused_categories()
             
             return df_copy
-            
+        
         except Exception as e:
             logger.error(f"提取行政區時發生錯誤: {e}")
             return pd.DataFrame()
     
     def _extract_all_districts(self, df: pd.DataFrame) -> pd.DataFrame:
         """提取所有地區的行政區"""
-        # 優先提取市區組合
-        city_district_pattern = r'(.+?市)(.+?區)'
-        matches = df['地點'].str.extract(city_district_pattern, expand=False)
-        df['區'] = matches[0] + matches[1]
-        
-        # 補充縣市組合
-        county_city_pattern = r'(.+?縣)(.+?市)'
-        county_matches = df['地點'].str.extract(county_city_pattern, expand=False)
-        county_combined = county_matches[0] + county_matches[1]
-        
-        # 補充縣鄉鎮組合
-        county_township_pattern = r'(.+?縣)(.+?[鄉鎮])'
-        township_matches = df['地點'].str.extract(county_township_pattern, expand=False)
-        township_combined = township_matches[0] + township_matches[1]
-        
-        # 按優先順序填充
-        df['區'] = df['區'].fillna(county_combined)
-        df['區'] = df['區'].fillna(township_combined)
-        
+        df['區'] = self.district_labels(df)
         return df
     
     def _extract_specific_district(self, df: pd.DataFrame, selected_area: str) -> pd.DataFrame:
-        """提取特定區域"""
-        filtered_df = df[df['地點'].str.contains(selected_area, na=False)]
-        if not filtered_df.empty:
-            df = filtered_df
+        """提取特定區域，無法解析出縣市的資料改以原始地點是否包含區域名稱判斷"""
+        labels = self.district_labels(df)
+        matched = [name for name in labels.cat.categories if selected_area in name]
+        mask = labels.isin(matched)
+        unparsed = self.get_area_columns(df)['縣市'].isna()
+        if '地點' in df.columns and unparsed.any():
+            mask |= unparsed & self.location_mask(df, selected_area)
+        if mask.any():
+            df = df[mask].copy()
             df['區'] = selected_area
         else:
             df['區'] = None
@@ -108,21 +149,28 @@ class AreaAnalyzer:
     
     def _extract_city_districts(self, df: pd.DataFrame, city_name: str) -> pd.DataFrame:
         """提取該市下的所有區"""
-        pattern = f'{city_name}(.+?區)'
-        matches = df['地點'].str.extract(pattern, expand=False)
-        df['區'] = city_name + matches
+        df['區'] = self._districts_within(df, city_name)
         return df
     
     def _extract_county_districts(self, df: pd.DataFrame, county_name: str) -> pd.DataFrame:
         """提取該縣下的市/鄉/鎮"""
-        patterns = [
-            f'{county_name}(.+?市)',
-            f'{county_name}(.+?鄉)', 
-            f'{county_name}(.+?鎮)'
-        ]
-        df['區'] = None
-        for pattern in patterns:
-            matches = df['地點'].str.extract(pattern, expand=False)
-            combined = county_name + matches
-            df['區'] = df['區'].fillna(combined)
+        df['區'] = self._districts_within(df, county_name)
         return df
+    
+    def _districts_within(self, df: pd.DataFrame, city_name: str) -> pd.Series:
+        """取得屬於指定縣市的完整行政區名稱，其餘為缺值"""
+        areas = self.get_area_columns(df)
+        return self.combine_labels(areas).where(areas['縣市'] == city_name)
+    
+    def _parse_locations(self, locations: pd.Series) -> Dict[str, pd.Series]:
+        """只解析不重複的地點，再以代碼展開回每一列"""
+        codes, uniques = factorize_column(locations)
+        parsed = [self.parse_address(address) for address in uniques]
+        return {
+            col: broadcast_codes(codes, [parts[i] for parts in parsed], index=locations.index, as_category=True)
+            for i, col in enumerate(AREA_COLUMNS)
+        }
+    
+    @staticmethod
+    def _has_area_columns(df: pd.DataFrame, columns: List[str] = AREA_COLUMNS) -> bool:
+        return all(col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype) for col in columns)
@@ -0,0 +1,192 @@
+"""
+聚合立方體模組
+將犯罪資料預先彙總為 (年份, 縣市, 區/鄉/鎮, 案類, 時段) 的案件數，供統計與圖表查詢直接切片
+"""
+
+import pandas as pd
+import numpy as np
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.data.address_parser import normalize_name
+from src.data.area_analyzer import AreaAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# 立方體維度
+CUBE_DIMENSIONS = ['年份', '縣市', '區/鄉/鎮', '案類', '時段']
+
+# 地區維度（名稱已統一為「台」，查詢值也需先統一寫法）
+AREA_DIMENSIONS = {'縣市', '區/鄉/鎮', '區'}
+
+# 無法解析出縣市的資料保留原始地點，地區篩選時改以地點文字比對（與 AreaAnalyzer.location_mask 相同）
+UNPARSED_DIMENSION = '未解析地點'
+
+class CrimeCube:
+    """犯罪案件聚合立方體
+    
+    儲存格以各維度的整數代碼表示，切片與彙總只在儲存格上以 numpy 運算，
+    查詢成本與原始資料筆數無關。
+    """
+    
+    def __init__(self, df: pd.DataFrame, area_analyzer: Optional[AreaAnalyzer] = None):
+        start = time.perf_counter()
+        analyzer = area_analyzer or AreaAnalyzer()
+        areas = analyzer.get_area_columns(df)
+        
+        unparsed = areas['縣市'].isna().to_numpy()
+        if '地點' in df.columns:
+            locations = df['地點'].where(unparsed)
+        else:
+            locations = pd.Series(np.nan, index=df.index, dtype=object)
+        
+        keys = pd.DataFrame({
+            '年份': df['年份'].array,
+            '縣市': areas['縣市'].array,
+            '區/鄉/鎮': areas['區/鄉/鎮'].array,
+            '案類': df['案類'].array,
+            '時段': df['時段'].array,
+            UNPARSED_DIMENSION: locations.array
+        })
+        dimensions = CUBE_DIMENSIONS + [UNPARSED_DIMENSION]
+        table = keys.groupby(dimensions, observed=True, dropna=False, sort=False).size().reset_index(name='案件數')
+        for col in dimensions:
+            if not isinstance(table[col].dtype, pd.CategoricalDtype):
+                table[col] = pd.Categorical(table[col], categories=sorted(table[col].dropna().unique()))
+        table[UNPARSED_DIMENSION] = table[UNPARSED_DIMENSION].cat.remove_unused_categories()
+        table['區'] = analyzer.combine_labels(table)
+        
+        self.table = table
+        self.row_count = len(df)
+        self.areas_info = analyzer.extract_area_info(table)
+        self._counts = table['案件數'].to_numpy(dtype=np.int64)
+        self._codes = {col: table[col].cat.codes.to_numpy() for col in dimensions + ['區']}
+        self._categories = {col: table[col].cat.categories for col in dimensions + ['區']}
+        
+        logger.info(f"聚合立方體建立完成：{len(df)} 筆資料 → {len(table)} 個儲存格，耗時 {time.perf_counter() - start:.3f}s")
+    
+    @property
+    def years(self) -> List[int]:
+        """資料中的年份（由小到大）"""
+        codes = np.unique(self._codes['年份'])
+        return [int(self._categories['年份'][code]) for code in codes if code >= 0]
+    
+    def _code(self, col: str, value) -> int:
+        """取得值在該維度的代碼，不存在時為 -2（不會與任何儲存格相符）"""
+        if col in AREA_DIMENSIONS and isinstance(value, str):
+            value = normalize_name(value)
+        try:
+            return self._categories[col].get_loc(value)
+        except KeyError:
+            return -2
+    
+    def _area_codes(self, area: str) -> np.ndarray:
+        """名稱包含指定地區的完整行政區代碼"""
+        area = normalize_name(area)
+        return np.array([code for code, name in enumerate(self._categories['區']) if area in name], dtype=np.int64)
+    
+    def _unparsed_codes(self, area: str) -> np.ndarray:
+        """原始地點包含指定地區名稱（臺/台視為相同）的未解析地點代碼"""
+        area = normalize_name(area)
+        return np.array([code for code, location in enumerate(self._categories[UNPARSED_DIMENSION])
+                         if area in normalize_name(str(location))], dtype=np.int64)
+    
+    def _mask(self, area: Optional[str] = None, year: Optional[int] = None,
+              case_type: Optional[str] = None, time_slot: Optional[str] = None) -> np.ndarray:
+        """依條件篩選儲存格；地區可為縣市或行政區名稱（含部分名稱），全部地區不篩選
+        
+        無法解析出縣市的資料改以原始地點是否包含地區名稱判斷。
+        """
+        mask = np.ones(len(self._counts), dtype=bool)
+        if area and area != '全部地區':
+            mask &= (np.isin(self._codes['區'], self._area_codes(area))
+                     | (self._codes['縣市'] == self._code('縣市', area))
+                     | np.isin(self._codes[UNPARSED_DIMENSION], self._unparsed_codes(area)))
+        for col, value in (('年份', year), ('案類', case_type), ('時段', time_slot)):
+            if value is not None:
+                mask &= self._codes[col] == self._code(col, value)
+        return mask
+    
+    def count(self, **filters) -> int:
+        """符合條件的案件總數"""
+        if not filters:
+            return self.row_count
+        return int(self._counts[self._mask(**filters)].sum())
+    
+    def rollup(self, by: str, top: Optional[int] = None, **filters) -> pd.Series:
+        """依指定維度彙總案件數，由多到少排序並略過為 0 的項目"""
+        totals = self._totals(by, self._mask(**filters) if filters else None)
+        return totals.head(top) if top else totals
+    
+    def crosstab(self, index: str, columns: str, **filters) -> pd.DataFrame:
+        """兩個維度的交叉表，等同於對原始資料執行 pd.crosstab"""
+        mask = self._mask(**filters) if filters else np.ones(len(self._counts), dtype=bool)
+        return self._crosstab(index, columns, mask)
+    
+    def district_counts(self, area: str = '全部地區', year: Optional[int] = None) -> pd.Series:
+        """各行政區案件數，地區選擇規則與 AreaAnalyzer.extract_district_by_area 相同"""
+        area = normalize_name(area)
+        mask, merged = self._district_mask(area, year)
+        if merged:
+            total = int(self._counts[mask].sum())
+            return pd.Series([total] if total else [], index=[area] if total else [], dtype=np.int64, name='案件數')
+        return self._totals('區', mask)
+    
+    def district_counts_by_year(self, area: str = '全部地區') -> pd.DataFrame:
+        """各年份、各行政區案件數（年份為列、行政區為欄）"""
+        area = normalize_name(area)
+        mask, merged = self._district_mask(area)
+        if not mask.any():
+            return pd.DataFrame()
+        if merged:
+            # 合併後包含沒有完整行政區名稱的未解析地點，直接依年份加總
+            return self._totals('年份', mask).sort_index().to_frame(area).rename_axis(columns='區')
+        return self._crosstab('年份', '區', mask)
+    
+    def _totals(self, col: str, mask: Optional[np.ndarray]) -> pd.Series:
+        codes, counts = self._codes[col], self._counts
+        if mask is not None:
+            codes, counts = codes[mask], counts[mask]
+        valid = codes >= 0
+        totals = np.bincount(codes[valid], weights=counts[valid], minlength=len(self._categories[col])).astype(np.int64)
+        result = pd.Series(totals, index=self._categories[col].rename(col), name='案件數')
+        return result[result > 0].sort_values(ascending=False, kind='stable')
+    
+    def _crosstab(self, index: str, columns: str, mask: np.ndarray) -> pd.DataFrame:
+        rows, cols = self._codes[index], self._codes[columns]
+        mask = mask & (rows >= 0) & (cols >= 0)
+        width = len(self._categories[columns])
+        grid = np.bincount(rows[mask] * width + cols[mask], weights=self._counts[mask],
+                           minlength=len(self._categories[index]) * width).reshape(-1, width).astype(np.int64)
+        
+        keep_rows, keep_cols = grid.sum(axis=1) > 0, grid.sum(axis=0) > 0
+        return pd.DataFrame(grid[keep_rows][:, keep_cols],
+                            index=self._categories[index][keep_rows].rename(index),
+                            columns=self._categories[columns][keep_cols].rename(columns))
+    
+    def _district_mask(self, area: str, year: Optional[int] = None) -> Tuple[np.ndarray, bool]:
+        """取得屬於指定地區且有完整行政區名稱的儲存格，並回傳是否合併為單一行政區"""
+        mask = self._mask(year=year) if year is not None else np.ones(len(self._counts), dtype=bool)
+        labels = self._codes['區']
+        merged = False
+        
+        if area == '全部地區':
+            mask &= labels >= 0
+        elif '區' in area:
+            # 與 AreaAnalyzer 相同，未解析的地點包含該行政區名稱時也計入
+            mask &= np.isin(labels, self._area_codes(area)) | np.isin(self._codes[UNPARSED_DIMENSION], self._unparsed_codes(area))
+            merged = True
+        elif '市' in area or '縣' in area:
+            mask &= (self._codes['縣市'] == self._code('縣市', area)) & (labels >= 0)
+        else:
+            mask &= False
+        return mask, merged
+    
+    def summary(self) -> Dict[str, Dict]:
+        """年份、時段、案類的彙總統計"""
+        return {
+            '年份統計': {int(year): int(count) for year, count in self.rollup('年份').sort_index().items()},
+            '時段統計': {key: int(count) for key, count in self.rollup('時段').items()},
+            '案類統計': {key: int(count) for key, count in self.rollup('案類').items()}
+        }
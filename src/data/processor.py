@@ -4,23 +4,71 @@
 """
 
 import pandas as pd
+import numpy as np
 import chardet
+import codecs
+import csv
 import io
 import os
 import re
+import time
+import threading
+import itertools
+import weakref
 import logging
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple, Callable
+
+from src.data.schema import normalize_schema, to_categories, concat_compact, map_unique
+from src.data.snapshot import DataSnapshotCache
+from src.data.area_analyzer import AREA_COLUMNS, AreaAnalyzer
+from src.data.cube import CrimeCube
+from src.utils.config import config
 
 logger = logging.getLogger(__name__)
 
+# 標準化後的資料欄位
+DEFAULT_COLUMNS = ['編號', '案類', '日期', '時段', '地點', '年份']
+
+# CSV 編碼檢測取樣的位元組數
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# 取樣判斷後依序嘗試的備用編碼
+FALLBACK_ENCODINGS = ['utf-8', 'big5', 'cp950', 'gb2312', 'gbk', 'utf-8-sig', 'latin1']
+
+# 文字檔每批解析的行數
+TEXT_CHUNK_LINES = 200000
+
+# 文字檔單行最多解析的欄位數（超過時改用逐行切割）
+TEXT_MAX_FIELDS = 16
+
+# 統計資料快取最多保留的資料集數量
+STATS_CACHE_SIZE = 8
+
 class DataProcessor:
     """資料處理器類"""
     
-    def __init__(self):
+    def __init__(self, snapshot_cache: Optional[DataSnapshotCache] = None):
         self.current_df: Optional[pd.DataFrame] = None
+        self.current_cube: Optional[CrimeCube] = None
+        self.last_load_stats: Dict[str, Any] = {}
+        if snapshot_cache is None and config.ENABLE_CACHE:
+            snapshot_cache = DataSnapshotCache(config.DATA_CACHE_DIR, keep=config.DATA_SNAPSHOT_KEEP)
+        self.snapshot_cache = snapshot_cache
+        self.area_analyzer = AreaAnalyzer()
+        
+        # 當前資料每次設定或清除都會遞增版本，統計快取以版本或快照鍵值為索引
+        self.data_version = 0
+        self.stats_cache_hits = 0
+        self.stats_cache_misses = 0
+        self._stats_cache: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self._dataset_keys: Dict[int, Tuple[weakref.ref, str]] = {}
+        # 當前資料、聚合立方體與版本一起替換，讀取端不會拿到新資料配舊立方體
+        self._current_lock = threading.RLock()
+        # 新資料以前一版資料開頭時記錄 (前一版本, 新版本, 尾端新增的資料列)，供預測模型增量更新
+        self._last_append: Optional[Tuple[int, int, pd.DataFrame]] = None
     
-    def load_default_data(self) -> pd.DataFrame:
-        """載入預設資料檔案"""
+    def load_default_data(self, chunk_size: int = TEXT_CHUNK_LINES) -> pd.DataFrame:
+        """以串流方式分批載入預設資料檔案"""
         file_paths = [
             'crime_data.txt',
             'data/crime_data.txt',
@@ -35,105 +83,269 @@ class DataProcessor:
         
         if file_path is None:
             logger.warning("找不到預設資料檔案，使用空資料集")
-            return pd.DataFrame(columns=['編號', '案類', '日期', '時段', '地點', '年份'])
+            return pd.DataFrame(columns=DEFAULT_COLUMNS)
+        
+        snapshot_key = self._snapshot_key('text', file_path=file_path)
+        if snapshot_key:
+            df = self.snapshot_cache.load(snapshot_key)
+            if df is not None:
+                self.last_load_stats = {'來源': file_path, '有效筆數': len(df), '快照': True}
+                self._register_dataset(df, snapshot_key)
+                return df
         
         try:
+            start_time = time.perf_counter()
+            chunks = []
+            total_lines = 0
+            rejected = 0
+            
             with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+                # 跳過標題列
+                next(f, None)
+                while True:
+                    lines = list(itertools.islice(f, chunk_size))
+                    if not lines:
+                        break
+                    chunk, line_count = self._parse_text_chunk(lines)
+                    total_lines += line_count
+                    rejected += line_count - len(chunk)
+                    if not chunk.empty:
+                        chunks.append(chunk)
             
-            data_lines = lines[1:] if len(lines) > 1 else []
-            data = []
+            if not chunks:
+                raise ValueError("沒有有效的資料行")
             
-            for line_num, line in enumerate(data_lines, 2):
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                try:
-                    parts = re.split(r'\s+', line)
-                    if len(parts) >= 5:
-                        編號 = parts[0]
-                        案類 = parts[1]
-                        日期 = parts[2]
-                        時段 = parts[3]
-                        地點 = ' '.join(parts[4:])
-                        
-                        if 日期.isdigit() and len(日期) == 7:
-                            data.append([編號, 案類, 日期, 時段, 地點])
-                            
-                except Exception as e:
-                    logger.warning(f"解析第 {line_num} 行時發生錯誤: {e}")
-                    continue
+            df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+            df = self._normalize_schema(df)
             
-            if not data:
-                raise ValueError("沒有有效的資料行")
+            elapsed = time.perf_counter() - start_time
+            rows_per_second = len(df) / elapsed if elapsed > 0 else float(len(df))
+            self.last_load_stats.update({
+                '來源': file_path,
+                '有效筆數': len(df),
+                '捨棄筆數': rejected,
+                '總行數': total_lines,
+                '耗時秒數': round(elapsed, 3),
+                '每秒筆數': round(rows_per_second, 1)
+            })
             
-            df = pd.DataFrame(data, columns=['編號', '案類', '日期', '時段', '地點'])
-            df['年份'] = df['日期'].astype(str).str[:3].astype(int) + 1911
+            logger.info(
+                f"成功載入 {len(df)} 筆有效資料（捨棄 {rejected} 筆，"
+                f"{rows_per_second:,.0f} 筆/秒，耗時 {elapsed:.2f} 秒）"
+            )
             
-            logger.info(f"成功載入 {len(df)} 筆有效資料")
+            if snapshot_key:
+                self.snapshot_cache.save(snapshot_key, df)
+                self._register_dataset(df, snapshot_key)
             return df
-            
+        
         except Exception as e:
             logger.error(f"載入資料時發生錯誤：{e}")
             raise
     
-    def load_csv_data(self, file_content: bytes) -> pd.DataFrame:
-        """載入並處理 CSV 資料"""
+    def _parse_text_chunk(self, lines: List[str]) -> Tuple[pd.DataFrame, int]:
+        """以向量化方式解析一批空白分隔的資料行
+        
+        回傳 (有效資料, 非空白行數)，日期須為 7 位數民國年格式才會保留。
+        """
+        # 只含空白或 \r\n 的行與 C 解析器略過的空白行一致，不計入行數
+        line_count = sum(1 for line in lines if line.strip())
+        if line_count == 0:
+            return pd.DataFrame(columns=DEFAULT_COLUMNS), 0
+        
+        # 使用 C 解析器切欄，地點可能含空白而佔用多欄
+        parts = pd.read_csv(
+            io.StringIO(''.join(lines)),
+            sep=r'\s+',
+            header=None,
+            names=range(TEXT_MAX_FIELDS),
+            dtype=object,
+            keep_default_na=False,
+            quoting=csv.QUOTE_NONE,
+            on_bad_lines='skip'
+        )
+        
+        if len(parts) != line_count:
+            # 欄位過多的行被略過，改以逐行切割確保結果一致
+            parts = self._split_text_lines(lines)
+            location = parts[4].str.replace(r'\s+', ' ', regex=True)
+        else:
+            location = parts[4]
+            # 欄位向左對齊，第 6 欄有值即代表地點含空白
+            multi = parts[5] != ''
+            if multi.any():
+                location = location.copy()
+                location[multi] = parts[multi].iloc[:, 4:].apply(
+                    lambda row: ' '.join(v for v in row if v), axis=1
+                )
+        
+        # 日期重複度高，只轉換不重複值
+        years = map_unique(parts[2], self._roc_years, vectorized=True)
+        valid = (location != '') & years.notna()
+        
+        df = parts.loc[valid, [0, 1, 2, 3]].set_axis(DEFAULT_COLUMNS[:4], axis=1)
+        df['地點'] = location[valid]
+        df['年份'] = years[valid].astype(int)
+        df = df.reset_index(drop=True)
+        
+        return df, line_count
+    
+    @staticmethod
+    def _split_text_lines(lines: List[str]) -> pd.DataFrame:
+        """逐行切割資料行（前四欄以空白分隔，其餘為地點），略過空白行"""
+        rows = [line.split(None, 4) for line in lines if line.strip()]
+        return pd.DataFrame(rows, dtype=object).reindex(columns=range(5)).fillna('')
+    
+    def load_csv_data(self, file_content: bytes, chunk_size: Optional[int] = None,
+                      progress_callback: Optional[Callable[[int, float], None]] = None) -> pd.DataFrame:
+        """載入並處理 CSV 資料
+        
+        指定 chunk_size 時分批讀取並逐批完成欄位映射與日期處理，記憶體用量隨批次大小而非檔案大小成長；
+        每批完成後以 progress_callback(已處理筆數, 進度比例) 回報進度。
+        """
         try:
-            # 檢測檔案編碼
-            detected_encoding = chardet.detect(file_content)
-            encoding = detected_encoding['encoding']
-            
-            logger.info(f"檢測到的編碼：{encoding} (信心度：{detected_encoding['confidence']:.2f})")
-            
-            # 嘗試多種編碼
-            encodings_to_try = [
-                encoding,
-                'utf-8',
-                'big5',
-                'cp950',
-                'gb2312',
-                'gbk',
-                'utf-8-sig',
-                'latin1'
-            ]
-            
-            encodings_to_try = list(dict.fromkeys(filter(None, encodings_to_try)))
+            snapshot_key = self._snapshot_key('csv', content=file_content)
+            if snapshot_key:
+                df = self.snapshot_cache.load(snapshot_key)
+                if df is not None:
+                    if progress_callback:
+                        progress_callback(len(df), 1.0)
+                    self._register_dataset(df, snapshot_key)
+                    return df
             
+            # 以取樣內容檢測編碼，再直接從位元組解析一次
             df = None
+            sample = self._encoding_sample(file_content)
             
-            for enc in encodings_to_try:
+            for enc in self._candidate_encodings(sample):
+                if not self._can_decode(sample, enc):
+                    continue
                 try:
-                    decoded_content = file_content.decode(enc)
-                    df = pd.read_csv(io.StringIO(decoded_content))
+                    if chunk_size:
+                        df = self._read_csv_chunked(file_content, enc, chunk_size, progress_callback)
+                    else:
+                        df = pd.read_csv(io.BytesIO(file_content), encoding=enc)
                     logger.info(f"成功使用編碼：{enc}")
                     break
                 except (UnicodeDecodeError, UnicodeError):
                     continue
+                except pd.errors.ParserError as e:
+                    logger.warning(f"使用編碼 {enc} 時發生錯誤: {e}")
+                    continue
                 except Exception as e:
+                    if chunk_size:
+                        raise
                     logger.warning(f"使用編碼 {enc} 時發生錯誤: {e}")
                     continue
             
             if df is None:
                 raise ValueError("無法解析檔案")
             
-            # 清理欄位名稱
-            df.columns = df.columns.str.strip().str.replace('\ufeff', '')
-            
-            # 映射欄位名稱
-            df = self._map_columns(df)
+            if not chunk_size:
+                df = self._prepare_csv_frame(df)
             
-            # 處理年份
-            df = self._process_dates(df)
+            # 精簡欄位型別
+            df = self._normalize_schema(df)
             
             logger.info(f"成功載入 CSV 資料：{len(df)} 筆記錄")
-            return df
             
+            if snapshot_key:
+                self.snapshot_cache.save(snapshot_key, df)
+                self._register_dataset(df, snapshot_key)
+            return df
+        
         except Exception as e:
             logger.error(f"CSV 檔案處理錯誤：{str(e)}")
             raise ValueError(f"CSV 檔案處理錯誤：{str(e)}")
     
+    def _prepare_csv_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """清理欄位名稱、映射標準欄位並處理年份"""
+        df.columns = df.columns.astype(str).str.strip().str.replace('\ufeff', '')
+        df = self._map_columns(df)
+        return self._process_dates(df)
+    
+    def _read_csv_chunked(self, file_content: bytes, encoding: str, chunk_size: int,
+                          progress_callback: Optional[Callable[[int, float], None]] = None) -> pd.DataFrame:
+        """分批讀取 CSV，每批處理完即轉為精簡型別，最後以類別聯集合併"""
+        buffer = io.BytesIO(file_content)
+        total_bytes = max(len(file_content), 1)
+        chunks = []
+        rows = 0
+        
+        with pd.read_csv(buffer, encoding=encoding, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                chunk = self._prepare_csv_frame(chunk)
+                chunks.append(to_categories(chunk))
+                rows += len(chunk)
+                if progress_callback:
+                    progress_callback(rows, min(buffer.tell() / total_bytes, 1.0))
+        
+        if not chunks:
+            raise ValueError("沒有有效的資料行")
+        
+        return concat_compact(chunks)
+    
+    def _encoding_sample(self, file_content: bytes) -> bytes:
+        """取得編碼檢測用的樣本，於換行處截斷以免切斷多位元組字元"""
+        if len(file_content) <= ENCODING_SAMPLE_BYTES:
+            return file_content
+        sample = file_content[:ENCODING_SAMPLE_BYTES]
+        cut = sample.rfind(b'\n')
+        return sample[:cut + 1] if cut > 0 else sample
+    
+    def _candidate_encodings(self, sample: bytes) -> List[str]:
+        """依樣本內容排列候選編碼，可能性高者在前"""
+        if sample.startswith(codecs.BOM_UTF8):
+            likely = ['utf-8-sig']
+        elif self._can_decode(sample, 'utf-8'):
+            likely = ['utf-8']
+        else:
+            detected = chardet.detect(sample)
+            logger.info(f"檢測到的編碼：{detected['encoding']} (信心度：{detected['confidence']:.2f})")
+            likely = [detected['encoding'], 'big5', 'cp950']
+        
+        candidates = []
+        for enc in likely + FALLBACK_ENCODINGS:
+            try:
+                name = codecs.lookup(enc).name if enc else None
+            except LookupError:
+                name = None
+            if name and name not in candidates:
+                candidates.append(name)
+        return candidates
+    
+    @staticmethod
+    def _can_decode(sample: bytes, encoding: str) -> bool:
+        try:
+            sample.decode(encoding)
+            return True
+        except (UnicodeDecodeError, UnicodeError, LookupError):
+            return False
+    
+    def _normalize_schema(self, df: pd.DataFrame) -> pd.DataFrame:
+        """精簡欄位型別並記錄記憶體節省量"""
+        df, report = normalize_schema(df)
+        self.last_load_stats = dict(report)
+        return df
+    
+    def _snapshot_key(self, kind: str, content: Optional[bytes] = None, file_path: Optional[str] = None) -> Optional[str]:
+        """計算資料快照鍵值，未啟用快照或計算失敗時回傳 None"""
+        if self.snapshot_cache is None:
+            return None
+        try:
+            if file_path is not None:
+                return self.snapshot_cache.key_for_file(kind, file_path)
+            return self.snapshot_cache.key_for_bytes(kind, content)
+        except Exception as e:
+            logger.warning(f"計算資料快照鍵值失敗: {e}")
+            return None
+    
+    def invalidate_snapshots(self, key: Optional[str] = None) -> int:
+        """清除資料快照，回傳刪除的檔案數"""
+        if self.snapshot_cache is None:
+            return 0
+        return self.snapshot_cache.invalidate(key)
+    
     def _map_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """映射欄位名稱到標準格式"""
         required_mapping = {
@@ -165,44 +377,101 @@ class DataProcessor:
         return df.rename(columns=column_mapping)
     
     def _process_dates(self, df: pd.DataFrame) -> pd.DataFrame:
-        """處理日期欄位，轉換為年份"""
-        try:
-            # 嘗試民國年格式
-            df['年份'] = df['日期'].astype(str).str[:3].astype(int) + 1911
-        except:
-            try:
-                # 嘗試標準日期格式
-                df['年份'] = pd.to_datetime(df['日期'], errors='coerce').dt.year
-                df = df.dropna(subset=['年份'])
-                df['年份'] = df['年份'].astype(int)
-            except:
-                try:
-                    # 嘗試西元年格式
-                    df['年份'] = df['日期'].astype(str).str[:4].astype(int)
-                except:
-                    raise ValueError("無法處理日期格式")
+        """處理日期欄位，轉換為年份，無法解析日期的資料列會被捨棄"""
+        years = map_unique(df['日期'], self._parse_years, vectorized=True)
+        
+        invalid = years.isna()
+        if invalid.any():
+            logger.warning(f"捨棄 {int(invalid.sum())} 筆無法解析日期的資料")
+            df = df[~invalid].copy()
+            years = years[~invalid]
         
+        df['年份'] = years.astype(int)
         return df
     
+    @staticmethod
+    def _roc_years(dates: pd.Series) -> np.ndarray:
+        """將 7 位數民國年日期轉為西元年份，其餘為 NaN"""
+        roc = dates.str.fullmatch(r'\d{7}').to_numpy(dtype=bool)
+        years = np.full(len(dates), np.nan)
+        years[roc] = dates[roc].str[:3].astype(int).to_numpy() + 1911
+        return years
+    
+    @staticmethod
+    def _parse_years(dates: pd.Series) -> np.ndarray:
+        """將日期值轉為西元年份，支援民國年與標準日期格式，無法解析者為 NaN"""
+        text = dates.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+        years = pd.Series(np.nan, index=dates.index)
+        
+        # 民國年格式（數值欄位會去掉前導零，因此接受 6 位數）
+        roc = text.str.fullmatch(r'\d{6,7}')
+        if roc.any():
+            years[roc] = text[roc].str.zfill(7).str[:3].astype(int) + 1911
+        
+        # 含分隔符號的民國年格式（例如 112/01/01、112-03-04）
+        roc_separated = text.str.fullmatch(r'\d{2,3}[/-]\d{1,2}[/-]\d{1,2}')
+        if roc_separated.any():
+            years[roc_separated] = text[roc_separated].str.extract(r'^(\d+)', expand=False).astype(int) + 1911
+        
+        # 標準日期格式（各列格式可能不同，逐一推斷）
+        rest = ~(roc | roc_separated)
+        if rest.any():
+            years[rest] = pd.to_datetime(text[rest], errors='coerce', format='mixed').dt.year
+        
+        return years.to_numpy()
+    
     def generate_statistics(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """生成統計資料"""
+        """生成統計資料，同一資料集版本只計算一次
+        
+        回傳的字典會由後續呼叫共用，請勿直接修改。
+        當前資料的快取鍵值取自與立方體同一次讀取的版本，計算期間資料被替換時不寫入快取。
+        """
+        current_df, current_cube, version = self._current_state()
+        if df is current_df:
+            key, cube = ('current', version), current_cube
+        else:
+            key, cube = self._dataset_key(df), None
+        if key is not None:
+            stats = self._stats_cache.get(key)
+            if stats is not None:
+                self.stats_cache_hits += 1
+                return stats
+        
+        self.stats_cache_misses += 1
+        stats = self._compute_statistics(df, cube)
+        if key is not None:
+            with self._current_lock:
+                if key[0] != 'current' or key[1] == self.data_version:
+                    if len(self._stats_cache) >= STATS_CACHE_SIZE:
+                        self._stats_cache.pop(next(iter(self._stats_cache)))
+                    self._stats_cache[key] = stats
+        return stats
+    
+    def _compute_statistics(self, df: pd.DataFrame, cube: Optional[CrimeCube] = None) -> Dict[str, Any]:
+        """計算統計資料，提供當前資料的聚合立方體時直接由立方體查詢"""
         try:
-            from src.data.area_analyzer import AreaAnalyzer
+            if cube is not None and cube.row_count:
+                years = cube.years
+                return {
+                    '總案件數': cube.row_count,
+                    '年份範圍': f"{years[0]} - {years[-1]}",
+                    '可用地區': cube.areas_info,
+                    **cube.summary()
+                }
             
-            analyzer = AreaAnalyzer()
-            areas_info = analyzer.extract_area_info(df)
+            areas_info = self.area_analyzer.extract_area_info(df)
             
             stats = {
                 '總案件數': len(df),
                 '年份範圍': f"{df['年份'].min()} - {df['年份'].max()}",
                 '可用地區': areas_info,
                 '年份統計': df['年份'].value_counts().sort_index().to_dict(),
-                '時段統計': df['時段'].value_counts().to_dict(),
-                '案類統計': df['案類'].value_counts().to_dict()
+                '時段統計': self._count_values(df['時段']),
+                '案類統計': self._count_values(df['案類'])
             }
             
             return stats
-            
+        
         except Exception as e:
             logger.error(f"生成統計資料時發生錯誤: {e}")
             return {
@@ -210,13 +479,109 @@ class DataProcessor:
                 '年份範圍': f"{df['年份'].min()} - {df['年份'].max()}",
                 '可用地區': {},
                 '年份統計': df['年份'].value_counts().sort_index().to_dict(),
-                '時段統計': df['時段'].value_counts().to_dict(),
-                '案類統計': df['案類'].value_counts().to_dict()
+                '時段統計': self._count_values(df['時段']),
+                '案類統計': self._count_values(df['案類'])
             }
     
+    def get_stats_cache_info(self) -> Dict[str, int]:
+        """取得統計快取的命中次數與目前狀態"""
+        return {
+            'hits': self.stats_cache_hits,
+            'misses': self.stats_cache_misses,
+            'size': len(self._stats_cache),
+            'data_version': self.data_version
+        }
+    
+    def _dataset_key(self, df: pd.DataFrame) -> Optional[Tuple[str, Any]]:
+        """取得載入資料的統計快取鍵值，無法識別的資料回傳 None（不快取）"""
+        entry = self._dataset_keys.get(id(df))
+        if entry is not None and entry[0]() is df:
+            return ('snapshot', entry[1])
+        return None
+    
+    def _register_dataset(self, df: pd.DataFrame, fingerprint: str):
+        """記錄載入資料對應的內容雜湊，以弱參照確認物件未被回收後重用 id"""
+        self._dataset_keys = {
+            key: entry for key, entry in self._dataset_keys.items() if entry[0]() is not None
+        }
+        self._dataset_keys[id(df)] = (weakref.ref(df), fingerprint)
+    
+    def _invalidate_statistics(self):
+        """當前資料變更時遞增版本並移除舊版本的統計快取（呼叫端需持有 _current_lock）"""
+        self.data_version += 1
+        for key in [key for key in self._stats_cache if key[0] == 'current']:
+            del self._stats_cache[key]
+    
+    def _current_state(self) -> Tuple[Optional[pd.DataFrame], Optional[CrimeCube], int]:
+        """一次取得 (當前資料, 聚合立方體, 資料版本)"""
+        with self._current_lock:
+            return self.current_df, self.current_cube, self.data_version
+    
+    @staticmethod
+    def _count_values(series: pd.Series) -> Dict[Any, int]:
+        """計算各值出現次數，略過 category 欄位中未出現的類別"""
+        counts = series.value_counts()
+        return counts[counts > 0].to_dict()
+    
     def set_current_data(self, df: pd.DataFrame):
-        """設定當前資料"""
-        self.current_df = df
+        """設定當前資料，並預先解析地點的行政區欄位與建立聚合立方體供後續查詢重複使用
+        
+        立方體建立完成後才與資料、版本一起替換，建立期間的查詢仍使用舊資料與舊立方體。
+        """
+        df = self.area_analyzer.add_area_columns(df)
+        try:
+            cube = CrimeCube(df, self.area_analyzer)
+        except Exception as e:
+            logger.warning(f"建立聚合立方體失敗，將改用原始資料計算: {e}")
+            cube = None
+        previous_df, _, _ = self._current_state()
+        appended = self._appended_rows(previous_df, df)
+        with self._current_lock:
+            previous_version = self.data_version
+            self._invalidate_statistics()
+            if appended is not None and self.current_df is previous_df:
+                self._last_append = (previous_version, self.data_version, appended)
+            else:
+                self._last_append = None
+            self.current_df = df
+            self.current_cube = cube
+    
+    def appended_rows(self, since_version: Optional[int]) -> Optional[pd.DataFrame]:
+        """取得版本 since_version 之後只在尾端新增的資料列
+        
+        當前資料不是由該版本直接附加資料而來（中間有其他版本、或既有資料列有變動）時回傳 None，
+        呼叫端需以完整資料重新計算。
+        """
+        with self._current_lock:
+            last_append = self._last_append
+            if last_append is None or last_append[0] != since_version or last_append[1] != self.data_version:
+                return None
+            return last_append[2]
+    
+    @staticmethod
+    def _appended_rows(previous: Optional[pd.DataFrame], df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """新資料的前段與舊資料完全相同時回傳其餘的資料列，否則回傳 None"""
+        if previous is None or len(df) < len(previous):
+            return None
+        columns = [col for col in previous.columns if col not in AREA_COLUMNS]
+        if set(columns) != {col for col in df.columns if col not in AREA_COLUMNS}:
+            return None
+        
+        head = df.iloc[:len(previous)]
+        for col in columns:
+            # 以內容雜湊比較，category 與字串欄位的相同內容視為相同
+            old_hash = pd.util.hash_pandas_object(previous[col], index=False).to_numpy()
+            new_hash = pd.util.hash_pandas_object(head[col], index=False).to_numpy()
+            if not np.array_equal(old_hash, new_hash):
+                return None
+        return df.iloc[len(previous):]
+    
+    def get_cube(self, df: pd.DataFrame) -> CrimeCube:
+        """取得資料的聚合立方體，當前資料直接使用預先建立的立方體"""
+        current_df, current_cube, _ = self._current_state()
+        if df is current_df and current_cube is not None:
+            return current_cube
+        return CrimeCube(self.area_analyzer.add_area_columns(df), self.area_analyzer)
     
     def get_current_data(self) -> Optional[pd.DataFrame]:
         """取得當前資料"""
@@ -224,4 +589,8 @@ class DataProcessor:
     
     def clear_current_data(self):
         """清除當前資料"""
-        self.current_df = None
+        with self._current_lock:
+            self._invalidate_statistics()
+            self._last_append = None
+            self.current_df = None
+            self.current_cube = None
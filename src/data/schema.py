@@ -0,0 +1,148 @@
+"""
+資料結構模組
+將標準化後的犯罪資料轉換為精簡的欄位型別以降低記憶體用量
+"""
+
+import pandas as pd
+import numpy as np
+import logging
+from typing import Dict, Any, Tuple, List, Callable, Optional
+from pandas.api.types import union_categoricals
+from pandas.api.extensions import take
+
+logger = logging.getLogger(__name__)
+
+# 適合轉為 category 的字串欄位
+CATEGORICAL_COLUMNS = ['案類', '時段', '地點']
+
+# 不重複值比例低於此門檻才轉為 category
+CATEGORY_MAX_RATIO = 0.5
+
+def normalize_schema(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """轉換欄位型別並回傳 (精簡後資料, 記憶體報告)
+    
+    - 低基數字串欄位轉為 category
+    - 7 位數民國年日期轉為 int32（例如 1120101），其餘可解析的日期轉為 datetime64
+    - 年份轉為 int16
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    df = df.copy()
+    
+    for col in CATEGORICAL_COLUMNS:
+        if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        categorical = df[col].astype('category')
+        if len(df) and len(categorical.cat.categories) / len(df) <= CATEGORY_MAX_RATIO:
+            df[col] = categorical
+    
+    if '日期' in df.columns:
+        df['日期'] = _compact_dates(df['日期'])
+    
+    if '年份' in df.columns and pd.api.types.is_integer_dtype(df['年份']):
+        if df.empty or (df['年份'].min() >= np.iinfo(np.int16).min and df['年份'].max() <= np.iinfo(np.int16).max):
+            df['年份'] = df['年份'].astype(np.int16)
+    
+    after = int(df.memory_usage(deep=True).sum())
+    report = {
+        '原始記憶體': before,
+        '精簡後記憶體': after,
+        '節省比例': round(1 - after / before, 3) if before else 0.0
+    }
+    logger.info(f"資料型別精簡完成：{before / 1024 / 1024:.1f}MB → {after / 1024 / 1024:.1f}MB")
+    return df, report
+
+def to_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """將低基數字串欄位直接轉為 category，供分批載入時維持精簡型別"""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+def concat_compact(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """合併分批資料，category 欄位以類別聯集合併，避免退回 object 型別"""
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    
+    columns = {}
+    for col in frames[0].columns:
+        parts = [frame[col] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[col] = pd.Series(union_categoricals(parts, ignore_order=True))
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+def factorize_column(series: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """取得欄位的 (代碼, 不重複值)，category 欄位直接沿用既有代碼，缺值的代碼為 -1"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, uniques = pd.factorize(series)
+    return codes, pd.Index(uniques)
+
+def broadcast_codes(codes: np.ndarray, values, index: Optional[pd.Index] = None, name=None,
+                    as_category: bool = False, fill_value=None) -> pd.Series:
+    """將不重複值的運算結果依代碼展開回每一列，代碼 -1 的列填入 fill_value"""
+    if as_category:
+        level_codes, categories = pd.factorize(pd.Series(list(values), dtype=object))
+        row_codes = np.append(level_codes, -1)[codes]
+        return pd.Series(pd.Categorical.from_codes(row_codes, categories=categories), index=index, name=name)
+    
+    values = values.array if isinstance(values, pd.Series) else np.asarray(values)
+    return pd.Series(take(values, codes, allow_fill=True, fill_value=fill_value), index=index, name=name)
+
+def map_unique(series: pd.Series, func: Callable, vectorized: bool = False,
+               as_category: bool = False, fill_value=None) -> pd.Series:
+    """只對欄位的不重複值執行轉換，再以代碼展開回原本的列
+    
+    vectorized 為 True 時 func 接收不重複值組成的 Series，否則逐一接收單一值。
+    """
+    codes, uniques = factorize_column(series)
+    if vectorized:
+        values = func(pd.Series(uniques))
+    else:
+        values = [func(value) for value in uniques]
+    return broadcast_codes(codes, values, index=series.index, name=series.name,
+                           as_category=as_category, fill_value=fill_value)
+
+def _compact_dates(dates: pd.Series) -> pd.Series:
+    """將日期欄位轉為 int32 民國年日期或 datetime64，無法轉換時保持原樣"""
+    if pd.api.types.is_datetime64_any_dtype(dates) or pd.api.types.is_integer_dtype(dates):
+        return dates
+    
+    # 日期重複度高，只檢查不重複值
+    codes, uniques = pd.factorize(dates)
+    text = pd.Series(uniques).astype(str)
+    if (codes >= 0).all() and text.str.fullmatch(r'\d{7}').all():
+        return pd.Series(text.astype(np.int32).to_numpy()[codes], index=dates.index)
+    
+    parsed = pd.to_datetime(dates, errors='coerce')
+    if parsed.notna().all():
+        return parsed
+    
+    return dates
+
+def roc_to_datetime(dates: pd.Series) -> pd.Series:
+    """將日期欄位轉為 datetime64，支援民國年（字串或 int32，例如 1120101）與西元日期，無法解析者為 NaT"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    
+    zero_pad = pd.api.types.is_integer_dtype(dates)
+    return map_unique(dates, lambda uniques: _parse_dates(uniques, zero_pad), vectorized=True)
+
+def _parse_dates(dates: pd.Series, zero_pad: bool) -> pd.Series:
+    text = dates.astype(str)
+    if zero_pad:
+        # int32 儲存會去掉民國 100 年前的前導零
+        text = text.str.zfill(7)
+    roc = text.str.fullmatch(r'\d{7}')
+    result = pd.Series(pd.NaT, index=dates.index, dtype='datetime64[ns]')
+    
+    if roc.any():
+        roc_text = text[roc]
+        western = (roc_text.str[:3].astype(int) + 1911).astype(str) + roc_text.str[3:]
+        result[roc] = pd.to_datetime(western, format='%Y%m%d', errors='coerce')
+    
+    if (~roc).any():
+        result[~roc] = pd.to_datetime(text[~roc], errors='coerce')
+    
+    return result
@@ -0,0 +1,156 @@
+"""
+資料快照模組
+以欄式二進位格式快取已解析的資料集，依來源內容雜湊作為索引
+"""
+
+import pandas as pd
+import hashlib
+import os
+import re
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# 解析流程或資料格式變更時遞增，使舊快照自動失效
+SNAPSHOT_VERSION = 2
+
+# 計算檔案雜湊時每次讀取的位元組數
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# 預設保留的快照數量
+DEFAULT_KEEP_SNAPSHOTS = 5
+
+# 快照檔名（「類型-雜湊.副檔名」，含寫入中的暫存檔），清除時只處理符合的檔案
+SNAPSHOT_FILE_PATTERN = re.compile(r'^\w+-[0-9a-f]{40}\.(parquet|pkl)(\.tmp)?$')
+
+class DataSnapshotCache:
+    """資料快照快取類
+    
+    儲存時只保留最近使用的 keep 個快照（依修改時間，載入時會更新），keep 為 0 時不淘汰。
+    """
+    
+    def __init__(self, cache_dir: str = 'data/cache', keep: int = DEFAULT_KEEP_SNAPSHOTS):
+        self.cache_dir = cache_dir
+        self.keep = keep
+    
+    def key_for_bytes(self, kind: str, content: bytes) -> str:
+        """以內容雜湊產生快照鍵值"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"v{SNAPSHOT_VERSION}:{kind}:".encode('utf-8'))
+        digest.update(content)
+        return f"{kind}-{digest.hexdigest()}"
+    
+    def key_for_file(self, kind: str, file_path: str) -> str:
+        """分段讀取檔案內容產生快照鍵值"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"v{SNAPSHOT_VERSION}:{kind}:".encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return f"{kind}-{digest.hexdigest()}"
+    
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+    
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        """載入快照，不存在或損毀時回傳 None"""
+        for ext in ('parquet', 'pkl'):
+            path = self._path(key, ext)
+            if not os.path.exists(path):
+                continue
+            try:
+                if ext == 'parquet':
+                    df = pd.read_parquet(path)
+                else:
+                    df = pd.read_pickle(path)
+                self._touch(path)
+                logger.info(f"已從快照載入 {len(df)} 筆資料：{path}")
+                return df
+            except Exception as e:
+                logger.warning(f"讀取快照失敗，將重新解析 ({path}): {e}")
+                self._remove(path)
+        return None
+    
+    def save(self, key: str, df: pd.DataFrame) -> bool:
+        """儲存快照，優先使用 Parquet，無 pyarrow 或欄位型別不支援時改用 pickle"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"無法建立快照目錄 {self.cache_dir}: {e}")
+            return False
+        
+        formats = ['parquet', 'pkl'] if HAS_PYARROW else ['pkl']
+        for ext in formats:
+            path = self._path(key, ext)
+            tmp_path = f"{path}.tmp"
+            try:
+                if ext == 'parquet':
+                    df.to_parquet(tmp_path, index=False)
+                else:
+                    df.to_pickle(tmp_path)
+                os.replace(tmp_path, path)
+                logger.info(f"已儲存資料快照：{path}")
+                self._evict(protect=path)
+                return True
+            except Exception as e:
+                logger.warning(f"以 {ext} 儲存快照失敗: {e}")
+                self._remove(tmp_path)
+        return False
+    
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """刪除指定快照，未指定時清除全部快照檔（目錄中的其他檔案不受影響），回傳刪除的檔案數"""
+        removed = 0
+        for path in self.snapshot_files():
+            if key and not os.path.basename(path).startswith(f"{key}."):
+                continue
+            if self._remove(path):
+                removed += 1
+        if removed:
+            logger.info(f"已清除 {removed} 個資料快照")
+        return removed
+    
+    def snapshot_files(self) -> List[str]:
+        """列出快照檔，最近使用者在前"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not SNAPSHOT_FILE_PATTERN.match(name):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        return [path for _, path in sorted(entries, reverse=True)]
+    
+    def _evict(self, protect: Optional[str] = None):
+        """只保留最近的 keep 個快照"""
+        if self.keep <= 0:
+            return
+        snapshots = [path for path in self.snapshot_files() if not path.endswith('.tmp')]
+        for path in snapshots[self.keep:]:
+            if path != protect and self._remove(path):
+                logger.info(f"已淘汰舊資料快照：{path}")
+    
+    def _touch(self, path: str):
+        """更新修改時間，讓最近載入的快照不被淘汰"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
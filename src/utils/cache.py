@@ -0,0 +1,71 @@
+"""
+快取工具模組
+提供執行緒安全、具存活時間的 LRU 快取
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class TTLCache:
+    """LRU + TTL 快取類
+    
+    超過 max_size 時淘汰最久未使用的項目，超過 ttl 秒的項目視為不存在。
+    """
+    
+    def __init__(self, max_size: int = 256, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """取得快取值，不存在或已過期時回傳 default"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """寫入快取值，可個別指定存活秒數"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """移除並回傳快取值，不存在時回傳 default"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+    
+    def clear(self):
+        """清除所有快取值（保留命中統計）"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """取得命中統計"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl
+        }
@@ -0,0 +1,146 @@
+"""
+CKAN datastore 分頁讀取模組
+以 offset / limit（或 _links.next）逐頁讀取 datastore_search，限制同時進行的請求數，每頁直接轉為 DataFrame
+"""
+
+import aiohttp
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urljoin
+
+import pandas as pd
+
+from src.utils.ckan_resources import TAIPEI_CKAN_BASE, resource_gone
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# CKAN 欄位型別中可轉為數值的類型，整數欄位另外縮小為最小的整數型別
+INTEGER_FIELD_TYPES = {'int', 'int2', 'int4', 'int8', 'integer', 'bigint'}
+NUMERIC_FIELD_TYPES = INTEGER_FIELD_TYPES | {'numeric', 'float', 'float4', 'float8'}
+
+class DatastoreError(Exception):
+    """datastore_search 回傳錯誤"""
+
+class ResourceGoneError(DatastoreError):
+    """resource 已不存在"""
+
+class DatastoreReader:
+    """CKAN datastore_search 分頁讀取器
+    
+    第一頁取得總筆數後，其餘頁面以 offset 平行下載，最多同時 concurrency 個請求，
+    並依順序產生；伺服器未提供總筆數時改為依 _links.next 逐頁讀取。
+    記憶體中只保留進行中的頁面，不會把整份資料集載入成單一 JSON。
+    """
+    
+    def __init__(self, session: aiohttp.ClientSession, base: str = TAIPEI_CKAN_BASE,
+                 page_size: Optional[int] = None, concurrency: Optional[int] = None):
+        self.session = session
+        self.base = base.rstrip('/')
+        self.page_size = config.CKAN_PAGE_SIZE if page_size is None else page_size
+        self.concurrency = max(1, config.CKAN_PAGE_CONCURRENCY if concurrency is None else concurrency)
+    
+    async def pages(self, resource_id: str, params: Optional[Dict[str, Any]] = None,
+                    max_records: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """依序產生每一頁的 result（含 records 與 fields），max_records 限制總筆數"""
+        url = f"{self.base}/datastore_search"
+        params = {**(params or {}), 'resource_id': resource_id}
+        if 'q' not in params:
+            # 依 _id 排序，確保各頁不重複也不遺漏
+            params.setdefault('sort', '_id')
+        
+        limit = self.page_size if max_records is None else max(0, min(self.page_size, max_records))
+        first = await self._fetch(url, {**params, 'offset': 0, 'limit': limit})
+        records = first.get('records') or []
+        yield first
+        
+        total = first.get('total')
+        if total is None:
+            async for page in self._follow_links(first, len(records), max_records):
+                yield page
+            return
+        end = total if max_records is None else min(total, max_records)
+        logger.info(f"resource {resource_id} 共 {total} 筆，讀取 {end} 筆（每頁 {self.page_size} 筆）")
+        
+        offsets = iter(range(len(records), end, self.page_size)) if records else iter(())
+        pending = deque()
+        
+        def schedule():
+            while len(pending) < self.concurrency:
+                offset = next(offsets, None)
+                if offset is None:
+                    return
+                page_params = {**params, 'offset': offset, 'limit': min(self.page_size, end - offset)}
+                pending.append(asyncio.ensure_future(self._fetch(url, page_params)))
+        
+        schedule()
+        try:
+            while pending:
+                page = await pending.popleft()
+                schedule()
+                if not page.get('records'):
+                    return
+                yield page
+        finally:
+            # 呼叫端提前停止或發生錯誤時取消尚未使用的頁面
+            for task in pending:
+                if not task.cancel() and not task.cancelled():
+                    task.exception()
+    
+    async def frames(self, resource_id: str, params: Optional[Dict[str, Any]] = None,
+                     max_records: Optional[int] = None) -> AsyncIterator[pd.DataFrame]:
+        """依序產生每一頁轉換後的 DataFrame，數值欄位依 CKAN 欄位型別轉為數值型別"""
+        fields = None
+        async for page in self.pages(resource_id, params, max_records):
+            if fields is None:
+                fields = page.get('fields') or []
+            records = page.get('records') or []
+            if records:
+                yield self.to_frame(records, fields)
+    
+    @staticmethod
+    def to_frame(records: List[Dict[str, Any]], fields: List[Dict[str, Any]]) -> pd.DataFrame:
+        """將一頁 records 轉為 DataFrame，欄位順序依 fields"""
+        columns = [field['id'] for field in fields if field.get('id') != '_full_text'] or None
+        df = pd.DataFrame.from_records(records, columns=columns)
+        for field in fields:
+            column, field_type = field.get('id'), str(field.get('type', '')).lower()
+            if column not in df.columns or field_type not in NUMERIC_FIELD_TYPES:
+                continue
+            values = pd.to_numeric(df[column], errors='coerce')
+            # 整數欄位有缺值時保留為浮點數；浮點數不縮小，避免座標等數值失去精度
+            if field_type in INTEGER_FIELD_TYPES and not values.isna().any():
+                values = pd.to_numeric(values, downcast='integer')
+            df[column] = values
+        return df
+    
+    async def _follow_links(self, page: Dict[str, Any], count: int, end: Optional[int]) -> AsyncIterator[Dict[str, Any]]:
+        """依 _links.next 逐頁讀取，直到沒有資料或達到筆數上限"""
+        while page.get('records') and (end is None or count < end):
+            next_link = (page.get('_links') or {}).get('next')
+            if not next_link:
+                return
+            page = await self._fetch(urljoin(self.base, next_link))
+            records = page.get('records') or []
+            if end is not None:
+                page['records'] = records = records[:end - count]
+            if not records:
+                return
+            count += len(records)
+            yield page
+    
+    async def _fetch(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """下載一頁並回傳 result，resource 不存在時拋出 ResourceGoneError"""
+        async with self.session.get(url, params=params) as response:
+            try:
+                payload = await response.json(content_type=None)
+            except ValueError:
+                raise DatastoreError(f"datastore_search 回應無法解析: HTTP {response.status}")
+        if resource_gone(payload):
+            raise ResourceGoneError(str((payload.get('error') or {}).get('message', 'resource 不存在')))
+        if not isinstance(payload, dict) or not payload.get('success'):
+            error = payload.get('error') if isinstance(payload, dict) else None
+            raise DatastoreError(f"datastore_search 失敗: HTTP {response.status} {error}")
+        return payload.get('result') or {}
@@ -0,0 +1,127 @@
+"""
+CKAN 資源代碼快取模組
+保存 dataset UUID 對應的 datastore resource_id，重新啟動後仍可使用；datastore_search 回報資源不存在時失效並重新解析
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+from typing import Any, Dict, Optional
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# 台北市資料開放平臺的 CKAN action 端點
+TAIPEI_CKAN_BASE = 'https://data.taipei/api/3/action'
+
+def pick_resource_id(package: Dict[str, Any]) -> Optional[str]:
+    """從 package_show 回應挑選可查詢的 resource_id（優先 datastore_active，否則第一個）"""
+    if not isinstance(package, dict) or not package.get('success'):
+        return None
+    resources = (package.get('result') or {}).get('resources') or []
+    for resource in resources:
+        if resource.get('datastore_active'):
+            return resource.get('id')
+    return resources[0].get('id') if resources else None
+
+def resource_gone(payload: Dict[str, Any]) -> bool:
+    """判斷 datastore_search 回應是否表示 resource 已不存在
+    
+    CKAN 對不存在的 resource 回傳 Not Found Error，或在 resource_id 欄位回報 Not found 驗證錯誤。
+    """
+    if not isinstance(payload, dict) or payload.get('success'):
+        return False
+    error = payload.get('error') or {}
+    if not isinstance(error, dict):
+        return False
+    if error.get('__type') == 'Not Found Error':
+        return True
+    messages = error.get('resource_id') or []
+    if isinstance(messages, str):
+        messages = [messages]
+    return any('not found' in str(message).lower() for message in messages)
+
+class ResourceIdCache:
+    """dataset UUID → resource_id 對應表
+    
+    以「CKAN 端點 + dataset UUID」為鍵值，設定 path 時寫入 JSON 檔（先寫暫存檔再改名），
+    重新啟動後不必再呼叫 package_show。超過 max_age 秒的對應視為不存在，讓資料集更換資源後能重新解析。
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_age: Optional[float] = None):
+        if path is None:
+            path = config.CKAN_RESOURCE_CACHE_FILE if config.ENABLE_CACHE else ''
+        self.path = path
+        self.max_age = config.CKAN_RESOURCE_MAX_AGE_SECONDS if max_age is None else max_age
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+    
+    @staticmethod
+    def key(dataset_id: str, base: str = TAIPEI_CKAN_BASE) -> str:
+        return f"{base.rstrip('/')}#{dataset_id}"
+    
+    def get(self, dataset_id: str, base: str = TAIPEI_CKAN_BASE) -> Optional[str]:
+        """取得已解析的 resource_id，不存在或過期時回傳 None"""
+        with self._lock:
+            entry = self._load().get(self.key(dataset_id, base))
+            if entry is not None and (not self.max_age or time.time() - entry['resolved_at'] < self.max_age):
+                self._counters['hits'] += 1
+                return entry['resource_id']
+            self._counters['misses'] += 1
+            return None
+    
+    def set(self, dataset_id: str, resource_id: str, base: str = TAIPEI_CKAN_BASE):
+        """保存解析結果"""
+        with self._lock:
+            self._load()[self.key(dataset_id, base)] = {'resource_id': resource_id, 'resolved_at': time.time()}
+            self._save()
+    
+    def invalidate(self, dataset_id: str, base: str = TAIPEI_CKAN_BASE) -> bool:
+        """移除對應（resource 已不存在時呼叫），回傳是否有移除"""
+        with self._lock:
+            removed = self._load().pop(self.key(dataset_id, base), None) is not None
+            if removed:
+                self._counters['invalidations'] += 1
+                self._save()
+            return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """命中與失效統計"""
+        with self._lock:
+            return {**self._counters, 'entries': len(self._load()), 'persistent': bool(self.path)}
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """第一次使用時讀取檔案（呼叫端需持有鎖）"""
+        if self._entries is None:
+            self._entries = {}
+            if self.path:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._entries = json.load(f)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.warning(f"讀取 CKAN 資源代碼快取失敗: {e}")
+        return self._entries
+    
+    def _save(self):
+        """寫入檔案（呼叫端需持有鎖）"""
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"寫入 CKAN 資源代碼快取失敗: {e}")
+
+# 全域 CKAN 資源代碼快取實例
+ckan_resources = ResourceIdCache()
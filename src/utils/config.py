@@ -29,6 +29,7 @@ class Config:
     
     # 檔案上傳限制
     MAX_FILE_SIZE_MB: int = int(os.getenv('MAX_FILE_SIZE_MB', '50'))
+    CSV_CHUNK_ROWS: int = int(os.getenv('CSV_CHUNK_ROWS', '100000'))
     ALLOWED_FILE_TYPES: list = os.getenv('ALLOWED_FILE_TYPES', 'csv,xlsx,json').split(',')
     
     # 圖表設定
@@ -39,6 +40,39 @@ class Config:
     # 快取設定
     ENABLE_CACHE: bool = os.getenv('ENABLE_CACHE', 'True').lower() == 'true'
     CACHE_TTL_SECONDS: int = int(os.getenv('CACHE_TTL_SECONDS', '3600'))
+    DATA_CACHE_DIR: str = os.getenv('DATA_CACHE_DIR', 'data/cache')
+    DATA_SNAPSHOT_KEEP: int = int(os.getenv('DATA_SNAPSHOT_KEEP', '5'))
+    PREDICTION_CACHE_SIZE: int = int(os.getenv('PREDICTION_CACHE_SIZE', '1024'))
+    
+    # 模型訓練設定（False 時改在背景執行緒訓練）
+    TRAINING_USE_PROCESSES: bool = os.getenv('TRAINING_USE_PROCESSES', 'True').lower() == 'true'
+    MODEL_KEEP_VERSIONS: int = int(os.getenv('MODEL_KEEP_VERSIONS', '5'))
+    # 模型檔壓縮等級（0 時不壓縮，載入時改以記憶體映射讀取）
+    MODEL_COMPRESS: int = int(os.getenv('MODEL_COMPRESS', '3'))
+    TRAINING_N_JOBS: int = int(os.getenv('TRAINING_N_JOBS', '-1'))
+    # 訓練失敗後重新提交前的等待秒數（連續失敗時加倍，最多 TRAINING_RETRY_MAX_SECONDS）
+    TRAINING_RETRY_SECONDS: int = int(os.getenv('TRAINING_RETRY_SECONDS', '60'))
+    TRAINING_RETRY_MAX_SECONDS: int = int(os.getenv('TRAINING_RETRY_MAX_SECONDS', '3600'))
+    
+    # 外部 API 連線池設定
+    HTTP_POOL_LIMIT: int = int(os.getenv('HTTP_POOL_LIMIT', '100'))
+    HTTP_POOL_LIMIT_PER_HOST: int = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '8'))
+    HTTP_KEEPALIVE_SECONDS: int = int(os.getenv('HTTP_KEEPALIVE_SECONDS', '30'))
+    HTTP_DNS_CACHE_SECONDS: int = int(os.getenv('HTTP_DNS_CACHE_SECONDS', '300'))
+    HTTP_TIMEOUT_SECONDS: int = int(os.getenv('HTTP_TIMEOUT_SECONDS', '30'))
+    # 外部 API 回應快取（HTTP_CACHE_DIR 為空時只使用記憶體）
+    HTTP_CACHE_SIZE: int = int(os.getenv('HTTP_CACHE_SIZE', '256'))
+    HTTP_CACHE_DIR: str = os.getenv('HTTP_CACHE_DIR', '')
+    HTTP_CACHE_DEFAULT_TTL: int = int(os.getenv('HTTP_CACHE_DEFAULT_TTL', '300'))
+    # CKAN dataset → resource_id 對應檔（ENABLE_CACHE 為 False 時只保存在記憶體）
+    # 與資料快照目錄分開存放，清除快照時不會一併刪除
+    CKAN_RESOURCE_CACHE_FILE: str = os.getenv('CKAN_RESOURCE_CACHE_FILE', os.path.join('data', 'ckan', 'resources.json'))
+    CKAN_RESOURCE_MAX_AGE_SECONDS: int = int(os.getenv('CKAN_RESOURCE_MAX_AGE_SECONDS', str(7 * 24 * 3600)))
+    # CKAN datastore 分頁讀取：每頁筆數與同時進行的請求數
+    CKAN_PAGE_SIZE: int = int(os.getenv('CKAN_PAGE_SIZE', '5000'))
+    CKAN_PAGE_CONCURRENCY: int = int(os.getenv('CKAN_PAGE_CONCURRENCY', '4'))
+    # 分頁讀取完整 dataset 需要多次請求，整體等待的秒數上限
+    CKAN_LOAD_TIMEOUT_SECONDS: int = int(os.getenv('CKAN_LOAD_TIMEOUT_SECONDS', '600'))
     
     # 字型設定
     FONT_PATH: str = os.getenv('FONT_PATH', './Huninn-Regular.ttf')
@@ -0,0 +1,120 @@
+"""
+特徵處理模組
+將犯罪資料轉換為模型特徵：日期只解析一次，類別欄位以持久化的詞彙表向量化編碼
+"""
+
+import pandas as pd
+import numpy as np
+import copy
+import logging
+from typing import Dict, List, Optional
+
+from src.data.area_analyzer import AreaAnalyzer
+from src.data.schema import factorize_column, roc_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# 未知或缺值類別使用的標籤，固定為代碼 0
+UNKNOWN_LABEL = '未知'
+
+# 類別欄位與對應的特徵名稱，縣市取自解析後的地點
+CATEGORY_FEATURES = {'時段': '時段_encoded', '縣市': '地區_encoded', '案類': '案類_encoded'}
+
+# 特徵欄位順序
+FEATURE_COLUMNS = ['年份', '月份', '季度', '星期', '時段_encoded', '地區_encoded', '案類_encoded']
+
+class Vocabulary:
+    """類別詞彙表
+    
+    代碼 0 保留給未知與缺值，新類別依序附加在後面，既有類別的代碼不會改變。
+    """
+    
+    def __init__(self, labels: Optional[List] = None):
+        self.labels: List = [UNKNOWN_LABEL]
+        self._index = pd.Index(self.labels, dtype=object)
+        if labels is not None:
+            self.update(pd.Series(labels, dtype=object))
+    
+    def __len__(self) -> int:
+        return len(self.labels)
+    
+    def update(self, values: pd.Series) -> 'Vocabulary':
+        """加入尚未出現過的類別，回傳自身"""
+        _, uniques = factorize_column(values)
+        uniques = pd.Index(uniques, dtype=object)
+        new_labels = uniques[self._index.get_indexer(uniques) < 0]
+        if len(new_labels):
+            self.labels.extend(sorted(new_labels, key=str))
+            self._index = pd.Index(self.labels, dtype=object)
+        return self
+    
+    def transform(self, values: pd.Series) -> np.ndarray:
+        """只查詢不重複值的代碼再展開回每一列，未知類別與缺值為 0"""
+        codes, uniques = factorize_column(values)
+        positions = self._index.get_indexer(pd.Index(uniques, dtype=object))
+        lookup = np.append(np.where(positions < 0, 0, positions), 0)
+        return lookup[codes]
+
+class FeaturePipeline:
+    """特徵處理流程
+    
+    fit 建立各類別欄位的詞彙表，transform 對未見過的類別歸入未知而不拋出例外；
+    整個物件可直接序列化，與模型一起保存。
+    """
+    
+    def __init__(self):
+        self.vocabularies: Dict[str, Vocabulary] = {}
+        self.area_analyzer = AreaAnalyzer()
+    
+    @property
+    def is_fitted(self) -> bool:
+        return bool(self.vocabularies)
+    
+    def fit(self, df: pd.DataFrame) -> 'FeaturePipeline':
+        """以資料重新建立詞彙表"""
+        self.vocabularies = {}
+        return self.partial_fit(df)
+    
+    def partial_fit(self, df: pd.DataFrame) -> 'FeaturePipeline':
+        """將新資料的類別加入既有詞彙表，既有代碼不變"""
+        for column, values in self._category_columns(df).items():
+            self.vocabularies.setdefault(column, Vocabulary()).update(values)
+        return self
+    
+    def extended(self, df: pd.DataFrame) -> 'FeaturePipeline':
+        """回傳加入新資料類別後的副本，不改動目前使用中的流程"""
+        return copy.deepcopy(self).partial_fit(df)
+    
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """轉換為特徵資料表，缺少的來源欄位不產生對應特徵"""
+        features = {}
+        if '年份' in df.columns:
+            features['年份'] = df['年份'].to_numpy()
+        
+        # 時間特徵：日期只解析一次
+        if '日期' in df.columns:
+            dates = roc_to_datetime(df['日期']).dt
+            features['月份'] = dates.month.to_numpy(dtype=float)
+            features['季度'] = dates.quarter.to_numpy(dtype=float)
+            features['星期'] = dates.dayofweek.to_numpy(dtype=float)
+        
+        for column, values in self._category_columns(df).items():
+            vocabulary = self.vocabularies.get(column) or Vocabulary()
+            codes = vocabulary.transform(values)
+            unseen = int(((codes == 0) & values.notna().to_numpy()).sum())
+            if unseen:
+                logger.info(f"{column} 有 {unseen} 筆未見過的類別，歸入{UNKNOWN_LABEL}")
+            features[CATEGORY_FEATURES[column]] = codes
+        
+        result = pd.DataFrame(features, index=df.index)
+        return result[[col for col in FEATURE_COLUMNS if col in result.columns]].fillna(0)
+    
+    def _category_columns(self, df: pd.DataFrame) -> Dict[str, pd.Series]:
+        columns = {}
+        for column in CATEGORY_FEATURES:
+            if column == '縣市':
+                if '地點' in df.columns:
+                    columns[column] = self.area_analyzer.get_area_columns(df)['縣市']
+            elif column in df.columns:
+                columns[column] = df[column]
+        return columns
@@ -0,0 +1,283 @@
+"""
+時間序列預測模組
+依日期建立各地區的每月（或每週）案件數序列，以季節性指數平滑模型預測並提供預測區間
+"""
+
+import pandas as pd
+import numpy as np
+import itertools
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from joblib import Parallel, delayed
+
+from src.data.address_parser import normalize_name
+from src.data.area_analyzer import AreaAnalyzer
+from src.data.schema import roc_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# 各頻率的季節長度
+SEASON_LENGTHS = {'M': 12, 'W': 52}
+
+# 平滑參數候選值（level, trend, season）
+ALPHA_GRID = [0.1, 0.3, 0.5, 0.7, 0.9]
+BETA_GRID = [0.0, 0.05, 0.2]
+GAMMA_GRID = [0.05, 0.2, 0.4]
+
+# 序列數量達到此門檻才分散到多個行程擬合
+PARALLEL_MIN_SERIES = 32
+
+# 常用信賴水準對應的常態分位數
+Z_SCORES = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.96, 0.99: 2.5758}
+
+class SeasonalSeriesModel:
+    """加法 Holt-Winters 模型
+    
+    參數以一步預測誤差選出後固定，之後新增觀測值只需延續遞迴更新狀態，不必重新擬合。
+    觀測值不足兩個季節時不使用季節項。
+    """
+    
+    def __init__(self, season_length: int):
+        self.season_length = season_length
+        self.params: Tuple[float, float, float] = (0.5, 0.0, 0.0)
+        self.level = 0.0
+        self.trend = 0.0
+        self.seasonals = np.zeros(1)
+        self.history = np.zeros(0)
+        self.sse = 0.0
+        self.n_errors = 0
+    
+    @property
+    def n_obs(self) -> int:
+        return len(self.history)
+    
+    def fit(self, values) -> 'SeasonalSeriesModel':
+        """以參數網格同時執行所有候選參數的遞迴，選出一步預測誤差平方和最小者"""
+        values = np.asarray(values, dtype=float)
+        self.history = values.copy()
+        m = self.season_length if len(values) >= 2 * self.season_length else 1
+        
+        grid = np.array(list(itertools.product(ALPHA_GRID, BETA_GRID, GAMMA_GRID if m > 1 else [0.0])))
+        level, trend, seasonals = self._initial_state(values, m)
+        levels = np.full(len(grid), level)
+        trends = np.full(len(grid), trend)
+        season_states = np.tile(seasonals, (len(grid), 1))
+        sse = np.zeros(len(grid))
+        
+        # 第一個季節用於初始化，不計入誤差
+        for t in range(m if m > 1 else 1, len(values)):
+            sse += self._step(values[t], t % m, grid, levels, trends, season_states)
+        
+        best = int(np.argmin(sse))
+        self.params = tuple(float(p) for p in grid[best])
+        
+        # 以選定參數重新執行一次，保留最終狀態
+        self.level, self.trend, self.seasonals = level, trend, seasonals.copy()
+        self.sse, self.n_errors = 0.0, 0
+        self._advance(values, start=m if m > 1 else 1)
+        return self
+    
+    def update(self, values):
+        """延續目前狀態加入新的觀測值"""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        start = self.n_obs
+        self.history = np.concatenate([self.history, values])
+        if len(self.seasonals) == 1 and self.season_length > 1 and self.n_obs >= 2 * self.season_length:
+            # 資料累積到兩個季節後改用季節模型
+            self.fit(self.history)
+            return
+        self._advance(self.history, start=start)
+    
+    def forecast(self, horizon: int, level: float = 0.95) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """回傳 (預測值, 下界, 上界)，預測區間隨步數放寬，下界不小於 0"""
+        steps = np.arange(1, horizon + 1)
+        m = len(self.seasonals)
+        mean = self.level + steps * self.trend + self.seasonals[(self.n_obs + steps - 1) % m]
+        sigma = np.sqrt(self.sse / self.n_errors) if self.n_errors else 0.0
+        z = Z_SCORES.get(level, 1.96)
+        width = z * sigma * np.sqrt(steps)
+        mean = np.clip(mean, 0, None)
+        return mean, np.clip(mean - width, 0, None), mean + width
+    
+    def _advance(self, values: np.ndarray, start: int):
+        """以目前參數逐一套用 values[start:]"""
+        params = np.array([self.params])
+        levels, trends = np.array([self.level]), np.array([self.trend])
+        season_states = self.seasonals[np.newaxis, :].copy()
+        m = len(self.seasonals)
+        for t in range(start, len(values)):
+            error = self._step(values[t], t % m, params, levels, trends, season_states)
+            self.sse += float(error[0])
+            self.n_errors += 1
+        self.level, self.trend, self.seasonals = float(levels[0]), float(trends[0]), season_states[0]
+    
+    @staticmethod
+    def _step(value: float, season_index: int, params: np.ndarray, levels: np.ndarray,
+              trends: np.ndarray, season_states: np.ndarray) -> np.ndarray:
+        """對所有候選參數同時更新一步，回傳一步預測誤差平方"""
+        alpha, beta, gamma = params[:, 0], params[:, 1], params[:, 2]
+        season = season_states[:, season_index]
+        error = value - (levels + trends + season)
+        new_levels = alpha * (value - season) + (1 - alpha) * (levels + trends)
+        trends[:] = beta * (new_levels - levels) + (1 - beta) * trends
+        season_states[:, season_index] = gamma * (value - new_levels) + (1 - gamma) * season
+        levels[:] = new_levels
+        return error ** 2
+    
+    @staticmethod
+    def _initial_state(values: np.ndarray, m: int) -> Tuple[float, float, np.ndarray]:
+        if len(values) == 0:
+            return 0.0, 0.0, np.zeros(m)
+        if m == 1:
+            trend = float(values[1] - values[0]) if len(values) > 1 else 0.0
+            return float(values[0]), trend, np.zeros(1)
+        first, second = values[:m], values[m:2 * m]
+        trend = float((second.mean() - first.mean()) / m)
+        # 季節平均對應季節中點，扣除趨勢後即為季節項；狀態停在第一個季節結尾
+        baseline = first.mean() + trend * (np.arange(m) - (m - 1) / 2)
+        return float(baseline[-1]), trend, first - baseline
+
+def _fit_series(values: np.ndarray, season_length: int) -> SeasonalSeriesModel:
+    return SeasonalSeriesModel(season_length).fit(values)
+
+class SeasonalForecaster:
+    """各地區時間序列預測器
+    
+    fit 依日期建立各地區的計數序列並平行擬合；update 只處理新增資料：
+    新期間直接延續各序列的狀態，回補舊期間的序列才重新擬合。
+    """
+    
+    def __init__(self, freq: str = 'M', area_level: str = '縣市', n_jobs: int = -1):
+        if freq not in SEASON_LENGTHS:
+            raise ValueError(f"不支援的頻率：{freq}")
+        if area_level not in ('縣市', '區'):
+            raise ValueError(f"不支援的地區層級：{area_level}")
+        self.freq = freq
+        self.area_level = area_level
+        self.n_jobs = n_jobs
+        self.area_analyzer = AreaAnalyzer()
+        self.models: Dict[str, SeasonalSeriesModel] = {}
+        self.start_periods: Dict[str, pd.Period] = {}
+        self.last_period: Optional[pd.Period] = None
+    
+    @property
+    def season_length(self) -> int:
+        return SEASON_LENGTHS[self.freq]
+    
+    def build_series(self, df: pd.DataFrame) -> pd.DataFrame:
+        """建立 期間 × 地區 的案件數表，期間連續且缺少的期間補 0"""
+        if self.area_level == '區':
+            areas = self.area_analyzer.district_labels(df)
+        else:
+            areas = self.area_analyzer.get_area_columns(df)['縣市']
+        periods = roc_to_datetime(df['日期']).dt.to_period(self.freq)
+        
+        frame = pd.DataFrame({'地區': areas.array, '期間': periods.array}).dropna()
+        if frame.empty:
+            return pd.DataFrame(index=pd.PeriodIndex([], freq=self.freq))
+        
+        counts = frame.groupby(['期間', '地區'], observed=True).size().unstack(fill_value=0)
+        full_range = pd.period_range(counts.index.min(), counts.index.max(), freq=self.freq)
+        return counts.reindex(full_range, fill_value=0)
+    
+    def fit(self, df: pd.DataFrame) -> 'SeasonalForecaster':
+        """擬合所有地區的序列"""
+        series = self.build_series(df)
+        self.models, self.start_periods, self.last_period = {}, {}, None
+        if series.empty:
+            return self
+        
+        self.last_period = series.index[-1]
+        tasks = {}
+        for area in series.columns:
+            values = series[area]
+            first = values.to_numpy().nonzero()[0][0]
+            self.start_periods[area] = series.index[first]
+            tasks[area] = values.to_numpy()[first:]
+        
+        self.models = self._fit_many(tasks)
+        logger.info(f"已擬合 {len(self.models)} 個地區的時間序列（{self.freq}）")
+        return self
+    
+    def update(self, df_new: pd.DataFrame) -> List[str]:
+        """加入新資料，回傳需要重新擬合的地區"""
+        series = self.build_series(df_new)
+        if series.empty:
+            return []
+        if self.last_period is None:
+            self.fit(df_new)
+            return list(self.models)
+        
+        new_last = max(self.last_period, series.index[-1])
+        refit = {}
+        for area in set(series.columns) | set(self.models):
+            model = self.models.get(area)
+            start = self.start_periods.get(area)
+            new_counts = series[area] if area in series.columns else None
+            if new_counts is not None:
+                first = new_counts.index[new_counts.to_numpy().nonzero()[0][0]]
+                start = first if start is None else min(start, first)
+            
+            full_range = pd.period_range(start, new_last, freq=self.freq)
+            merged = self._history(area).reindex(full_range, fill_value=0)
+            if new_counts is not None:
+                merged = merged + new_counts.reindex(full_range, fill_value=0)
+            
+            # 新地區或舊期間有回補資料時重新擬合，其餘只延續狀態
+            backfilled = new_counts is not None and bool((new_counts[new_counts.index <= self.last_period] > 0).any())
+            self.start_periods[area] = start
+            if model is None or backfilled:
+                refit[area] = merged.to_numpy()
+            else:
+                model.update(merged.to_numpy()[model.n_obs:])
+        
+        self.models.update(self._fit_many(refit))
+        self.last_period = new_last
+        if refit:
+            logger.info(f"重新擬合 {len(refit)} 個有回補資料的地區序列")
+        return sorted(refit)
+    
+    def forecast(self, areas: Optional[List[str]] = None, horizon: int = 12, level: float = 0.95) -> pd.DataFrame:
+        """回傳 地區、期間、預測案件數、下界、上界 五欄的預測表
+        
+        序列的地區名稱統一為「台」，指定的地區先統一寫法（臺北市與台北市相同）。
+        """
+        columns = ['地區', '期間', '預測案件數', '下界', '上界']
+        if self.last_period is None:
+            return pd.DataFrame(columns=columns)
+        
+        periods = pd.period_range(self.last_period + 1, periods=horizon, freq=self.freq).astype(str)
+        tables = []
+        for area in ([normalize_name(area) for area in areas] if areas is not None else sorted(self.models)):
+            model = self.models.get(area)
+            if model is None:
+                logger.warning(f"沒有地區 {area} 的時間序列")
+                continue
+            mean, lower, upper = model.forecast(horizon, level)
+            tables.append(pd.DataFrame({
+                '地區': area, '期間': periods, '預測案件數': mean, '下界': lower, '上界': upper
+            }))
+        return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=columns)
+    
+    def _history(self, area: str) -> pd.Series:
+        model = self.models.get(area)
+        if model is None:
+            return pd.Series(dtype=float)
+        index = pd.period_range(self.start_periods[area], periods=model.n_obs, freq=self.freq)
+        return pd.Series(model.history, index=index)
+    
+    def _fit_many(self, tasks: Dict[str, np.ndarray]) -> Dict[str, SeasonalSeriesModel]:
+        """擬合多條序列，數量多時分散到多個行程"""
+        if not tasks:
+            return {}
+        areas = list(tasks)
+        if len(areas) >= PARALLEL_MIN_SERIES and self.n_jobs != 1:
+            models = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_series)(tasks[area], self.season_length) for area in areas
+            )
+        else:
+            models = [_fit_series(tasks[area], self.season_length) for area in areas]
+        return dict(zip(areas, models))
@@ -314,6 +314,15 @@ TAIPEI_DATASETS = {
     }
 }
 
+# 各資料集回應的快取秒數：即時資料數十秒，靜態資料數小時；未列出者使用 HTTP_CACHE_DEFAULT_TTL
+RESPONSE_CACHE_TTLS = {
+    "youbike": 30,
+    "library_seats": 60,
+    "bike_theft": 6 * 3600,
+    "ckan_package": 6 * 3600,
+    "ckan_datastore": 3600
+}
+
 # 資料格式說明（內部規格，非各平臺官方上限）
 DATA_FORMATS = {
     "json": {
@@ -5,39 +5,57 @@
 
 import aiohttp
 import asyncio
+import functools
 import json
 import logging
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import pandas as pd
-from src.utils.gov_data_config import VERIFIED_DATASETS, GOV_PLATFORM_DATASETS, CITY_APIS, CENTRAL_APIS
+from src.utils.config import config
+from src.utils.gov_data_config import VERIFIED_DATASETS, GOV_PLATFORM_DATASETS, CITY_APIS, CENTRAL_APIS, RESPONSE_CACHE_TTLS
+from src.utils.http_pool import SessionPool, SingleFlight, session_pool, single_flight
+from src.utils.response_cache import ResponseCache, response_cache
+from src.utils.ckan_resources import ResourceIdCache, TAIPEI_CKAN_BASE, ckan_resources, pick_resource_id, resource_gone
+from src.utils.ckan_datastore import DatastoreReader, ResourceGoneError
+from src.data.schema import concat_compact
 
 logger = logging.getLogger(__name__)
 
+def coalesced(method):
+    """相同參數的並行呼叫共用一次下載與解析結果
+    
+    DataFrame 結果以淺複本回傳給各呼叫者（寫入時複製），呼叫者修改欄位不會影響彼此。
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        result = await self.single_flight.do(key, lambda: method(self, *args, **kwargs))
+        return result.copy(deep=False) if isinstance(result, pd.DataFrame) else result
+    return wrapper
+
 class GovernmentDataAPI:
     """政府公開資料 API 整合類"""
     
-    def __init__(self):
+    def __init__(self, pool: Optional[SessionPool] = None, cache: Optional[ResponseCache] = None,
+                 resource_ids: Optional[ResourceIdCache] = None):
         self.session = None
+        self.pool = pool or session_pool
+        self.cache = cache or response_cache
+        self.resource_ids = resource_ids or ckan_resources
+        self.ckan_base = TAIPEI_CKAN_BASE
+        self.single_flight: SingleFlight = single_flight
         # 使用實際驗證過的資料集
         self.verified_datasets = VERIFIED_DATASETS
         self.platform_datasets = GOV_PLATFORM_DATASETS
         
     async def __aenter__(self):
-        """異步上下文管理器入口"""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                'User-Agent': 'Numora/2.0 (Serelix Studio)',
-                'Accept': 'application/json'
-            }
-        )
+        """異步上下文管理器入口，取用共用連線池的 session"""
+        self.session = await self.pool.session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """異步上下文管理器出口"""
-        if self.session:
-            await self.session.close()
+        """異步上下文管理器出口，連線保留在連線池供下次查詢重複使用"""
+        return None
     
     async def fetch_data(self, url: str, params: Dict[str, Any] = None) -> Optional[Dict]:
         """通用資料獲取方法"""
@@ -54,71 +72,153 @@ class GovernmentDataAPI:
             logger.error(f"獲取資料時發生錯誤: {e}")
             return None
     
-    async def _ckan_datastore_search_by_dataset(self, dataset_uuid: str, q: Optional[str] = None, limit: int = 100) -> Optional[List[Dict]]:
-        """透過 CKAN 以 dataset UUID 取得可查詢的 resource，並查詢 records"""
-        try:
-            package_url = "https://data.taipei/api/3/action/package_show"
-            params = {"id": dataset_uuid}
-            async with self.session.get(package_url, params=params) as resp:
-                if resp.status != 200:
-                    logger.warning(f"package_show 失敗: {resp.status}")
-                    return None
-                pkg = await resp.json()
-            if not pkg.get("success"):
+    async def _get_cached(self, url: str, dataset: str, params: Optional[Dict[str, Any]] = None,
+                          headers: Optional[Dict[str, str]] = None, error_body: bool = False) -> Optional[bytes]:
+        """取得回應內容並依資料集存活時間快取，過期後以 ETag / Last-Modified 重新驗證
+        
+        回傳 200 的回應內容（或重新驗證後沿用的快取內容），其他狀態回傳 None；
+        error_body 為 True 時另外回傳 4xx 的回應內容（不快取），供呼叫端判斷錯誤類型。
+        """
+        key = self.cache.key(url, params)
+        # 相同網址與參數的並行請求只送出一次
+        return await self.single_flight.do(
+            ('get', key, error_body),
+            lambda: self._fetch_cached(key, url, dataset, params, headers, error_body)
+        )
+    
+    async def _fetch_cached(self, key: str, url: str, dataset: str, params: Optional[Dict[str, Any]],
+                            headers: Optional[Dict[str, str]], error_body: bool = False) -> Optional[bytes]:
+        """查詢快取或上游伺服器（由 _get_cached 合併並行呼叫）"""
+        ttl = RESPONSE_CACHE_TTLS.get(dataset, config.HTTP_CACHE_DEFAULT_TTL)
+        entry = self.cache.get(key) if ttl > 0 else None
+        if entry is not None and entry.is_fresh:
+            self.cache.record('hits', len(entry.body))
+            return entry.body
+        
+        request_headers = dict(headers or {})
+        if entry is not None:
+            request_headers.update(entry.validators())
+        
+        async with self.session.get(url, params=params, headers=request_headers) as response:
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            if response.status == 304 and entry is not None:
+                self.cache.refresh(key, entry, ttl, etag, last_modified)
+                self.cache.record('revalidated', len(entry.body))
+                logger.info(f"{dataset} 資料未變更，沿用快取內容")
+                return entry.body
+            if response.status != 200:
+                logger.warning(f"{dataset} API 請求失敗: {response.status} - {url}")
+                if error_body and 400 <= response.status < 500:
+                    return await response.read()
                 return None
-            resources = pkg.get("result", {}).get("resources", [])
-            resource_id = None
-            for r in resources:
-                if r.get("datastore_active"):
-                    resource_id = r.get("id")
-                    break
-            if not resource_id and resources:
-                resource_id = resources[0].get("id")
+            body = await response.read()
+        
+        self.cache.record('downloads')
+        if ttl > 0:
+            self.cache.store(key, body, ttl, etag, last_modified)
+        return body
+    
+    async def _ckan_datastore_search(self, dataset_uuid: str, params: Dict[str, Any]) -> Optional[Dict]:
+        """以 dataset UUID 查詢 CKAN datastore_search，回傳 CKAN 回應
+        
+        resource 已不存在時清除對應記錄，重新解析一次後再查詢。
+        """
+        url = f"{self.ckan_base}/datastore_search"
+        for refresh in (False, True):
+            resource_id = await self._resolve_ckan_resource_id(dataset_uuid, refresh=refresh)
             if not resource_id:
                 return None
-
-            ds_url = "https://data.taipei/api/3/action/datastore_search"
-            ds_params = {"resource_id": resource_id, "limit": limit}
+            body = await self._get_cached(url, "ckan_datastore", params={"resource_id": resource_id, **params},
+                                          error_body=True)
+            if body is None:
+                return None
+            ds_json = json.loads(body)
+            if not resource_gone(ds_json):
+                return ds_json
+            logger.warning(f"resource {resource_id} 已不存在，重新解析 dataset {dataset_uuid}")
+            self.resource_ids.invalidate(dataset_uuid, self.ckan_base)
+        return None
+    
+    async def iter_ckan_dataset(self, dataset_uuid: str, params: Optional[Dict[str, Any]] = None,
+                                max_records: Optional[int] = None) -> AsyncIterator[pd.DataFrame]:
+        """分頁讀取 dataset 的完整 datastore 資料，逐頁產生 DataFrame
+        
+        尚未產生任何資料前 resource 已不存在時，清除對應記錄並重新解析一次。
+        """
+        for refresh in (False, True):
+            resource_id = await self._resolve_ckan_resource_id(dataset_uuid, refresh=refresh)
+            if not resource_id:
+                return
+            reader = DatastoreReader(self.session, self.ckan_base)
+            started = False
+            try:
+                async for frame in reader.frames(resource_id, params, max_records):
+                    started = True
+                    yield frame
+                return
+            except ResourceGoneError:
+                if started or refresh:
+                    raise
+                logger.warning(f"resource {resource_id} 已不存在，重新解析 dataset {dataset_uuid}")
+                self.resource_ids.invalidate(dataset_uuid, self.ckan_base)
+    
+    async def read_ckan_dataset(self, dataset_uuid: str, params: Optional[Dict[str, Any]] = None,
+                                max_records: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """讀取 dataset 的完整 datastore 資料並合併為一個 DataFrame，失敗時回傳 None"""
+        try:
+            frames = [frame async for frame in self.iter_ckan_dataset(dataset_uuid, params, max_records)]
+            return concat_compact(frames) if frames else None
+        except Exception as e:
+            logger.error(f"分頁讀取 CKAN dataset {dataset_uuid} 時發生錯誤: {e}")
+            return None
+    
+    async def _read_ckan_resource(self, resource_id: str, max_records: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """以 resource_id 分頁讀取完整 datastore 資料，沒有資料時回傳 None"""
+        reader = DatastoreReader(self.session, self.ckan_base)
+        frames = [frame async for frame in reader.frames(resource_id, max_records=max_records)]
+        return concat_compact(frames) if frames else None
+    
+    async def _ckan_datastore_search_by_dataset(self, dataset_uuid: str, q: Optional[str] = None, limit: int = 100) -> Optional[List[Dict]]:
+        """透過 CKAN 以 dataset UUID 取得可查詢的 resource，並查詢 records"""
+        try:
+            ds_params = {"limit": limit}
             if q:
                 ds_params["q"] = q
             # 先帶 q 查詢
-            async with self.session.get(ds_url, params=ds_params) as ds_resp:
-                if ds_resp.status != 200:
-                    logger.warning(f"datastore_search 失敗: {ds_resp.status}")
-                    return None
-                ds_json = await ds_resp.json()
+            ds_json = await self._ckan_datastore_search(dataset_uuid, ds_params)
+            if ds_json is None:
+                return None
             records = []
             if ds_json.get("success"):
                 records = ds_json.get("result", {}).get("records", [])
             # 若無結果，抓一批不帶 q 並在本地過濾
             if (not records) and q:
-                async with self.session.get(ds_url, params={"resource_id": resource_id, "limit": min(200, max(50, limit))}) as ds_resp2:
-                    if ds_resp2.status == 200:
-                        ds_json2 = await ds_resp2.json()
-                        if ds_json2.get("success"):
-                            bulk = ds_json2.get("result", {}).get("records", [])
-                            ql = str(q).lower()
-                            def m(r):
-                                try:
-                                    return any(ql in str(v).lower() for v in r.values())
-                                except Exception:
-                                    return False
-                            records = [r for r in bulk if m(r)][:limit]
+                ds_json2 = await self._ckan_datastore_search(dataset_uuid, {"limit": min(200, max(50, limit))})
+                if ds_json2 is not None and ds_json2.get("success"):
+                    bulk = ds_json2.get("result", {}).get("records", [])
+                    ql = str(q).lower()
+                    def m(r):
+                        try:
+                            return any(ql in str(v).lower() for v in r.values())
+                        except Exception:
+                            return False
+                    records = [r for r in bulk if m(r)][:limit]
             return records
         except Exception as e:
             logger.error(f"CKAN 查詢發生錯誤: {e}")
             return None
 
+    @coalesced
     async def get_taipei_youbike_data(self) -> Optional[pd.DataFrame]:
         """獲取台北市 YouBike 即時資料（官方 JSON 端點）"""
         import asyncio, aiohttp, requests as _req
         try:
             url = "https://tcgbusfs.blob.core.windows.net/dotapp/youbike/v2/youbike_immediate.json"
-            async with self.session.get(url) as resp:
-                if resp.status != 200:
-                    logger.warning(f"YouBike 端點回應狀態: {resp.status}")
-                    return None
-                text = await resp.text()
+            # 即時資料短暫快取，翻頁時不重複下載整份 JSON
+            body = await self._get_cached(url, "youbike")
+            if body is None:
+                return None
+            text = body.decode('utf-8-sig', errors='replace')
             import json as _json
             try:
                 data = _json.loads(text)
@@ -151,6 +251,7 @@ class GovernmentDataAPI:
             logger.error(f"獲取 YouBike 資料時發生錯誤: {e}")
             return None
     
+    @coalesced
     async def get_taipei_wifi_data(self) -> Optional[pd.DataFrame]:
         """獲取台北市 WiFi 熱點資料（CKAN 優先，失敗則回退 v1）"""
         try:
@@ -161,24 +262,13 @@ class GovernmentDataAPI:
             rid = dataset.get("resource_id")
             if rid:
                 try:
-                    ds_url = "https://data.taipei/api/3/action/datastore_search"
-                    logger.info(f"嘗試以 resource_id 直取 WiFi: {rid}")
-                    async with self.session.get(ds_url, params={"resource_id": rid, "limit": 1000}) as ds_resp:
-                        logger.info(f"resource_id 直取回應狀態: {ds_resp.status}")
-                        if ds_resp.status == 200:
-                            ds_json = await ds_resp.json()
-                            if ds_json.get("success"):
-                                records = ds_json.get("result", {}).get("records", [])
-                                logger.info(f"resource_id 直取回傳 {len(records)} 筆")
-                                if records:
-                                    df = pd.DataFrame(records)
-                                    logger.info(f"WiFi 欄位：{list(df.columns)}")
-                                    # 有資料就直接回傳（避免嚴格欄位判斷造成誤殺）
-                                    return df
-                            else:
-                                logger.warning(f"resource_id 直取 API 回傳 success=False: {ds_json.get('error')}")
-                        else:
-                            logger.warning(f"resource_id 直取 HTTP {ds_resp.status}")
+                    logger.info(f"嘗試以 resource_id 分頁讀取 WiFi: {rid}")
+                    df = await self._read_ckan_resource(rid)
+                    if df is not None:
+                        logger.info(f"resource_id 直取回傳 {len(df)} 筆，欄位：{list(df.columns)}")
+                        # 有資料就直接回傳（避免嚴格欄位判斷造成誤殺）
+                        return df
+                    logger.warning("resource_id 直取沒有資料")
                 except Exception as e:
                     logger.warning(f"以 resource_id 直取 WiFi 失敗: {e}", exc_info=True)
             else:
@@ -186,15 +276,14 @@ class GovernmentDataAPI:
                 
             # 先嘗試 CKAN 透過已知 dataset id
             logger.info("嘗試以 dataset UUID 透過 CKAN 查找 WiFi")
-            records = await self._ckan_datastore_search_by_dataset(dataset["id"], limit=1000)
-            if records:
-                df = pd.DataFrame(records)
+            df = await self.read_ckan_dataset(dataset["id"])
+            if df is not None and not df.empty:
                 logger.info(f"CKAN UUID 回傳 {len(df)} 筆，欄位：{list(df.columns)}")
                 return df
 
             # 2) 若既有 UUID 失敗，改以 package_search 自動搜尋 WiFi 資料集/資源
             logger.info("開始自動發現 WiFi 資料...")
-            auto_df = await self._ckan_autodiscover_wifi(limit=1000)
+            auto_df = await self._ckan_autodiscover_wifi()
             if auto_df is not None and not auto_df.empty:
                 logger.info(f"自動發現 WiFi 資料資源成功，筆數 {len(auto_df)}")
                 return auto_df
@@ -242,26 +331,28 @@ class GovernmentDataAPI:
             logger.error(f"獲取 WiFi 熱點資料時發生錯誤: {e}", exc_info=True)
             return None
 
-    async def _resolve_ckan_resource_id(self, dataset_uuid: str) -> Optional[str]:
-        """透過 CKAN package_show 解析可用的 resource_id（優先 datastore_active）"""
+    async def _resolve_ckan_resource_id(self, dataset_uuid: str, refresh: bool = False) -> Optional[str]:
+        """解析 dataset 可用的 resource_id（優先 datastore_active）
+        
+        優先使用持久化的對應記錄，沒有記錄或 refresh 為 True 時才呼叫 package_show。
+        """
         try:
-            url = "https://data.taipei/api/3/action/package_show"
-            async with self.session.get(url, params={"id": dataset_uuid}) as resp:
-                if resp.status != 200:
-                    logger.warning(f"package_show 失敗: {resp.status}")
-                    return None
-                pkg = await resp.json()
-            if not pkg.get("success"):
-                return None
-            resources = pkg.get("result", {}).get("resources", [])
-            if not resources:
+            if not refresh:
+                resource_id = self.resource_ids.get(dataset_uuid, self.ckan_base)
+                if resource_id:
+                    return resource_id
+            url = f"{self.ckan_base}/package_show"
+            params = {"id": dataset_uuid}
+            if refresh:
+                # 快取的 package_show 回應可能仍列出已移除的 resource
+                self.cache.invalidate(self.cache.key(url, params))
+            body = await self._get_cached(url, "ckan_package", params=params)
+            if body is None:
                 return None
-            # 優先找 datastore_active
-            for r in resources:
-                if r.get("datastore_active"):
-                    return r.get("id")
-            # 否則回傳第一個
-            return resources[0].get("id")
+            resource_id = pick_resource_id(json.loads(body))
+            if resource_id:
+                self.resource_ids.set(dataset_uuid, resource_id, self.ckan_base)
+            return resource_id
         except Exception as e:
             logger.warning(f"解析 resource_id 失敗: {e}")
             return None
@@ -300,10 +391,10 @@ class GovernmentDataAPI:
         logger.info(f"WiFi 驗證結果: {result} (wifi提示={has_wifi_hint}, 地理位置={has_geo}, 地址={has_address})")
         return result
 
-    async def _ckan_autodiscover_wifi(self, limit: int = 500) -> Optional[pd.DataFrame]:
+    async def _ckan_autodiscover_wifi(self, limit: Optional[int] = None) -> Optional[pd.DataFrame]:
         """透過 CKAN package_search 嘗試自動尋找 WiFi 熱點的資源。
         策略：以關鍵字 'wifi' 'wi-fi' 'hotspot' 搜尋，逐一抓取 datastore_active 資源的小樣本，
-        以 _looks_like_wifi_df 驗證，找到即回傳完整資料。
+        以 _looks_like_wifi_df 驗證，找到即分頁讀取完整資料（limit 為筆數上限，None 表示全部）。
         """
         try:
             search_url = "https://data.taipei/api/3/action/package_search"
@@ -359,18 +450,15 @@ class GovernmentDataAPI:
                         
                         if self._looks_like_wifi_df(df):
                             logger.info(f"找到符合的 WiFi 資源: {res_name} (ID: {res_id})")
-                            # 以相同 resource 取完整/較多筆
-                            async with self.session.get(ds_url, params={"resource_id": res_id, "limit": limit}) as ds2:
-                                if ds2.status != 200:
-                                    logger.warning(f"取得完整資料失敗，返回樣本資料: HTTP {ds2.status}")
-                                    return df
-                                ds2_json = await ds2.json()
-                                
-                            if ds2_json.get("success"):
-                                rec2 = ds2_json.get("result", {}).get("records", [])
-                                if rec2:
-                                    logger.info(f"成功取得 {len(rec2)} 筆 WiFi 資料")
-                                    return pd.DataFrame(rec2)
+                            # 以相同 resource 分頁取完整資料
+                            try:
+                                full_df = await self._read_ckan_resource(res_id, max_records=limit)
+                            except Exception as e:
+                                logger.warning(f"取得完整資料失敗，返回樣本資料: {e}")
+                                return df
+                            if full_df is not None:
+                                logger.info(f"成功取得 {len(full_df)} 筆 WiFi 資料")
+                                return full_df
                             return df
                             
             logger.warning("自動發現流程結束，未找到符合的 WiFi 資源")
@@ -499,6 +587,7 @@ class GovernmentDataAPI:
             logger.error(f"獲取無障礙設施資料時發生錯誤: {e}", exc_info=True)
             return None
     
+    @coalesced
     async def get_library_seats(self) -> Optional[pd.DataFrame]:
         """獲取台北市圖書館座位資訊"""
         try:
@@ -512,48 +601,48 @@ class GovernmentDataAPI:
                 'Accept': 'application/json, text/plain, */*',
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
-            async with self.session.get(url, headers=headers) as response:
-                logger.info(f"圖書館座位 API 回應狀態: {response.status}, Content-Type: {response.headers.get('content-type', 'N/A')}")
-                if response.status == 200:
-                    # API 回傳 JSON 但 Content-Type 可能設置為 text/html
-                    # 直接讀取文本並解析為 JSON
-                    try:
-                        text = await response.text()
-                        logger.info(f"圖書館座位 API 回應長度: {len(text)} 字元，前 200 字元: {text[:200]}")
-                        
-                        if not text or text.strip() == '':
-                            logger.warning("圖書館座位 API 回傳空白回應")
-                            return pd.DataFrame([{
-                                'message': 'API 回傳空白資料，可能服務暫時無法使用',
-                                'url': url,
-                                'suggestion': '請稍後再試或直接訪問台北市立圖書館網站'
-                            }])
-                        
-                        import json
-                        data = json.loads(text)
-                        if isinstance(data, list):
-                            if len(data) == 0:
-                                logger.warning("圖書館座位 API 回傳空列表")
-                                return pd.DataFrame([{
-                                    'message': '目前無座位資料',
-                                    'url': url
-                                }])
-                            df = pd.DataFrame(data)
-                            logger.info(f"成功獲取 {len(df)} 筆圖書館座位資料")
-                            return df
-                        elif isinstance(data, dict) and 'result' in data:
-                            df = pd.DataFrame(data['result'])
-                            logger.info(f"成功獲取 {len(df)} 筆圖書館座位資料")
-                            return df
-                    except json.JSONDecodeError as json_err:
-                        logger.warning(f"圖書館座位 API 回應無法解析為 JSON: {json_err}, 回應內容: {text[:500]}")
+            body = await self._get_cached(url, "library_seats", headers=headers)
+            if body is None:
+                return None
+            
+            # API 回傳 JSON 但 Content-Type 可能設置為 text/html
+            # 直接讀取文本並解析為 JSON
+            text = body.decode('utf-8-sig', errors='replace')
+            try:
+                logger.info(f"圖書館座位 API 回應長度: {len(text)} 字元，前 200 字元: {text[:200]}")
+                
+                if not text or text.strip() == '':
+                    logger.warning("圖書館座位 API 回傳空白回應")
+                    return pd.DataFrame([{
+                        'message': 'API 回傳空白資料，可能服務暫時無法使用',
+                        'url': url,
+                        'suggestion': '請稍後再試或直接訪問台北市立圖書館網站'
+                    }])
+                
+                data = json.loads(text)
+                if isinstance(data, list):
+                    if len(data) == 0:
+                        logger.warning("圖書館座位 API 回傳空列表")
                         return pd.DataFrame([{
-                            'message': '此 API 回應格式無法解析',
-                            'url': url,
-                            'suggestion': '請直接訪問台北市立圖書館網站查詢座位資訊'
+                            'message': '目前無座位資料',
+                            'url': url
                         }])
-                logger.warning(f"圖書館座位 API 請求失敗: {response.status}")
-                return None
+                    df = pd.DataFrame(data)
+                    logger.info(f"成功獲取 {len(df)} 筆圖書館座位資料")
+                    return df
+                elif isinstance(data, dict) and 'result' in data:
+                    df = pd.DataFrame(data['result'])
+                    logger.info(f"成功獲取 {len(df)} 筆圖書館座位資料")
+                    return df
+            except json.JSONDecodeError as json_err:
+                logger.warning(f"圖書館座位 API 回應無法解析為 JSON: {json_err}, 回應內容: {text[:500]}")
+                return pd.DataFrame([{
+                    'message': '此 API 回應格式無法解析',
+                    'url': url,
+                    'suggestion': '請直接訪問台北市立圖書館網站查詢座位資訊'
+                }])
+            logger.warning("圖書館座位 API 回應結構無法辨識")
+            return None
         except Exception as e:
             logger.error(f"獲取圖書館座位資料時發生錯誤: {e}", exc_info=True)
             return None
@@ -643,35 +732,35 @@ class GovernmentDataAPI:
             logger.error(f"獲取觀光統計資料時發生錯誤: {e}", exc_info=True)
             return None
     
+    @coalesced
     async def get_bike_theft_data(self) -> Optional[pd.DataFrame]:
         """獲取台北市自行車竊盜案件資料"""
         try:
             url = "https://data.taipei/api/v1/dataset/adf80a2b-b29d-4fca-888c-bcd26ae314e0?scope=resourceAquire"
             
             logger.info(f"開始查詢自行車竊盜資料: {url}")
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    logger.info(f"自行車竊盜資料回應結構: {list(data.keys()) if isinstance(data, dict) else type(data)}")
-                    
-                    if isinstance(data, dict) and 'result' in data:
-                        result = data['result']
-                        # 檢查是否有 results
-                        if isinstance(result, dict) and 'results' in result:
-                            results = result['results']
-                            if results and isinstance(results, list):
-                                df = pd.DataFrame(results)
-                                logger.info(f"成功獲取 {len(df)} 筆自行車竊盜資料")
-                                return df
-                    elif isinstance(data, list):
-                        df = pd.DataFrame(data)
+            body = await self._get_cached(url, "bike_theft")
+            if body is None:
+                return None
+            data = json.loads(body)
+            logger.info(f"自行車竊盜資料回應結構: {list(data.keys()) if isinstance(data, dict) else type(data)}")
+            
+            if isinstance(data, dict) and 'result' in data:
+                result = data['result']
+                # 檢查是否有 results
+                if isinstance(result, dict) and 'results' in result:
+                    results = result['results']
+                    if results and isinstance(results, list):
+                        df = pd.DataFrame(results)
                         logger.info(f"成功獲取 {len(df)} 筆自行車竊盜資料")
                         return df
-                    
-                    logger.warning(f"無法解析自行車竊盜資料結構")
-                    return None
-                logger.warning(f"自行車竊盜資料 API 請求失敗: {response.status}")
-                return None
+            elif isinstance(data, list):
+                df = pd.DataFrame(data)
+                logger.info(f"成功獲取 {len(df)} 筆自行車竊盜資料")
+                return df
+            
+            logger.warning(f"無法解析自行車竊盜資料結構")
+            return None
         except Exception as e:
             logger.error(f"獲取自行車竊盜資料時發生錯誤: {e}", exc_info=True)
             return None
@@ -736,20 +825,13 @@ class DataAnalyzer:
             return None
     
     async def __aenter__(self):
-        """異步上下文管理器入口"""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                'User-Agent': 'Numora/2.0 (Serelix Studio)',
-                'Accept': 'application/json'
-            }
-        )
+        """異步上下文管理器入口，取用共用連線池的 session"""
+        self.session = await session_pool.session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """異步上下文管理器出口"""
-        if self.session:
-            await self.session.close()
+        """異步上下文管理器出口，連線保留在連線池供下次查詢重複使用"""
+        return None
     
     async def fetch_data(self, url: str, params: Dict[str, Any] = None) -> Optional[Dict]:
         """通用資料獲取方法"""
@@ -0,0 +1,229 @@
+"""
+HTTP 連線池模組
+提供行程共用、長期存在的 aiohttp 連線池，保留連線與 DNS 快取供政府開放資料查詢重複使用
+"""
+
+import aiohttp
+import asyncio
+import threading
+import weakref
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# 所有外部 API 請求共用的標頭
+DEFAULT_HEADERS = {
+    'User-Agent': 'Numora/2.0 (Serelix Studio)',
+    'Accept': 'application/json'
+}
+
+# 關閉連線池時等待的秒數
+CLOSE_TIMEOUT_SECONDS = 5
+# run() 未指定逾時時，在單次請求逾時之外多等待的秒數
+RUN_TIMEOUT_MARGIN_SECONDS = 5
+
+class SessionPool:
+    """行程共用的 aiohttp 連線池
+    
+    aiohttp 的連線綁定事件迴圈，因此每個事件迴圈各保留一個長期存在的 ClientSession
+    （例如機器人的事件迴圈，以及同步程式共用的背景事件迴圈），不隨每次查詢建立與關閉。
+    Flask 路由等同步程式以 run() 將協程交給背景事件迴圈執行，所有請求共用同一組連線。
+    """
+    
+    def __init__(self, limit: Optional[int] = None, limit_per_host: Optional[int] = None,
+                 keepalive_timeout: Optional[float] = None, dns_cache_ttl: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.limit = config.HTTP_POOL_LIMIT if limit is None else limit
+        self.limit_per_host = config.HTTP_POOL_LIMIT_PER_HOST if limit_per_host is None else limit_per_host
+        self.keepalive_timeout = config.HTTP_KEEPALIVE_SECONDS if keepalive_timeout is None else keepalive_timeout
+        self.dns_cache_ttl = config.HTTP_DNS_CACHE_SECONDS if dns_cache_ttl is None else dns_cache_ttl
+        self.timeout = config.HTTP_TIMEOUT_SECONDS if timeout is None else timeout
+        self._sessions: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]' = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {
+            'sessions_created': 0,
+            'requests': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+            'dns_cache_hits': 0,
+            'dns_cache_misses': 0
+        }
+    
+    async def session(self) -> aiohttp.ClientSession:
+        """取得目前事件迴圈的共用 session，不存在或已關閉時建立"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                session = self._create_session()
+                self._sessions[loop] = session
+        return session
+    
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """在背景事件迴圈執行協程並等待結果，供同步程式使用
+        
+        未指定 timeout 時最多等待單次請求逾時加上 RUN_TIMEOUT_MARGIN_SECONDS 秒；
+        逾時後取消協程並拋出 TimeoutError，避免卡住的請求一直佔用呼叫端執行緒。
+        """
+        if timeout is None:
+            timeout = self.timeout + RUN_TIMEOUT_MARGIN_SECONDS
+        future = asyncio.run_coroutine_threadsafe(coro, self._background_loop())
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            logger.warning(f"背景事件迴圈的協程超過 {timeout} 秒未完成，已取消")
+            raise
+    
+    async def aclose(self):
+        """關閉目前事件迴圈的 session（事件迴圈結束前呼叫）"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+    
+    def close(self):
+        """關閉背景事件迴圈與其 session"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(CLOSE_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.warning(f"關閉連線池時發生錯誤: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(CLOSE_TIMEOUT_SECONDS)
+        loop.close()
+        logger.info("HTTP 連線池已關閉")
+    
+    def stats(self) -> Dict[str, Any]:
+        """連線池設定與連線重複使用統計"""
+        with self._lock:
+            counters = dict(self._counters)
+            active = sum(1 for session in self._sessions.values() if not session.closed)
+        connections = counters['connections_created'] + counters['connections_reused']
+        return {
+            **counters,
+            'active_sessions': active,
+            'reuse_ratio': round(counters['connections_reused'] / connections, 3) if connections else 0.0,
+            'limit': self.limit,
+            'limit_per_host': self.limit_per_host,
+            'keepalive_seconds': self.keepalive_timeout,
+            'dns_cache_seconds': self.dns_cache_ttl
+        }
+    
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl
+        )
+        self._counters['sessions_created'] += 1
+        logger.info(f"建立共用 HTTP 連線池（每主機 {self.limit_per_host} 條連線）")
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=DEFAULT_HEADERS,
+            trace_configs=[self._trace_config()]
+        )
+    
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """以 aiohttp 追蹤事件統計請求數、新建與重複使用的連線及 DNS 快取命中"""
+        trace_config = aiohttp.TraceConfig()
+        events = {
+            'requests': trace_config.on_request_start,
+            'connections_created': trace_config.on_connection_create_end,
+            'connections_reused': trace_config.on_connection_reuseconn,
+            'dns_cache_hits': trace_config.on_dns_cache_hit,
+            'dns_cache_misses': trace_config.on_dns_cache_miss
+        }
+        for name, signal in events.items():
+            signal.append(self._counter_callback(name))
+        return trace_config
+    
+    def _counter_callback(self, name: str):
+        async def _increment(session, context, params):
+            with self._lock:
+                self._counters[name] += 1
+        return _increment
+    
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        """同步程式共用的背景事件迴圈，第一次使用時啟動"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='http-pool', daemon=True)
+                self._thread.start()
+            return self._loop
+
+class SingleFlight:
+    """合併相同鍵值的並行請求
+    
+    同一事件迴圈內相同鍵值的呼叫只實際執行一次，其他呼叫者等待並取得同一個結果（或例外）；
+    執行結束後即移除，之後的呼叫重新執行。
+    """
+    
+    def __init__(self):
+        self._calls: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]' = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable]) -> Any:
+        """執行 factory() 或等待相同鍵值進行中的呼叫
+        
+        factory() 在獨立的 Task 中執行，所有呼叫者（包含第一個）都以 shield 等待，
+        任一呼叫者被取消時不會取消請求本身，其他等待者仍可取得結果。
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._calls.setdefault(loop, {})
+            task = calls.get(key)
+            if task is None:
+                task = calls[key] = loop.create_task(factory())
+                task.add_done_callback(lambda done: self._finish(calls, key, done))
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        
+        return await asyncio.shield(task)
+    
+    def _finish(self, calls: Dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task):
+        """請求結束後移除鍵值，之後的呼叫重新執行"""
+        with self._lock:
+            if calls.get(key) is task:
+                del calls[key]
+        # 所有呼叫者都已取消時避免出現未取得例外的警告
+        if not task.cancelled():
+            task.exception()
+    
+    def in_flight(self) -> int:
+        """目前進行中的請求數"""
+        with self._lock:
+            return sum(len(calls) for calls in self._calls.values())
+    
+    def stats(self) -> Dict[str, Any]:
+        """實際執行與合併的請求數"""
+        total = self.executed + self.coalesced
+        return {
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'coalesced_ratio': round(self.coalesced / total, 3) if total else 0.0,
+            'in_flight': self.in_flight()
+        }
+
+# 全域連線池與請求合併實例
+session_pool = SessionPool()
+single_flight = SingleFlight()
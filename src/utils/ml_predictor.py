@@ -5,18 +5,95 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import LinearRegression
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import ParameterGrid, train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
+from joblib import Parallel, delayed
+import time
+import threading
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import pickle
 import os
 
+from src.data.address_parser import normalize_name
+from src.data.area_analyzer import AreaAnalyzer
+from src.data.schema import roc_to_datetime
+from src.utils.cache import TTLCache
+from src.utils.config import config
+from src.utils.feature_pipeline import FeaturePipeline
+from src.utils.model_registry import LazyModels, ModelRegistry
+
 logger = logging.getLogger(__name__)
 
+# 訓練目標可用的分組欄位，縣市與區/鄉/鎮取自解析後的地點，月份取自日期
+TARGET_KEYS = ['年份', '縣市', '區/鄉/鎮', '案類', '時段', '月份']
+
+# 預設依年份與縣市統計案件數
+DEFAULT_TARGET_KEYS = ['年份', '縣市']
+
+# 候選模型與超參數網格，變更時會產生新的模型版本
+MODEL_CANDIDATES = {
+    'random_forest': (RandomForestRegressor, {'n_estimators': [100], 'max_depth': [None, 8], 'random_state': [42]}),
+    'gradient_boosting': (GradientBoostingRegressor, {
+        'n_estimators': [100], 'learning_rate': [0.05, 0.1], 'max_depth': [3], 'random_state': [42]
+    }),
+    'ridge': (Ridge, {'alpha': [0.1, 1.0, 10.0]}),
+    'linear_regression': (LinearRegression, {})
+}
+
+# 依年份切分的交叉驗證折數：每折以較早年份訓練、下一個年份驗證
+CV_SPLITS = 3
+
+# 年份不足以依時間切分時，隨機保留的驗證比例
+TEST_SIZE = 0.2
+
+# 未完成模型選擇（例如舊版模型）時使用的預測模型
+DEFAULT_MODEL = 'random_forest'
+
+# 記錄已套用的增量資料批次數量（避免同一批資料重複累加）
+MAX_APPLIED_BATCHES = 50
+
+def time_ordered_folds(years: np.ndarray, n_splits: int = CV_SPLITS) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """依年份建立 (訓練索引, 驗證索引)，驗證年份一律晚於訓練年份；年份不足時改用隨機切分"""
+    unique_years = np.unique(years)
+    n_splits = min(n_splits, len(unique_years) - 1)
+    if n_splits < 1:
+        indices = np.arange(len(years))
+        if len(indices) < 2:
+            return [(indices, indices)]
+        train, test = train_test_split(indices, test_size=TEST_SIZE, random_state=42)
+        return [(train, test)]
+    
+    return [
+        (np.flatnonzero(years < year), np.flatnonzero(years == year))
+        for year in unique_years[-n_splits:]
+    ]
+
+def _evaluate_candidate(estimator, X: np.ndarray, y: np.ndarray,
+                        folds: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[float, float, float]:
+    """以各折驗證候選模型，回傳 (MAE, R², 耗時秒數)"""
+    start = time.perf_counter()
+    actual, predicted = [], []
+    for train_index, test_index in folds:
+        model = clone(estimator).fit(X[train_index], y[train_index])
+        actual.append(y[test_index])
+        predicted.append(model.predict(X[test_index]))
+    actual, predicted = np.concatenate(actual), np.concatenate(predicted)
+    r2 = r2_score(actual, predicted) if len(actual) > 1 else float('nan')
+    return mean_absolute_error(actual, predicted), r2, time.perf_counter() - start
+
+def _search_signature() -> Dict[str, Any]:
+    """候選模型設定的可序列化描述，作為模型版本鍵值的一部分"""
+    return {
+        'candidates': {name: [cls.__name__, grid] for name, (cls, grid) in MODEL_CANDIDATES.items()},
+        'cv_splits': CV_SPLITS,
+        'test_size': TEST_SIZE
+    }
+
 class CrimePredictionModel:
     """犯罪案件預測模型"""
     
@@ -24,217 +101,481 @@ class CrimePredictionModel:
         self.models = {}
         self.encoders = {}
         self.is_trained = False
+        self.feature_names = ['年份', '地區_encoded']
+        self.target_levels: Dict[str, list] = {}
+        self.best_model = DEFAULT_MODEL
+        self.version: Optional[str] = None
+        # 聚合後的訓練目標與各模型族選定的超參數，供增量更新使用
+        self.targets: Optional[pd.DataFrame] = None
+        self.model_params: Dict[str, Dict[str, Any]] = {}
+        # 已累加到目標表的增量資料批次雜湊
+        self.applied_batches: List[str] = []
+        self.feature_pipeline = FeaturePipeline()
+        self.area_analyzer = AreaAnalyzer()
+        # 模型目錄在第一次儲存時才建立
         self.model_path = "models/"
-        os.makedirs(self.model_path, exist_ok=True)
+        self.registry = ModelRegistry(self.model_path, keep=config.MODEL_KEEP_VERSIONS, compress=config.MODEL_COMPRESS)
+        # 預測結果快取，鍵值含模型版本，換模型時整批清除
+        self.prediction_cache = TTLCache(config.PREDICTION_CACHE_SIZE, config.CACHE_TTL_SECONDS)
+        # 替換模型狀態與預測互斥，預測不會讀到新舊混雜的模型與編碼器
+        self._state_lock = threading.RLock()
+        self._update_lock = threading.Lock()
     
     def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """準備特徵資料"""
+        """準備特徵資料，尚未建立特徵流程時以此資料建立；未見過的類別歸入未知"""
         try:
-            # 創建特徵副本
-            features_df = df.copy()
-            
-            # 時間特徵
-            features_df['月份'] = pd.to_datetime(features_df['日期'], format='%Y%m%d', errors='coerce').dt.month
-            features_df['季度'] = pd.to_datetime(features_df['日期'], format='%Y%m%d', errors='coerce').dt.quarter
-            features_df['星期'] = pd.to_datetime(features_df['日期'], format='%Y%m%d', errors='coerce').dt.dayofweek
-            
-            # 時段特徵編碼
-            if '時段' in features_df.columns:
-                if 'time_encoder' not in self.encoders:
-                    self.encoders['time_encoder'] = LabelEncoder()
-                    features_df['時段_encoded'] = self.encoders['time_encoder'].fit_transform(features_df['時段'].fillna('未知'))
-                else:
-                    features_df['時段_encoded'] = self.encoders['time_encoder'].transform(features_df['時段'].fillna('未知'))
-            
-            # 地區特徵編碼
-            if '地點' in features_df.columns:
-                # 提取市區資訊
-                features_df['市'] = features_df['地點'].str.extract(r'(.+?市)', expand=False)
-                features_df['區'] = features_df['地點'].str.extract(r'市(.+?區)', expand=False)
-                
-                if 'area_encoder' not in self.encoders:
-                    self.encoders['area_encoder'] = LabelEncoder()
-                    features_df['地區_encoded'] = self.encoders['area_encoder'].fit_transform(features_df['市'].fillna('未知'))
-                else:
-                    features_df['地區_encoded'] = self.encoders['area_encoder'].transform(features_df['市'].fillna('未知'))
-            
-            # 案類特徵編碼
-            if '案類' in features_df.columns:
-                if 'case_encoder' not in self.encoders:
-                    self.encoders['case_encoder'] = LabelEncoder()
-                    features_df['案類_encoded'] = self.encoders['case_encoder'].fit_transform(features_df['案類'].fillna('未知'))
-                else:
-                    features_df['案類_encoded'] = self.encoders['case_encoder'].transform(features_df['案類'].fillna('未知'))
-            
-            # 選擇特徵欄位
-            feature_columns = ['年份', '月份', '季度', '星期', '時段_encoded', '地區_encoded', '案類_encoded']
-            feature_columns = [col for col in feature_columns if col in features_df.columns]
-            
-            return features_df[feature_columns].fillna(0)
-            
+            with self._state_lock:
+                if not self.feature_pipeline.is_fitted:
+                    self.feature_pipeline = FeaturePipeline().fit(df)
+                pipeline = self.feature_pipeline
+            return pipeline.transform(df)
+        
         except Exception as e:
             logger.error(f"準備特徵時發生錯誤: {e}")
             return pd.DataFrame()
     
-    def train_models(self, df: pd.DataFrame) -> Dict[str, float]:
-        """訓練預測模型"""
+    def build_targets(self, df: pd.DataFrame, keys: Optional[List[str]] = None) -> pd.DataFrame:
+        """以單次分組聚合建立訓練目標，回傳各分組欄位與案件數（略過為 0 的組合）"""
+        keys = list(keys or DEFAULT_TARGET_KEYS)
+        unknown = [key for key in keys if key not in TARGET_KEYS]
+        if unknown:
+            raise ValueError(f"不支援的分組欄位：{', '.join(unknown)}")
+        
+        columns = {}
+        areas = None
+        for key in keys:
+            if key in ('縣市', '區/鄉/鎮'):
+                if areas is None:
+                    areas = self.area_analyzer.get_area_columns(df)
+                columns[key] = areas[key].array
+            elif key == '月份':
+                columns[key] = roc_to_datetime(df['日期']).dt.month.array
+            else:
+                columns[key] = df[key].array
+        
+        counts = pd.DataFrame(columns).groupby(keys, observed=True, sort=True).size()
+        return counts[counts > 0].rename('案件數').reset_index()
+    
+    def training_key(self, df: pd.DataFrame, extra_keys: Optional[List[str]] = None) -> str:
+        """訓練資料與超參數對應的模型版本鍵值"""
+        return self.registry.fingerprint(df, {'extra_keys': list(extra_keys or []), 'models': _search_signature()})
+    
+    def load_for_data(self, df: pd.DataFrame, extra_keys: Optional[List[str]] = None,
+                      key: Optional[str] = None) -> bool:
+        """載入以相同資料與設定訓練過的模型版本，找不到時回傳 False（key 為已算好的版本鍵值）"""
+        key = key or self.training_key(df, extra_keys)
+        if key == self.version and self.is_trained:
+            return True
+        return self.load_models(key)
+    
+    def train_models(self, df: pd.DataFrame, extra_keys: Optional[List[str]] = None,
+                     reuse: bool = True, raise_errors: bool = False) -> Dict[str, float]:
+        """訓練預測模型
+        
+        目標為各年份、縣市的案件數；指定 extra_keys（例如 區/鄉/鎮、案類、月份）時再細分並作為額外特徵，
+        預測時會加總這些細項回到縣市年度案件數。reuse 為 True 且相同資料已訓練過時，直接載入既有版本。
+        raise_errors 為 True 時訓練錯誤直接拋出，否則記錄後回傳空結果。
+        """
         try:
+            key = self.training_key(df, extra_keys)
+            if reuse and self.registry.exists(key) and self.load_models(key):
+                logger.info(f"使用已登錄的模型版本：{key}")
+                return self.registry.metadata(key)['metrics']
+            
             logger.info("開始訓練犯罪預測模型...")
             
-            # 準備特徵
-            features_df = self.prepare_features(df)
-            if features_df.empty:
-                raise ValueError("無法準備特徵資料")
-            
-            # 創建目標變數 - 按年份和地區統計案件數
-            target_data = []
-            for year in df['年份'].unique():
-                for area in df['地點'].str.extract(r'(.+?市)', expand=False).dropna().unique():
-                    count = len(df[(df['年份'] == year) & (df['地點'].str.contains(area, na=False))])
-                    if count > 0:
-                        target_data.append({
-                            '年份': year,
-                            '地區': area,
-                            '案件數': count
-                        })
-            
-            target_df = pd.DataFrame(target_data)
+            # 以訓練資料建立特徵詞彙表
+            pipeline = FeaturePipeline().fit(df)
+            
+            # 創建目標變數 - 按年份和地區（及額外分組欄位）統計案件數
+            extra_keys = [key for key in (extra_keys or []) if key not in DEFAULT_TARGET_KEYS]
+            target_df = self.build_targets(df, DEFAULT_TARGET_KEYS + extra_keys).rename(columns={'縣市': '地區'})
             
             if target_df.empty:
                 raise ValueError("無法創建目標資料")
             
-            # 編碼目標資料的地區
-            if 'target_area_encoder' not in self.encoders:
-                self.encoders['target_area_encoder'] = LabelEncoder()
-            
-            target_df['地區_encoded'] = self.encoders['target_area_encoder'].fit_transform(target_df['地區'])
-            
-            # 準備訓練資料
-            X = target_df[['年份', '地區_encoded']]
-            y = target_df['案件數']
-            
-            # 分割訓練和測試資料
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            # 訓練多個模型
-            models_to_train = {
-                'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
-                'linear_regression': LinearRegression()
-            }
-            
-            results = {}
-            
-            for model_name, model in models_to_train.items():
-                try:
-                    # 訓練模型
-                    model.fit(X_train, y_train)
-                    
-                    # 預測
-                    y_pred = model.predict(X_test)
-                    
-                    # 評估
-                    mae = mean_absolute_error(y_test, y_pred)
-                    r2 = r2_score(y_test, y_pred)
-                    
-                    # 儲存模型
-                    self.models[model_name] = model
-                    results[model_name] = {'mae': mae, 'r2': r2}
-                    
-                    logger.info(f"{model_name} - MAE: {mae:.2f}, R²: {r2:.3f}")
-                    
-                except Exception as e:
-                    logger.error(f"訓練 {model_name} 時發生錯誤: {e}")
-                    continue
+            # 依時間順序交叉驗證所有候選模型，各模型族選出 MAE 最低的設定
+            state, results = self._fit_targets(target_df, extra_keys)
             
             if results:
-                self.is_trained = True
-                self.save_models()
-                logger.info("模型訓練完成")
+                state['feature_pipeline'] = pipeline
+                state['best_model'] = min(results, key=lambda name: results[name]['mae'])
+                state['version'] = key
+                self.set_state(state)
+                self.save_models(results, params={'extra_keys': extra_keys, 'models': _search_signature()}, rows=len(df))
+                logger.info(f"模型訓練完成，選用 {self.best_model}")
             
             return results
-            
+        
         except Exception as e:
             logger.error(f"訓練模型時發生錯誤: {e}")
+            if raise_errors:
+                raise
             return {}
     
+    def update_models(self, new_rows: pd.DataFrame, raise_errors: bool = False,
+                      version: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """以新增的資料列增量更新模型
+        
+        只對新增資料分組聚合並累加到保存的目標表，再以各模型族已選定的超參數重新擬合，不重新搜尋。
+        目標表大小只取決於年份與地區等組合數，更新成本與新增資料量成正比，不必重新掃描完整歷史。
+        新模型全部建立完成後才一次替換，更新期間的預測仍使用舊模型。
+        已套用過的同一批資料不會再累加。raise_errors 為 True 時錯誤直接拋出，否則記錄後回傳空結果。
+        version 為更新後完整資料的 training_key，重新啟動後以完整資料查詢模型登錄時才能對應到這個版本；
+        未提供時只能由舊版本與新增資料推導，模型登錄無法以完整資料重用。
+        """
+        try:
+            with self._update_lock:
+                with self._state_lock:
+                    targets, model_params, base_version = self.targets, self.model_params, self.version
+                    pipeline = self.feature_pipeline
+                    extra_keys = list(self.target_levels)
+                    applied_batches = list(self.applied_batches)
+                if targets is None or not model_params:
+                    raise ValueError("目前模型沒有保存聚合目標，請先以 train_models 完整訓練")
+                
+                batch = self.registry.fingerprint(new_rows, {'extra_keys': extra_keys})
+                if batch in applied_batches:
+                    logger.info("這批資料已套用到模型，略過增量更新")
+                    return {}
+                
+                delta = self.build_targets(new_rows, DEFAULT_TARGET_KEYS + extra_keys).rename(columns={'縣市': '地區'})
+                if delta.empty:
+                    logger.info("新增資料沒有可用的訓練目標，模型維持不變")
+                    return {}
+                
+                state, results = self._fit_targets(self.merge_targets(targets, delta), extra_keys, model_params)
+                if not results:
+                    raise ValueError("增量更新沒有產生任何模型")
+                
+                state['feature_pipeline'] = pipeline.extended(new_rows)
+                state['best_model'] = self.best_model if self.best_model in state['models'] else next(iter(state['models']))
+                state['version'] = version or self.registry.fingerprint(new_rows, {'base': base_version, 'extra_keys': extra_keys})
+                state['applied_batches'] = (applied_batches + [batch])[-MAX_APPLIED_BATCHES:]
+                self.set_state(state)
+                self.save_models(results, params={'base': base_version, 'extra_keys': extra_keys}, rows=len(new_rows))
+                logger.info(f"模型增量更新完成：新增 {len(new_rows)} 筆資料，{len(delta)} 個分組")
+                return results
+        
+        except Exception as e:
+            logger.error(f"增量更新模型時發生錯誤: {e}")
+            if raise_errors:
+                raise
+            return {}
+    
+    @staticmethod
+    def merge_targets(targets: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+        """將新增資料的聚合目標累加到既有目標表"""
+        keys = [column for column in targets.columns if column != '案件數']
+        merged = pd.concat([targets, delta[keys + ['案件數']]], ignore_index=True)
+        return merged.groupby(keys, observed=True, sort=True)['案件數'].sum().reset_index()
+    
+    def _fit_targets(self, target_df: pd.DataFrame, extra_keys: List[str],
+                     model_params: Optional[Dict[str, Dict[str, Any]]] = None) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """由聚合目標表編碼特徵並擬合模型，回傳 (模型狀態, 評估結果)
+        
+        未指定 model_params 時搜尋候選模型與超參數，否則直接以既定參數擬合。
+        編碼器與模型皆為新物件，不會改動使用中的模型。
+        """
+        # 編碼目標資料的地區
+        encoders = dict(self.encoders)
+        encoders['target_area_encoder'] = LabelEncoder()
+        features = {
+            '年份': target_df['年份'].to_numpy(),
+            '地區_encoded': encoders['target_area_encoder'].fit_transform(target_df['地區'].astype(object))
+        }
+        
+        # 額外分組欄位：數值欄位直接使用，文字欄位另行編碼
+        feature_names = ['年份', '地區_encoded']
+        target_levels = {}
+        for column in extra_keys:
+            target_levels[column] = list(pd.unique(target_df[column].astype(object)))
+            if column == '月份':
+                features[column] = target_df[column].to_numpy()
+                feature_names.append(column)
+                continue
+            encoder = encoders[f'target_{column}_encoder'] = LabelEncoder()
+            features[f'{column}_encoded'] = encoder.fit_transform(target_df[column].astype(object))
+            feature_names.append(f'{column}_encoded')
+        
+        # 準備訓練資料
+        X = pd.DataFrame(features)[feature_names].to_numpy(dtype=float)
+        y = target_df['案件數'].to_numpy(dtype=float)
+        
+        if model_params is None:
+            results, models = self.search_models(X, y, target_df['年份'].to_numpy())
+        else:
+            results, models = self.refit_models(X, y, model_params)
+        
+        state = {
+            'models': models,
+            'encoders': encoders,
+            'feature_names': feature_names,
+            'target_levels': target_levels,
+            'targets': target_df.reset_index(drop=True),
+            'model_params': {name: results[name]['params'] for name in models}
+        }
+        return state, results
+    
+    def search_models(self, X: np.ndarray, y: np.ndarray, years: np.ndarray,
+                      n_jobs: Optional[int] = None) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """平行評估所有候選模型與超參數，各模型族以最佳設定重新擬合全部資料
+        
+        回傳 (評估結果, 模型)，評估結果為 {模型名稱: {'mae', 'r2', 'params', 'seconds', 'candidates'}}，
+        candidates 列出每組設定的 MAE 與耗時。
+        """
+        folds = time_ordered_folds(years)
+        candidates = [
+            (name, params, cls(**params))
+            for name, (cls, grid) in MODEL_CANDIDATES.items()
+            for params in ParameterGrid(grid)
+        ]
+        
+        start = time.perf_counter()
+        scores = Parallel(n_jobs=config.TRAINING_N_JOBS if n_jobs is None else n_jobs)(
+            delayed(_evaluate_candidate)(estimator, X, y, folds) for _, _, estimator in candidates
+        )
+        logger.info(f"已評估 {len(candidates)} 組候選模型（{len(folds)} 折），耗時 {time.perf_counter() - start:.2f} 秒")
+        
+        results = {}
+        for (name, params, estimator), (mae, r2, seconds) in zip(candidates, scores):
+            entry = results.setdefault(name, {'mae': float('inf'), 'candidates': []})
+            entry['candidates'].append({'params': params, 'mae': mae, 'seconds': round(seconds, 4)})
+            if mae < entry['mae']:
+                entry.update({'mae': mae, 'r2': r2, 'params': params, 'seconds': round(seconds, 4), 'estimator': estimator})
+        
+        models = {}
+        for name, entry in results.items():
+            try:
+                models[name] = clone(entry.pop('estimator')).fit(X, y)
+                logger.info(f"{name} - MAE: {entry['mae']:.2f}, R²: {entry['r2']:.3f}，參數：{entry['params']}")
+            except Exception as e:
+                logger.error(f"訓練 {name} 時發生錯誤: {e}")
+        return {name: entry for name, entry in results.items() if name in models}, models
+    
+    def refit_models(self, X: np.ndarray, y: np.ndarray,
+                     model_params: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """以各模型族既定的超參數直接擬合全部資料，回傳 (各模型參數與耗時, 模型)"""
+        results, models = {}, {}
+        for name, params in model_params.items():
+            if name not in MODEL_CANDIDATES:
+                continue
+            start = time.perf_counter()
+            try:
+                models[name] = MODEL_CANDIDATES[name][0](**params).fit(X, y)
+                results[name] = {'params': params, 'seconds': round(time.perf_counter() - start, 4)}
+            except Exception as e:
+                logger.error(f"訓練 {name} 時發生錯誤: {e}")
+        return results, models
+    
+    def _prediction_model(self):
+        """目前用於預測的模型，沒有時回傳 None"""
+        return self.models.get(self.best_model) or self.models.get(DEFAULT_MODEL)
+    
     def predict_crime_trends(self, area: str, years: List[int]) -> Dict[int, float]:
         """預測特定地區的犯罪趨勢"""
         try:
-            if not self.is_trained or 'random_forest' not in self.models:
+            table = self.predict_batch([area], years)
+            return dict(zip(table['年份'].tolist(), table['預測案件數'].tolist()))
+        
+        except Exception as e:
+            logger.error(f"預測犯罪趨勢時發生錯誤: {e}")
+            return {}
+    
+    def predict_batch(self, areas: List[str], years: List[int]) -> pd.DataFrame:
+        """一次預測多個地區與年份，回傳 地區、年份、預測案件數 三欄的資料表
+        
+        所有組合編碼為單一特徵矩陣後只呼叫一次 predict，未知地區以代碼 0 預測；
+        使用額外分組欄位時，只加總該地區在訓練資料中出現過的細項組合。
+        相同模型版本、地區與年份的結果會快取。
+        """
+        with self._state_lock:
+            if not self.is_trained or self._prediction_model() is None:
                 raise ValueError("模型尚未訓練")
             
             # 編碼地區
             if 'target_area_encoder' not in self.encoders:
                 raise ValueError("地區編碼器未初始化")
             
-            try:
-                area_encoded = self.encoders['target_area_encoder'].transform([area])[0]
-            except ValueError:
-                logger.warning(f"未知地區: {area}，使用平均值預測")
-                area_encoded = 0
-            
-            # 預測
-            predictions = {}
-            model = self.models['random_forest']
-            
-            for year in years:
-                X_pred = pd.DataFrame({'年份': [year], '地區_encoded': [area_encoded]})
-                pred = model.predict(X_pred)[0]
-                predictions[year] = max(0, pred)  # 確保預測值不為負
-            
-            return predictions
-            
-        except Exception as e:
-            logger.error(f"預測犯罪趨勢時發生錯誤: {e}")
-            return {}
+            areas, years = list(areas), list(years)
+            cache_key = ('predict', self.version, tuple(areas), tuple(years))
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                return cached.copy()
+            
+            area_codes = self._encode_areas(areas)
+            grid = pd.DataFrame({
+                '地區': np.repeat(areas, len(years)),
+                '年份': np.tile(np.asarray(years, dtype=np.int64), len(areas)),
+                '地區_encoded': np.repeat(area_codes, len(years))
+            })
+            if grid.empty:
+                return pd.DataFrame({'地區': [], '年份': [], '預測案件數': []})
+            
+            X_pred = grid
+            extra_features = self._extra_feature_pairs()
+            if extra_features is not None:
+                # 預測各地區自己的細項組合後加總為該年度案件數
+                X_pred = grid.reset_index().merge(extra_features, on='地區_encoded')
+            
+            # 確保預測值不為負
+            values = np.clip(self._prediction_model().predict(X_pred[self.feature_names].to_numpy(dtype=float)), 0, None)
+            if extra_features is not None:
+                values = np.bincount(X_pred['index'].to_numpy(), weights=values, minlength=len(grid))
+            
+            table = grid[['地區', '年份']].assign(預測案件數=values.astype(float))
+            self.prediction_cache.set(cache_key, table)
+            return table.copy()
+    
+    def _encode_areas(self, areas: List[str]) -> np.ndarray:
+        """以已訓練的地區類別向量化編碼，未知地區為 0（訓練目標的縣市名稱統一為「台」，查詢名稱先統一寫法）"""
+        classes = self.encoders['target_area_encoder'].classes_
+        values = np.asarray([normalize_name(str(area)) for area in areas], dtype=object)
+        positions = np.searchsorted(classes, values)
+        positions = np.minimum(positions, len(classes) - 1)
+        known = classes[positions] == values
+        for area in sorted(set(values[~known])):
+            logger.warning(f"未知地區: {area}，使用平均值預測")
+        return np.where(known, positions, 0)
+    
+    def _extra_feature_pairs(self) -> Optional[pd.DataFrame]:
+        """各地區在訓練資料中出現過的額外分組欄位組合（已編碼，含 地區_encoded），未使用額外欄位時回傳 None
+        
+        例如以 區/鄉/鎮 細分時，台北市只包含台北市的行政區，不會加總其他縣市的行政區。
+        舊版模型沒有保存聚合目標時，每個地區都使用所有細項的組合。
+        """
+        if not self.target_levels:
+            return None
+        
+        cache_key = ('extra_pairs', self.version)
+        cached = self.prediction_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        if self.targets is None:
+            pairs = pd.DataFrame({'地區_encoded': np.arange(len(self.encoders['target_area_encoder'].classes_))})
+            for key, values in self.target_levels.items():
+                pairs = pairs.merge(pd.DataFrame({key: values}), how='cross')
+        else:
+            pairs = self.targets[list(self.target_levels)].astype(object)
+            pairs.insert(0, '地區_encoded', self.encoders['target_area_encoder'].transform(self.targets['地區'].astype(object)))
+        
+        columns = {'地區_encoded': pairs['地區_encoded'].to_numpy()}
+        for key in self.target_levels:
+            if key == '月份':
+                columns[key] = pairs[key].to_numpy(dtype=float)
+            else:
+                columns[f'{key}_encoded'] = self.encoders[f'target_{key}_encoder'].transform(pairs[key])
+        pairs = pd.DataFrame(columns).drop_duplicates(ignore_index=True)
+        self.prediction_cache.set(cache_key, pairs)
+        return pairs
     
     def get_feature_importance(self) -> Dict[str, float]:
         """取得特徵重要性"""
         try:
-            if not self.is_trained or 'random_forest' not in self.models:
-                return {}
-            
-            model = self.models['random_forest']
-            feature_names = ['年份', '地區_encoded']
-            
-            importance_dict = {}
-            for i, importance in enumerate(model.feature_importances_):
-                importance_dict[feature_names[i]] = importance
-            
-            return importance_dict
-            
+            # 模型、特徵名稱與版本在同一個鎖內讀取，不會與替換中的模型狀態混用
+            with self._state_lock:
+                if not self.is_trained:
+                    return {}
+                # 選用的模型沒有特徵重要性（例如線性模型）時改用隨機森林
+                model = self._prediction_model()
+                if not hasattr(model, 'feature_importances_'):
+                    model = self.models.get(DEFAULT_MODEL)
+                if model is None:
+                    return {}
+                
+                cache_key = ('importance', self.version)
+                cached = self.prediction_cache.get(cache_key)
+                if cached is not None:
+                    return dict(cached)
+                
+                importance_dict = {}
+                for i, importance in enumerate(model.feature_importances_):
+                    importance_dict[self.feature_names[i]] = importance
+                
+                self.prediction_cache.set(cache_key, importance_dict)
+                return dict(importance_dict)
+        
         except Exception as e:
             logger.error(f"取得特徵重要性時發生錯誤: {e}")
             return {}
     
-    def save_models(self):
-        """儲存模型"""
-        try:
-            for model_name, model in self.models.items():
-                model_file = os.path.join(self.model_path, f"{model_name}.pkl")
-                with open(model_file, 'wb') as f:
-                    pickle.dump(model, f)
-            
-            # 儲存編碼器
-            encoder_file = os.path.join(self.model_path, "encoders.pkl")
-            with open(encoder_file, 'wb') as f:
-                pickle.dump(self.encoders, f)
-                
+    def get_state(self) -> Dict[str, Any]:
+        """匯出訓練結果（模型、編碼器與特徵設定），供其他行程訓練後傳回"""
+        with self._state_lock:
+            return {
+                'models': self.models,
+                'encoders': self.encoders,
+                'feature_names': self.feature_names,
+                'target_levels': self.target_levels,
+                'best_model': self.best_model,
+                'version': self.version,
+                'targets': self.targets,
+                'model_params': self.model_params,
+                'applied_batches': self.applied_batches,
+                'feature_pipeline': self.feature_pipeline
+            }
+    
+    def set_state(self, state: Dict[str, Any]):
+        """套用 get_state 匯出的訓練結果，所有欄位在同一個鎖內替換"""
+        with self._state_lock:
+            self.models = state['models']
+            self.encoders = state['encoders']
+            self.feature_names = state['feature_names']
+            self.target_levels = state['target_levels']
+            self.best_model = state.get('best_model', DEFAULT_MODEL)
+            self.version = state.get('version')
+            self.targets = state.get('targets')
+            self.model_params = state.get('model_params', {})
+            self.applied_batches = list(state.get('applied_batches') or [])
+            self.feature_pipeline = state.get('feature_pipeline') or FeaturePipeline()
+            self.is_trained = bool(self.models)
+            self.prediction_cache.clear()
+    
+    def save_models(self, metrics: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None,
+                    rows: int = 0) -> bool:
+        """將目前模型登錄為 self.version 版本"""
+        if not self.version:
+            logger.warning("模型沒有版本鍵值，略過儲存")
+            return False
+        saved = self.registry.save(self.version, self.get_state(), metrics=metrics, params=params, rows=rows)
+        if saved:
             logger.info("模型已儲存")
-            
+        return saved
+    
+    def load_models(self, key: Optional[str] = None) -> bool:
+        """載入指定的模型版本，未指定時載入最近使用的版本（沒有版本時嘗試舊版平面檔案）"""
+        try:
+            if key is None:
+                key = self.registry.latest()
+                if key is None:
+                    return self._load_legacy_models()
+            
+            state = self.registry.load(key)
+            if state is None:
+                return False
+            
+            self.set_state(state)
+            logger.info(f"已載入模型版本 {key}（{len(self.models)} 個模型）")
+            return True
+        
         except Exception as e:
-            logger.error(f"儲存模型時發生錯誤: {e}")
+            logger.error(f"載入模型時發生錯誤: {e}")
+            return False
     
-    def load_models(self):
-        """載入模型"""
+    def _load_legacy_models(self) -> bool:
+        """載入舊版直接存放於模型目錄的 .pkl 檔案"""
         try:
-            # 載入模型
+            if not os.path.isdir(self.model_path):
+                return False
+            
+            # 只記錄模型檔位置，第一次預測時才載入
+            models = {}
             for model_file in os.listdir(self.model_path):
-                if model_file.endswith('.pkl') and model_file != 'encoders.pkl':
+                if model_file.endswith('.pkl') and model_file not in ('encoders.pkl', 'features.pkl'):
                     model_name = model_file.replace('.pkl', '')
-                    model_path = os.path.join(self.model_path, model_file)
-                    with open(model_path, 'rb') as f:
-                        self.models[model_name] = pickle.load(f)
+                    models[model_name] = os.path.join(self.model_path, model_file)
+            self.models = LazyModels(models)
             
             # 載入編碼器
             encoder_file = os.path.join(self.model_path, "encoders.pkl")
@@ -242,9 +583,20 @@ class CrimePredictionModel:
                 with open(encoder_file, 'rb') as f:
                     self.encoders = pickle.load(f)
             
+            # 載入特徵設定，沒有此檔案時沿用預設特徵
+            feature_file = os.path.join(self.model_path, "features.pkl")
+            if os.path.exists(feature_file):
+                with open(feature_file, 'rb') as f:
+                    features = pickle.load(f)
+                self.feature_names = features['feature_names']
+                self.target_levels = features['target_levels']
+            
             if self.models:
                 self.is_trained = True
+                self.prediction_cache.clear()
                 logger.info(f"已載入 {len(self.models)} 個模型")
-            
+            return self.is_trained
+        
         except Exception as e:
             logger.error(f"載入模型時發生錯誤: {e}")
+            return False
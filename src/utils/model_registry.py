@@ -0,0 +1,210 @@
+"""
+模型版本登錄模組
+依訓練資料指紋與超參數保存每次訓練的模型、編碼器與評估結果
+"""
+
+import pandas as pd
+import hashlib
+import json
+import joblib
+import os
+import pickle
+import shutil
+import time
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 儲存格式或訓練流程變更時遞增，使舊版本自動失效
+REGISTRY_VERSION = 1
+
+# 計算資料指紋使用的欄位
+FINGERPRINT_COLUMNS = ['年份', '日期', '案類', '時段', '地點']
+
+# 預設保留的模型版本數
+DEFAULT_KEEP_VERSIONS = 5
+
+# 預設模型檔壓縮等級，0 表示不壓縮並以記憶體映射載入
+DEFAULT_COMPRESS = 3
+
+MODEL_SUFFIX = '.joblib'
+LEGACY_MODEL_SUFFIX = '.pkl'
+
+METADATA_FILE = 'metadata.json'
+ENCODER_FILE = 'encoders.pkl'
+FEATURE_FILE = 'features.pkl'
+
+class LazyModels(Mapping):
+    """延遲載入的模型集合
+    
+    只記錄各模型的檔案位置，第一次取用某個模型時才反序列化，
+    未壓縮的檔案以記憶體映射讀取，多個行程可共用相同的分頁。
+    """
+    
+    def __init__(self, paths: Dict[str, str], mmap_mode: Optional[str] = None):
+        self.paths = dict(paths)
+        self.mmap_mode = mmap_mode
+        self._loaded: Dict[str, Any] = {}
+    
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._loaded:
+            path = self.paths[name]
+            start = time.perf_counter()
+            if path.endswith(LEGACY_MODEL_SUFFIX):
+                with open(path, 'rb') as f:
+                    self._loaded[name] = pickle.load(f)
+            else:
+                self._loaded[name] = joblib.load(path, mmap_mode=self.mmap_mode)
+            logger.info(f"已載入模型 {name}，耗時 {time.perf_counter() - start:.3f} 秒")
+        return self._loaded[name]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.paths)
+    
+    def __len__(self) -> int:
+        return len(self.paths)
+    
+    @property
+    def loaded(self) -> List[str]:
+        """已反序列化的模型名稱"""
+        return list(self._loaded)
+
+class ModelRegistry:
+    """模型版本登錄類
+    
+    每個版本存放於 <root_dir>/<鍵值>/，鍵值由訓練資料內容與超參數雜湊而得，
+    相同資料與設定再次訓練時可直接載入既有版本。
+    """
+    
+    def __init__(self, root_dir: str = 'models', keep: int = DEFAULT_KEEP_VERSIONS,
+                 compress: int = DEFAULT_COMPRESS):
+        self.root_dir = root_dir
+        self.keep = keep
+        self.compress = compress
+    
+    @staticmethod
+    def fingerprint(df: pd.DataFrame, params: Optional[Dict[str, Any]] = None) -> str:
+        """以資料內容與超參數產生版本鍵值，category 與字串欄位的相同內容會得到相同結果"""
+        digest = hashlib.blake2b(digest_size=16)
+        header = {'version': REGISTRY_VERSION, 'rows': len(df), 'params': params or {}}
+        digest.update(json.dumps(header, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        
+        for col in FINGERPRINT_COLUMNS:
+            if col not in df.columns:
+                continue
+            digest.update(col.encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(df[col], index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+    
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root_dir, key)
+    
+    def exists(self, key: str) -> bool:
+        """檢查版本是否已登錄"""
+        return os.path.exists(os.path.join(self.path_for(key), METADATA_FILE))
+    
+    def save(self, key: str, state: Dict[str, Any], metrics: Optional[Dict[str, Any]] = None,
+             params: Optional[Dict[str, Any]] = None, rows: int = 0) -> bool:
+        """儲存模型版本，先寫入暫存目錄再整批改名，避免讀到寫到一半的版本"""
+        target = self.path_for(key)
+        staging = os.path.join(self.root_dir, f".tmp-{key}-{os.getpid()}")
+        try:
+            os.makedirs(staging, exist_ok=True)
+            for model_name, model in state['models'].items():
+                joblib.dump(model, os.path.join(staging, f"{model_name}{MODEL_SUFFIX}"), compress=self.compress)
+            with open(os.path.join(staging, ENCODER_FILE), 'wb') as f:
+                pickle.dump(state['encoders'], f)
+            with open(os.path.join(staging, FEATURE_FILE), 'wb') as f:
+                pickle.dump({k: v for k, v in state.items() if k not in ('models', 'encoders', 'version')}, f)
+            
+            metadata = {
+                'key': key,
+                'created_at': time.time(),
+                'rows': rows,
+                'params': params or {},
+                'metrics': metrics or {},
+                'models': sorted(state['models']),
+                'compress': self.compress
+            }
+            with open(os.path.join(staging, METADATA_FILE), 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, ensure_ascii=False, indent=2, default=str)
+            
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.replace(staging, target)
+            logger.info(f"模型版本已登錄：{key}")
+        except Exception as e:
+            logger.error(f"登錄模型版本時發生錯誤: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+        
+        self._evict(protect=key)
+        return True
+    
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """載入模型版本，回傳可供 CrimePredictionModel.set_state 使用的狀態，不存在或損毀時回傳 None
+        
+        編碼器與特徵設定立即載入，模型則在第一次預測時才反序列化（見 LazyModels）。
+        """
+        if not self.exists(key):
+            return None
+        
+        path = self.path_for(key)
+        try:
+            metadata = self.metadata(key)
+            paths = {}
+            for model_name in metadata['models']:
+                model_path = os.path.join(path, f"{model_name}{MODEL_SUFFIX}")
+                if not os.path.exists(model_path):
+                    # 舊版本以 pickle 儲存
+                    model_path = os.path.join(path, f"{model_name}{LEGACY_MODEL_SUFFIX}")
+                if not os.path.exists(model_path):
+                    raise FileNotFoundError(model_path)
+                paths[model_name] = model_path
+            models = LazyModels(paths, mmap_mode='r' if metadata.get('compress') == 0 else None)
+            with open(os.path.join(path, ENCODER_FILE), 'rb') as f:
+                encoders = pickle.load(f)
+            with open(os.path.join(path, FEATURE_FILE), 'rb') as f:
+                features = pickle.load(f)
+            
+            # 更新修改時間，讓常用版本不被淘汰
+            os.utime(os.path.join(path, METADATA_FILE))
+            return {'models': models, 'encoders': encoders, 'version': key, **features}
+        except Exception as e:
+            logger.warning(f"載入模型版本失敗 ({key}): {e}")
+            return None
+    
+    def metadata(self, key: str) -> Dict[str, Any]:
+        """讀取版本的描述資訊"""
+        with open(os.path.join(self.path_for(key), METADATA_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def versions(self) -> List[str]:
+        """列出已登錄的版本，最近使用者在前"""
+        if not os.path.isdir(self.root_dir):
+            return []
+        
+        entries = []
+        for name in os.listdir(self.root_dir):
+            metadata_path = os.path.join(self.root_dir, name, METADATA_FILE)
+            if not name.startswith('.') and os.path.exists(metadata_path):
+                entries.append((os.path.getmtime(metadata_path), name))
+        return [name for _, name in sorted(entries, reverse=True)]
+    
+    def latest(self) -> Optional[str]:
+        """最近登錄或使用的版本"""
+        versions = self.versions()
+        return versions[0] if versions else None
+    
+    def remove(self, key: str):
+        """刪除模型版本"""
+        shutil.rmtree(self.path_for(key), ignore_errors=True)
+    
+    def _evict(self, protect: Optional[str] = None):
+        """只保留最近的 keep 個版本"""
+        for key in self.versions()[self.keep:]:
+            if key != protect:
+                self.remove(key)
+                logger.info(f"已淘汰舊模型版本：{key}")
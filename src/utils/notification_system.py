@@ -14,6 +14,7 @@ import json
 import os
 
 from src.utils.config import config
+from src.data.area_analyzer import AreaAnalyzer
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ class NotificationSystem:
         self.bot = bot
         self.subscriptions = {}  # 用戶訂閱資訊
         self.last_data_hash = None
+        self.area_analyzer = AreaAnalyzer()
         self.notification_file = "data/notifications.json"
         self.load_subscriptions()
         
@@ -31,6 +33,11 @@ class NotificationSystem:
         if not self.check_data_updates.is_running():
             self.check_data_updates.start()
     
+    def _count_cities(self, df: pd.DataFrame) -> pd.Series:
+        """依預先解析的縣市欄位計算案件數"""
+        counts = self.area_analyzer.get_area_columns(df)['縣市'].value_counts()
+        return counts[counts > 0]
+    
     def load_subscriptions(self):
         """載入訂閱資訊"""
         try:
@@ -168,7 +175,7 @@ class NotificationSystem:
             stats.append(f"{latest_year} 年案件數：{latest_count} 件")
             
             # 熱點地區
-            top_areas = df['地點'].str.extract(r'(.+?市)', expand=False).value_counts().head(3)
+            top_areas = self._count_cities(df).head(3)
             if not top_areas.empty:
                 stats.append("前3大熱點地區：")
                 for area, count in top_areas.items():
@@ -362,14 +369,15 @@ class NotificationSystem:
             report.append("")
             
             # 案類統計
-            top_cases = df['案類'].value_counts().head(5)
+            top_cases = df['案類'].value_counts()
+            top_cases = top_cases[top_cases > 0].head(5)
             report.append("前5大案件類型：")
             for case_type, count in top_cases.items():
                 report.append(f"  • {case_type}：{count} 件")
             report.append("")
             
             # 地區統計
-            top_areas = df['地點'].str.extract(r'(.+?市)', expand=False).value_counts().head(5)
+            top_areas = self._count_cities(df).head(5)
             if not top_areas.empty:
                 report.append("前5大案件地區：")
                 for area, count in top_areas.items():
@@ -399,7 +407,8 @@ class NotificationSystem:
             report.append("")
             
             # 時段分析
-            time_counts = df['時段'].value_counts().head(5)
+            time_counts = df['時段'].value_counts()
+            time_counts = time_counts[time_counts > 0].head(5)
             report.append("案件高發時段：")
             for time_period, count in time_counts.items():
                 report.append(f"  • {time_period}：{count} 件")
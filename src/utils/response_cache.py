@@ -0,0 +1,169 @@
+"""
+外部 API 回應快取模組
+依資料集的存活時間快取回應內容，過期後以 ETag / Last-Modified 條件請求重新驗證，可選擇同時保存到磁碟
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from typing import Any, Dict, Optional
+
+from src.utils.cache import TTLCache
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# 過期的回應仍保留此秒數，供條件請求重新驗證
+CACHE_RETAIN_SECONDS = 24 * 3600
+
+class CachedResponse:
+    """快取的回應內容與驗證資訊"""
+    
+    def __init__(self, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 expires_at: float = 0.0):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+    
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+    
+    def validators(self) -> Dict[str, str]:
+        """重新驗證用的條件請求標頭"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+    
+    def metadata(self) -> Dict[str, Any]:
+        return {'etag': self.etag, 'last_modified': self.last_modified, 'expires_at': self.expires_at}
+
+class ResponseCache:
+    """回應快取類
+    
+    記憶體層以 LRU 保存最近使用的回應；設定 cache_dir 時另存一份到磁碟，重新啟動後仍可使用或重新驗證。
+    存活時間由呼叫端依資料集指定，過期的回應保留 CACHE_RETAIN_SECONDS 秒以便重新驗證。
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None, cache_dir: Optional[str] = None):
+        self.memory = TTLCache(config.HTTP_CACHE_SIZE if max_entries is None else max_entries, CACHE_RETAIN_SECONDS)
+        self.cache_dir = config.HTTP_CACHE_DIR if cache_dir is None else cache_dir
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'disk_hits': 0, 'revalidated': 0, 'downloads': 0, 'bytes_saved': 0}
+    
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """以網址與查詢參數產生快取鍵值"""
+        payload = json.dumps([url, sorted((str(k), str(v)) for k, v in (params or {}).items())], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """取得快取的回應（含已過期但可重新驗證者），記憶體沒有時讀取磁碟"""
+        entry = self.memory.get(key)
+        if entry is None and self.cache_dir:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self.memory.set(key, entry)
+                self.record('disk_hits')
+        return entry
+    
+    def store(self, key: str, body: bytes, ttl: float, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> CachedResponse:
+        """保存新下載的回應"""
+        entry = CachedResponse(body, etag, last_modified, time.time() + ttl)
+        self.memory.set(key, entry)
+        if self.cache_dir:
+            self._write_disk(key, entry, write_body=True)
+        return entry
+    
+    def refresh(self, key: str, entry: CachedResponse, ttl: float, etag: Optional[str] = None,
+                last_modified: Optional[str] = None) -> CachedResponse:
+        """伺服器確認內容未變更（304）時延長存活時間，不重新寫入內容"""
+        entry.expires_at = time.time() + ttl
+        entry.etag = etag or entry.etag
+        entry.last_modified = last_modified or entry.last_modified
+        self.memory.set(key, entry)
+        if self.cache_dir:
+            self._write_disk(key, entry, write_body=False)
+        return entry
+    
+    def record(self, event: str, size: int = 0):
+        """記錄快取命中、重新驗證或下載，size 為省下的傳輸位元組數"""
+        with self._lock:
+            self._counters[event] += 1
+            self._counters['bytes_saved'] += size
+    
+    def stats(self) -> Dict[str, Any]:
+        """取得命中與重新驗證統計"""
+        with self._lock:
+            counters = dict(self._counters)
+        requests = counters['hits'] + counters['revalidated'] + counters['downloads']
+        return {
+            **counters,
+            'hit_ratio': round((counters['hits'] + counters['revalidated']) / requests, 3) if requests else 0.0,
+            'entries': len(self.memory),
+            'disk_enabled': bool(self.cache_dir)
+        }
+    
+    def invalidate(self, key: str):
+        """移除單一回應（記憶體與磁碟），下次查詢重新下載"""
+        self.memory.pop(key)
+        if self.cache_dir:
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.warning(f"移除回應快取失敗 ({key}): {e}")
+    
+    def clear(self):
+        """清除記憶體中的回應（磁碟檔案保留）"""
+        self.memory.clear()
+    
+    def _paths(self, key: str):
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+    
+    def _read_disk(self, key: str) -> Optional[CachedResponse]:
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if time.time() > meta['expires_at'] + CACHE_RETAIN_SECONDS:
+                return None
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            return CachedResponse(body, meta.get('etag'), meta.get('last_modified'), meta['expires_at'])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"讀取回應快取失敗 ({key}): {e}")
+            return None
+    
+    def _write_disk(self, key: str, entry: CachedResponse, write_body: bool):
+        """先寫入暫存檔再改名，避免其他行程讀到寫到一半的檔案"""
+        meta_path, body_path = self._paths(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if write_body:
+                self._atomic_write(body_path, entry.body)
+            self._atomic_write(meta_path, json.dumps(entry.metadata()).encode('utf-8'))
+        except Exception as e:
+            logger.warning(f"寫入回應快取失敗 ({key}): {e}")
+    
+    @staticmethod
+    def _atomic_write(path: str, data: bytes):
+        temp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+# 全域回應快取實例
+response_cache = ResponseCache()
@@ -0,0 +1,272 @@
+"""
+模型訓練工作模組
+在背景工作行程中訓練預測模型，避免 Web 請求等待訓練完成
+"""
+
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.utils.config import config
+from src.utils.ml_predictor import CrimePredictionModel
+
+logger = logging.getLogger(__name__)
+
+# 保留的訓練工作紀錄數量
+MAX_JOB_HISTORY = 20
+
+# 訓練工作狀態
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+def _run_training(df: pd.DataFrame, extra_keys: Optional[List[str]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """在工作行程中訓練模型，回傳 (評估結果, 模型狀態)"""
+    model = CrimePredictionModel()
+    results = model.train_models(df, extra_keys=extra_keys, raise_errors=True)
+    if not results:
+        raise RuntimeError("模型訓練失敗")
+    return results, model.get_state()
+
+def _run_update(state: Dict[str, Any], new_rows: pd.DataFrame, version: Optional[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """在工作行程中以新增資料列增量更新模型，回傳 (評估結果, 模型狀態)"""
+    model = CrimePredictionModel()
+    model.set_state(state)
+    results = model.update_models(new_rows, raise_errors=True, version=version)
+    return results, model.get_state()
+
+class TrainingJob:
+    """單次訓練工作（kind 為 train 完整訓練或 update 增量更新）"""
+    
+    def __init__(self, job_id: int, key: Hashable, kind: str = 'train'):
+        self.job_id = job_id
+        self.key = key
+        self.kind = kind
+        self.status = JOB_QUEUED
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.results: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+    
+    @property
+    def is_active(self) -> bool:
+        return self.status in (JOB_QUEUED, JOB_RUNNING)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """轉為可序列化的狀態資訊"""
+        if self.status == JOB_QUEUED and self.future is not None and self.future.running():
+            self.status = JOB_RUNNING
+        elapsed = (self.finished_at or time.time()) - self.submitted_at
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'elapsed_seconds': round(elapsed, 2),
+            'results': self.results,
+            'error': self.error
+        }
+
+class TrainingJobManager:
+    """背景訓練工作管理器
+    
+    同一份資料（以 key 識別）同時只會有一個訓練工作；訓練期間模型維持舊版本，
+    完成後才整批替換模型狀態。訓練失敗的資料版本在退避時間內不會重新提交。
+    """
+    
+    def __init__(self, model: CrimePredictionModel, use_processes: bool = True,
+                 retry_seconds: Optional[float] = None, retry_max_seconds: Optional[float] = None):
+        self.model = model
+        self.use_processes = use_processes
+        self.retry_seconds = config.TRAINING_RETRY_SECONDS if retry_seconds is None else retry_seconds
+        self.retry_max_seconds = config.TRAINING_RETRY_MAX_SECONDS if retry_max_seconds is None else retry_max_seconds
+        self.trained_key: Optional[Hashable] = None
+        self._jobs: 'OrderedDict[int, TrainingJob]' = OrderedDict()
+        # 資料版本 → 模型版本鍵值（避免每次請求重新計算資料指紋）
+        self._training_keys: 'OrderedDict[Hashable, str]' = OrderedDict()
+        # 資料版本 → (連續失敗次數, 可重新提交的時間)
+        self._failures: Dict[Hashable, Tuple[int, float]] = {}
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+    
+    def submit(self, df: pd.DataFrame, key: Hashable, extra_keys: Optional[List[str]] = None) -> TrainingJob:
+        """提交訓練工作，相同資料已在訓練或已訓練完成時直接回傳既有工作"""
+        return self._submit(key, 'train', f"{len(df)} 筆資料", _run_training, df, extra_keys)
+    
+    def submit_update(self, new_rows: pd.DataFrame, key: Hashable, version: Optional[str] = None) -> TrainingJob:
+        """提交增量更新工作：以目前模型狀態加入新增資料列，完成後視為 key 版本
+        
+        version 為完整資料的模型版本鍵值，更新後的模型以此登錄，之後以完整資料完整訓練或載入時可直接重用。
+        """
+        return self._submit(key, 'update', f"新增 {len(new_rows)} 筆資料", _run_update,
+                            self.model.get_state(), new_rows, version)
+    
+    def _submit(self, key: Hashable, kind: str, description: str, fn, *args) -> TrainingJob:
+        """提交工作到工作行程，相同 key 已在進行或已完成時直接回傳既有工作"""
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job.key == key and (job.is_active or job.status == JOB_DONE):
+                    return job
+            
+            job = TrainingJob(next(self._job_ids), key, kind)
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > MAX_JOB_HISTORY:
+                self._jobs.popitem(last=False)
+            
+            job.future = self._get_executor().submit(fn, *args)
+            logger.info(f"已提交模型{'增量更新' if kind == 'update' else '訓練'}工作 #{job.job_id}（{description}）")
+        
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+    
+    def ensure_trained(self, df: pd.DataFrame, key: Hashable, base_key: Optional[Hashable] = None,
+                       new_rows: Optional[pd.DataFrame] = None) -> Optional[TrainingJob]:
+        """資料版本與目前模型不同時提交訓練，回傳進行中的工作（已是最新、或失敗後仍在退避時間內時回傳 None）
+        
+        相同資料曾訓練過時直接由模型登錄載入，不另外提交工作；該版本的工作進行中時不查詢模型登錄。
+        new_rows 為資料版本 base_key 之後附加的資料列，目前模型正是以 base_key 訓練時改為提交增量更新工作，
+        增量更新失敗後該版本改為完整訓練。
+        """
+        if self.trained_key == key and self.model.is_trained:
+            return None
+        with self._lock:
+            job = self._latest_job_for(key)
+            if job is not None and job.is_active:
+                return job
+            failure = self._failures.get(key)
+            if failure is not None and time.time() < failure[1]:
+                return None
+        if new_rows is not None and failure is None and self._can_update(base_key):
+            job = self.submit_update(new_rows, key, version=self._training_key(df, key))
+            return job if job.is_active else None
+        if self.model.load_for_data(df, key=self._training_key(df, key)):
+            self.trained_key = key
+            return None
+        job = self.submit(df, key)
+        return job if job.is_active else None
+    
+    def _can_update(self, base_key: Optional[Hashable]) -> bool:
+        """目前模型是否以 base_key 的資料訓練、且保存了增量更新所需的聚合目標"""
+        return (base_key is not None and self.trained_key == base_key and self.model.is_trained
+                and self.model.targets is not None and bool(self.model.model_params))
+    
+    def failure_count(self, key: Hashable) -> int:
+        """指定資料版本連續訓練失敗的次數"""
+        failure = self._failures.get(key)
+        return failure[0] if failure else 0
+    
+    def _training_key(self, df: pd.DataFrame, key: Hashable) -> str:
+        """取得資料版本對應的模型版本鍵值，同一資料版本只計算一次"""
+        with self._lock:
+            training_key = self._training_keys.get(key)
+        if training_key is None:
+            training_key = self.model.training_key(df)
+            with self._lock:
+                self._training_keys[key] = training_key
+                while len(self._training_keys) > MAX_JOB_HISTORY:
+                    self._training_keys.popitem(last=False)
+        return training_key
+    
+    def _latest_job_for(self, key: Hashable) -> Optional[TrainingJob]:
+        """取得指定資料版本最近的工作（呼叫端需持有鎖）"""
+        for job in reversed(self._jobs.values()):
+            if job.key == key:
+                return job
+        return None
+    
+    def get_job(self, job_id: int) -> Optional[TrainingJob]:
+        """取得指定訓練工作"""
+        return self._jobs.get(job_id)
+    
+    def latest_job(self) -> Optional[TrainingJob]:
+        """取得最近提交的訓練工作"""
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
+    
+    def failed_job(self) -> Optional[TrainingJob]:
+        """最近一次工作失敗時回傳該工作，否則回傳 None"""
+        job = self.latest_job()
+        return job if job is not None and job.status == JOB_FAILED else None
+    
+    def status(self) -> Dict[str, Any]:
+        """取得模型與最近一次訓練工作的狀態
+        
+        state 為 ready（模型可用且沒有進行中的工作）、training（工作進行中）或 failed（最近一次工作失敗），
+        失敗時附上錯誤訊息與距離可重新提交的秒數。
+        """
+        job = self.latest_job()
+        latest = job.to_dict() if job else None
+        result = {'model_ready': self.model.is_trained, 'state': 'ready' if self.model.is_trained else 'training'}
+        if job is not None and job.is_active:
+            result['state'] = 'training'
+        elif job is not None and job.status == JOB_FAILED:
+            failure = self._failures.get(job.key)
+            result.update({
+                'state': 'failed',
+                'error': job.error,
+                'retry_after_seconds': round(max(failure[1] - time.time(), 0), 1) if failure else 0
+            })
+        result['latest_job'] = latest
+        return result
+    
+    def wait(self, job: TrainingJob, timeout: Optional[float] = None) -> TrainingJob:
+        """等待訓練工作結束（主要供測試與命令列使用）"""
+        try:
+            job.future.result(timeout=timeout)
+        except Exception:
+            pass
+        # 完成回呼可能仍在另一執行緒套用模型
+        deadline = time.time() + (timeout or 5)
+        while job.is_active and time.time() < deadline:
+            time.sleep(0.01)
+        return job
+    
+    def shutdown(self):
+        """停止工作行程"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+    
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                # 以 spawn 啟動工作行程，避免在多執行緒的 Web 行程中 fork 後繼承被持有的鎖
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-training')
+        return self._executor
+    
+    def _finish(self, job: TrainingJob, future: Future):
+        """訓練結束時套用新模型或記錄錯誤"""
+        try:
+            results, state = future.result()
+            self.model.set_state(state)
+            self.trained_key = job.key
+            job.results = results
+            job.status = JOB_DONE
+            with self._lock:
+                self._failures.pop(job.key, None)
+            logger.info(f"模型訓練工作 #{job.job_id} 完成")
+        except Exception as e:
+            job.error = f"{e.__class__.__name__}: {e}" if str(e) else e.__class__.__name__
+            job.status = JOB_FAILED
+            with self._lock:
+                count = self.failure_count(job.key) + 1
+                # 增量更新失敗時立即改為完整訓練，不需等待
+                delay = 0 if job.kind == 'update' else min(self.retry_seconds * 2 ** (count - 1), self.retry_max_seconds)
+                self._failures[job.key] = (count, time.time() + delay)
+                while len(self._failures) > MAX_JOB_HISTORY:
+                    self._failures.pop(next(iter(self._failures)))
+            logger.error(f"模型訓練工作 #{job.job_id} 失敗（{delay:.0f} 秒後才會重新提交）: {job.error}")
+        finally:
+            job.finished_at = time.time()
@@ -5,10 +5,11 @@ Web 介面模組
 
 from flask import Flask, render_template, request, jsonify, send_file
 import pandas as pd
+import copy
 import json
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import threading
 import plotly.graph_objects as go
 import plotly.express as px
@@ -17,6 +18,12 @@ from plotly.utils import PlotlyJSONEncoder
 from src.data.processor import DataProcessor
 from src.data.area_analyzer import AreaAnalyzer
 from src.utils.ml_predictor import CrimePredictionModel
+from src.utils.training_jobs import TrainingJobManager
+from src.utils.forecasting import SeasonalForecaster
+from src.utils.http_pool import session_pool, single_flight
+from src.utils.response_cache import response_cache
+from src.utils.ckan_resources import ckan_resources
+from src.data.schema import to_categories, concat_compact
 from src.utils.config import config
 
 logger = logging.getLogger(__name__)
@@ -34,16 +41,23 @@ class WebInterface:
         self.data_processor = data_processor
         self.area_analyzer = AreaAnalyzer()
         self.ml_model = CrimePredictionModel()
+        self.training_jobs = TrainingJobManager(self.ml_model, use_processes=config.TRAINING_USE_PROCESSES)
+        # 先載入最近的模型版本，資料對應的版本確認或重新訓練前仍可提供預測
+        self.ml_model.load_models()
+        self._forecasters: Dict[tuple, SeasonalForecaster] = {}
+        self._forecaster_version: Optional[int] = None
+        self._forecaster_lock = threading.Lock()
         self.setup_routes()
         self.server_thread = None
         # 動態資料來源設定（CKAN 優先，其次 CSV）
         self.ckan_base = os.environ.get('CKAN_BASE', 'https://data.taipei/api/3/action')
         self.ckan_dataset_id = os.environ.get('TAIPEI_DATASET_ID')
         self.ckan_query = os.environ.get('CKAN_QUERY')
+        # CKAN_LIMIT 為讀取筆數上限，0 表示讀取完整資料集
         try:
-            self.ckan_limit = int(os.environ.get('CKAN_LIMIT', '200') or '200')
+            self.ckan_limit = int(os.environ.get('CKAN_LIMIT', '0') or '0')
         except Exception:
-            self.ckan_limit = 200
+            self.ckan_limit = 0
         self.dynamic_data_url = os.environ.get('DYNAMIC_DATA_URL')
         self.data_refresh_minutes = int(os.environ.get('DATA_REFRESH_MINUTES', '0') or '0')
 
@@ -123,7 +137,8 @@ class WebInterface:
                 df = self.get_current_data()
                 return jsonify({
                     'status': 'ok',
-                    'has_data': bool(df is not None and not df.empty)
+                    'has_data': bool(df is not None and not df.empty),
+                    'stats_cache': self.data_processor.get_stats_cache_info()
                 })
             except Exception as e:
                 return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -180,29 +195,110 @@ class WebInterface:
                 if df is None or df.empty:
                     return jsonify({'error': '沒有可用的資料'})
                 
-                area = request.args.get('area', '台北市')
+                areas = self._request_areas() or ['台北市']
                 years = request.args.getlist('years', type=int)
                 
                 if not years:
                     years = [2024, 2025, 2026]
                 
-                # 訓練模型（如果尚未訓練）
+                # 資料更新後於背景更新模型（只在尾端附加資料列時增量更新，否則重新訓練），完成前沿用舊模型
+                trained_key = self.training_jobs.trained_key
+                self.training_jobs.ensure_trained(
+                    df, self.data_processor.data_version,
+                    base_key=trained_key, new_rows=self.data_processor.appended_rows(trained_key)
+                )
                 if not self.ml_model.is_trained:
-                    self.ml_model.train_models(df)
+                    failed_job = self.training_jobs.failed_job()
+                    if failed_job is not None:
+                        return jsonify({
+                            'status': 'failed',
+                            'message': '預測模型訓練失敗',
+                            'error': failed_job.error,
+                            'training': self.training_jobs.status()
+                        }), 503
+                    return jsonify({
+                        'status': 'warming_up',
+                        'message': '預測模型訓練中，請稍後再試',
+                        'training': self.training_jobs.status()
+                    }), 202
                 
-                # 預測
-                predictions = self.ml_model.predict_crime_trends(area, years)
+                # 所有地區與年份一次預測
+                table = self.ml_model.predict_batch(areas, years)
+                predictions = {
+                    area: dict(zip(group['年份'].tolist(), group['預測案件數'].tolist()))
+                    for area, group in table.groupby('地區', sort=False)
+                }
                 
-                return jsonify({
-                    'area': area,
-                    'predictions': predictions,
-                    'feature_importance': self.ml_model.get_feature_importance()
-                })
+                result = {
+                    'feature_importance': self.ml_model.get_feature_importance(),
+                    'training': self.training_jobs.status()
+                }
+                if len(areas) == 1:
+                    result.update({'area': areas[0], 'predictions': predictions.get(areas[0], {})})
+                else:
+                    result.update({'areas': areas, 'predictions': predictions})
+                return jsonify(result)
                 
             except Exception as e:
                 logger.error(f"API 預測時發生錯誤: {e}")
                 return jsonify({'error': str(e)})
         
+        @self.app.route('/api/forecast')
+        def api_forecast():
+            """API - 各地區每月/每週案件數預測（含預測區間）"""
+            try:
+                df = self.get_current_data()
+                if df is None or df.empty:
+                    return jsonify({'error': '沒有可用的資料'})
+                
+                freq = request.args.get('freq', 'M').upper()
+                area_level = request.args.get('area_level', '縣市')
+                horizon = min(max(request.args.get('horizon', 12, type=int), 1), 104)
+                
+                forecaster = self._get_forecaster(df, freq, area_level)
+                table = forecaster.forecast(self._request_areas() or None, horizon)
+                return jsonify({
+                    'freq': freq,
+                    'area_level': area_level,
+                    'last_period': str(forecaster.last_period),
+                    'forecasts': table.to_dict(orient='records')
+                })
+            
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                logger.error(f"API 時間序列預測時發生錯誤: {e}")
+                return jsonify({'error': str(e)})
+        
+        @self.app.route('/api/metrics')
+        def api_metrics():
+            """API - 快取與模型訓練指標"""
+            return jsonify({
+                'prediction_cache': self.ml_model.prediction_cache.stats(),
+                'stats_cache': self.data_processor.get_stats_cache_info(),
+                'model_version': self.ml_model.version,
+                'training': self.training_jobs.status(),
+                'http_pool': session_pool.stats(),
+                'http_cache': response_cache.stats(),
+                'single_flight': single_flight.stats(),
+                'ckan_resources': ckan_resources.stats()
+            })
+        
+        @self.app.route('/api/prediction/status')
+        def api_prediction_status():
+            """API - 預測模型訓練狀態"""
+            job_id = request.args.get('job_id', type=int)
+            if job_id is None:
+                status = self.training_jobs.status()
+                # 沒有可用模型且最近一次訓練失敗時以 503 回報，與訓練中的 202 區分
+                if status['state'] == 'failed' and not status['model_ready']:
+                    return jsonify(status), 503
+                return jsonify(status)
+            job = self.training_jobs.get_job(job_id)
+            if job is None:
+                return jsonify({'error': '找不到訓練工作'}), 404
+            return jsonify(job.to_dict())
+        
         @self.app.route('/api/areas')
         def api_areas():
             """API - 取得可用地區"""
@@ -245,14 +341,13 @@ class WebInterface:
         def api_library_seats():
             """圖書館座位 API"""
             try:
-                import asyncio
                 from src.utils.government_data import GovernmentDataAPI
                 
                 async def fetch_data():
                     async with GovernmentDataAPI() as api:
                         return await api.get_library_seats()
                 
-                df = asyncio.run(fetch_data())
+                df = session_pool.run(fetch_data())
                 
                 if df is None or df.empty:
                     return jsonify({'seats': [], 'total': 0})
@@ -290,14 +385,13 @@ class WebInterface:
         def api_library_branches():
             """取得圖書館分館列表"""
             try:
-                import asyncio
                 from src.utils.government_data import GovernmentDataAPI
                 
                 async def fetch_data():
                     async with GovernmentDataAPI() as api:
                         return await api.get_library_seats()
                 
-                df = asyncio.run(fetch_data())
+                df = session_pool.run(fetch_data())
                 
                 if df is None or df.empty:
                     return jsonify({'branches': []})
@@ -312,14 +406,13 @@ class WebInterface:
         def api_bike_theft():
             """自行車竊盜資料 API"""
             try:
-                import asyncio
                 from src.utils.government_data import GovernmentDataAPI
                 
                 async def fetch_data():
                     async with GovernmentDataAPI() as api:
                         return await api.get_bike_theft_data()
                 
-                df = asyncio.run(fetch_data())
+                df = session_pool.run(fetch_data())
                 
                 if df is None or df.empty:
                     return jsonify({'cases': [], 'total': 0})
@@ -450,6 +543,46 @@ class WebInterface:
             logger.warning(f"YouBike 抓取失敗: {e}")
             return None
     
+    def _request_areas(self) -> List[str]:
+        """取得請求中的地區，可重複指定 area 或以逗號分隔"""
+        return [
+            name.strip()
+            for value in request.args.getlist('area')
+            for name in value.split(',') if name.strip()
+        ]
+    
+    def _get_forecaster(self, df: pd.DataFrame, freq: str, area_level: str) -> SeasonalForecaster:
+        """取得目前資料版本的時間序列預測器
+        
+        新資料只在尾端附加資料列時以 update 延續既有預測器（只重新擬合有回補舊期間的地區），
+        既有資料有變動時才全部重新擬合。
+        """
+        version = self.data_processor.data_version
+        with self._forecaster_lock:
+            if self._forecaster_version != version:
+                new_rows = self.data_processor.appended_rows(self._forecaster_version)
+                if new_rows is None:
+                    self._forecasters = {}
+                elif not new_rows.empty:
+                    # 複製後再更新，其他請求仍可使用舊預測器
+                    self._forecasters = {
+                        key: self._updated_forecaster(forecaster, new_rows)
+                        for key, forecaster in self._forecasters.items()
+                    }
+                self._forecaster_version = version
+            forecaster = self._forecasters.get((freq, area_level))
+            if forecaster is None:
+                forecaster = SeasonalForecaster(freq, area_level).fit(df)
+                self._forecasters[(freq, area_level)] = forecaster
+            return forecaster
+    
+    @staticmethod
+    def _updated_forecaster(forecaster: SeasonalForecaster, new_rows: pd.DataFrame) -> SeasonalForecaster:
+        """以新增資料列更新預測器的副本"""
+        forecaster = copy.deepcopy(forecaster)
+        forecaster.update(new_rows)
+        return forecaster
+    
     def get_current_data(self) -> Optional[pd.DataFrame]:
         """取得當前資料"""
         current_df = self.data_processor.get_current_data()
@@ -494,46 +627,27 @@ class WebInterface:
         self._refresh_timer.start()
 
     def refresh_data_from_ckan(self) -> int:
-        """從 CKAN 以 dataset UUID 取得 records 並設為當前資料"""
-        import requests
+        """從 CKAN 以 dataset UUID 分頁讀取完整 records 並設為當前資料（CKAN_LIMIT 大於 0 時限制筆數）"""
+        from src.utils.government_data import GovernmentDataAPI
         if not self.ckan_dataset_id:
             raise ValueError('未設定 TAIPEI_DATASET_ID')
-        base = self.ckan_base.rstrip('/')
-        # 1) 取 resource_id
-        pkg_url = f"{base}/package_show"
-        r = requests.get(pkg_url, params={'id': self.ckan_dataset_id}, timeout=20)
-        r.raise_for_status()
-        j = r.json()
-        if not j.get('success'):
-            raise ValueError('package_show 失敗')
-        resources = j.get('result', {}).get('resources', [])
-        resource_id = None
-        for res in resources:
-            if res.get('datastore_active'):
-                resource_id = res.get('id')
-                break
-        if not resource_id and resources:
-            resource_id = resources[0].get('id')
-        if not resource_id:
-            raise ValueError('找不到可查詢的 resource_id')
-        # 2) 查 records
-        ds_url = f"{base}/datastore_search"
-        params = {'resource_id': resource_id, 'limit': self.ckan_limit}
-        if self.ckan_query:
-            params['q'] = self.ckan_query
-        r2 = requests.get(ds_url, params=params, timeout=30)
-        r2.raise_for_status()
-        j2 = r2.json()
-        if not j2.get('success'):
-            raise ValueError('datastore_search 失敗')
-        records = j2.get('result', {}).get('records', [])
-        if not records:
+        params = {'q': self.ckan_query} if self.ckan_query else None
+        
+        async def fetch_chunks():
+            # 每頁讀到即映射欄位、處理日期並轉為精簡型別，不保留原始 records
+            chunks = []
+            async with GovernmentDataAPI() as api:
+                api.ckan_base = self.ckan_base.rstrip('/')
+                async for chunk in api.iter_ckan_dataset(self.ckan_dataset_id, params, self.ckan_limit or None):
+                    chunk = self.data_processor._map_columns(chunk)
+                    chunk = self.data_processor._process_dates(chunk)
+                    chunks.append(to_categories(chunk))
+            return chunks
+        
+        chunks = session_pool.run(fetch_chunks(), timeout=config.CKAN_LOAD_TIMEOUT_SECONDS)
+        if not chunks:
             raise ValueError('CKAN 無資料')
-        # 3) 轉為 DataFrame 並嘗試映射欄位
-        df = pd.DataFrame(records)
-        # 嘗試沿用資料處理器的欄位映射與日期處理
-        df = self.data_processor._map_columns(df)
-        df = self.data_processor._process_dates(df)
+        df = self.data_processor._normalize_schema(concat_compact(chunks))
         self.data_processor.set_current_data(df)
         logger.info(f"已載入 CKAN 資料：{len(df)} 筆")
         return len(df)
@@ -560,12 +674,8 @@ class WebInterface:
     def create_yearly_trend_chart(self, df: pd.DataFrame, area: str = '全部地區') -> str:
         """創建年度趨勢圖"""
         try:
-            if area != '全部地區':
-                filtered_df = df[df['地點'].str.contains(area, na=False)]
-            else:
-                filtered_df = df
-            
-            yearly_counts = filtered_df['年份'].value_counts().sort_index()
+            cube = self.data_processor.get_cube(df)
+            yearly_counts = cube.rollup('年份', area=area).sort_index()
             
             fig = go.Figure()
             fig.add_trace(go.Scatter(
@@ -594,13 +704,8 @@ class WebInterface:
     def create_area_distribution_chart(self, df: pd.DataFrame, year: int = None) -> str:
         """創建地區分布圖"""
         try:
-            if year:
-                filtered_df = df[df['年份'] == year]
-            else:
-                filtered_df = df
-            
-            # 提取市級地區
-            areas = filtered_df['地點'].str.extract(r'(.+?市)', expand=False).value_counts().head(10)
+            cube = self.data_processor.get_cube(df)
+            areas = cube.rollup('縣市', top=10, year=year or None)
             
             fig = go.Figure()
             fig.add_trace(go.Bar(
@@ -628,15 +733,8 @@ class WebInterface:
     def create_case_type_pie_chart(self, df: pd.DataFrame, area: str = '全部地區', year: int = None) -> str:
         """創建案件類型圓餅圖"""
         try:
-            filtered_df = df
-            
-            if area != '全部地區':
-                filtered_df = filtered_df[filtered_df['地點'].str.contains(area, na=False)]
-            
-            if year:
-                filtered_df = filtered_df[filtered_df['年份'] == year]
-            
-            case_counts = filtered_df['案類'].value_counts().head(8)
+            cube = self.data_processor.get_cube(df)
+            case_counts = cube.rollup('案類', top=8, area=area, year=year or None)
             
             fig = go.Figure()
             fig.add_trace(go.Pie(
@@ -664,13 +762,8 @@ class WebInterface:
     def create_time_heatmap(self, df: pd.DataFrame, area: str = '全部地區') -> str:
         """創建時段熱力圖"""
         try:
-            if area != '全部地區':
-                filtered_df = df[df['地點'].str.contains(area, na=False)]
-            else:
-                filtered_df = df
-            
-            # 創建年份-時段的交叉表
-            heatmap_data = pd.crosstab(filtered_df['年份'], filtered_df['時段'])
+            # 由聚合立方體取得年份-時段的交叉表
+            heatmap_data = self.data_processor.get_cube(df).crosstab('年份', '時段', area=area)
             
             fig = go.Figure()
             fig.add_trace(go.Heatmap(
@@ -1187,6 +1280,11 @@ document.addEventListener('DOMContentLoaded', function() {
                 return;
             }
 
+            if (data.status === 'warming_up') {
+                NumoraApp.showNotification(data.message, 'info');
+                return;
+            }
+
             // 顯示預測結果
             document.getElementById('predictionInfo').innerHTML = `
                 <div class="mb-3">
@@ -1342,4 +1440,6 @@ document.getElementById('pageSelect').addEventListener('change', async (e) => {
     def stop_server(self):
         """停止 Web 伺服器"""
         # Flask 沒有內建的停止方法，這裡只是記錄
+        self.training_jobs.shutdown()
+        session_pool.close()
         logger.info("Web 介面停止請求已發送")
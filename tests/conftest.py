@@ -9,6 +9,11 @@ import tempfile
 import shutil
 from unittest.mock import Mock, AsyncMock
 import asyncio
+import threading
+from aiohttp import web
+
+# 測試時預設停用磁碟快取，避免在工作目錄留下快照檔
+os.environ.setdefault('ENABLE_CACHE', 'False')
 
 # 測試資料
 SAMPLE_CSV_DATA = """編號,案類,日期,時段,地點
@@ -104,6 +109,36 @@ def event_loop():
     yield loop
     loop.close()
 
+@pytest.fixture
+def http_server():
+    """在背景執行緒啟動本機 HTTP 伺服器，傳入處理函式後回傳網址"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    runners = []
+    
+    def start(handler, path: str = '/data') -> str:
+        async def setup():
+            app = web.Application()
+            app.router.add_get(path, handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            return runner, site._server.sockets[0].getsockname()[1]
+        
+        runner, port = asyncio.run_coroutine_threadsafe(setup(), loop).result(5)
+        runners.append(runner)
+        return f"http://127.0.0.1:{port}{path}"
+    
+    yield start
+    
+    for runner in runners:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
 class AsyncContextManager:
     """異步上下文管理器輔助類"""
     def __init__(self, async_func):
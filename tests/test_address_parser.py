@@ -0,0 +1,62 @@
+"""
+地址解析模組測試
+"""
+
+import pytest
+
+from src.data.address_parser import AddressParser, AddressParts
+
+class TestAddressParser:
+    """地址解析器測試類"""
+    
+    def setup_method(self):
+        """設定測試方法"""
+        self.parser = AddressParser()
+    
+    def test_parse_city_district_village(self):
+        """測試解析縣市、鄉鎮市區與村里"""
+        parts = self.parser.parse('台北市中山區中山里民權東路一段100號')
+        
+        assert parts == AddressParts('台北市', '中山區', '中山里')
+        assert parts.city == '台北市'
+        assert self.parser.parse('新竹縣竹北市成功路') == ('新竹縣', '竹北市', None)
+    
+    def test_parse_normalizes_names(self):
+        """測試臺/台寫法、郵遞區號與空白"""
+        assert self.parser.parse('104臺北市 中山區 民權東路') == ('台北市', '中山區', None)
+    
+    def test_parse_legacy_county(self):
+        """測試改制前的舊縣名對應到新行政區"""
+        assert self.parser.parse('臺北縣板橋市文化路') == ('新北市', '板橋區', None)
+        assert self.parser.parse('高雄縣鳳山市光復路') == ('高雄市', '鳳山區', None)
+    
+    def test_parse_district_without_city(self):
+        """測試省略縣市時以唯一的鄉鎮市區推回縣市"""
+        assert self.parser.parse('板橋區文化路') == ('新北市', '板橋區', None)
+        # 中山區在多個縣市都有，無法判斷
+        assert self.parser.parse('中山區民權東路') == (None, None, None)
+    
+    def test_parse_does_not_misread_city_character(self):
+        """測試地名中的市字不會被誤判為縣市層級"""
+        assert self.parser.parse('南投縣魚池鄉市場村中正路') == ('南投縣', '魚池鄉', '市場村')
+        assert self.parser.parse('台中市大里區大里路') == ('台中市', '大里區', None)
+    
+    def test_parse_unofficial_district(self):
+        """測試不在官方名稱中的鄉鎮仍依字尾解析"""
+        assert self.parser.parse('南投縣埔里鄉中山路') == ('南投縣', '埔里鄉', None)
+    
+    @pytest.mark.parametrize('address', [None, '', '地址不詳', 123])
+    def test_parse_invalid(self, address):
+        """測試無法解析的地址"""
+        assert self.parser.parse(address) == (None, None, None)
+    
+    def test_parse_cache(self):
+        """測試相同地址只解析一次"""
+        results = self.parser.parse_many(['台北市中山區', '台北市中山區', '新北市板橋區'])
+        
+        assert results[0] is results[1]
+        assert self.parser.cache_misses == 2
+        assert self.parser.cache_hits == 1
+        
+        self.parser.clear_cache()
+        assert self.parser.cache_hits == 0
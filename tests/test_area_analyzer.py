@@ -4,6 +4,7 @@
 
 import pytest
 import pandas as pd
+from unittest.mock import patch
 
 from src.data.area_analyzer import AreaAnalyzer
 
@@ -174,3 +175,30 @@ class TestAreaAnalyzer:
         
         # 確保沒有多餘的空格
         assert all('  ' not in str(district) for district in districts)
+    
+    def test_parse_address(self):
+        """測試地址解析為縣市、區/鄉/鎮、里"""
+        assert self.analyzer.parse_address('台北市中山區中山里民權東路') == ('台北市', '中山區', '中山里')
+        assert self.analyzer.parse_address('新竹縣竹北市成功路') == ('新竹縣', '竹北市', None)
+        assert self.analyzer.parse_address(' 台北市 大安區 ') == ('台北市', '大安區', None)
+        assert self.analyzer.parse_address('地址不詳') == (None, None, None)
+        assert self.analyzer.parse_address(None) == (None, None, None)
+    
+    def test_add_area_columns(self, sample_dataframe):
+        """測試預先解析行政區欄位後不再重新解析地點"""
+        df = self.analyzer.add_area_columns(sample_dataframe)
+        
+        assert '縣市' not in sample_dataframe.columns
+        assert self.analyzer.add_area_columns(df) is df
+        
+        for col in ['縣市', '區/鄉/鎮', '里']:
+            assert isinstance(df[col].dtype, pd.CategoricalDtype)
+        assert list(df['縣市']) == ['台北市', '新北市', '台北市', '台中市', '高雄市']
+        assert df.iloc[1]['區/鄉/鎮'] == '板橋區'
+        
+        with patch.object(AreaAnalyzer, 'parse_address', side_effect=AssertionError):
+            areas_info = self.analyzer.extract_area_info(df)
+            result_df = self.analyzer.extract_district_by_area(df, '台北市')
+        
+        assert areas_info['市區'][0] == '台北市中山區'
+        assert set(result_df['區']) == {'台北市中山區', '台北市信義區'}
@@ -0,0 +1,37 @@
+"""
+快取工具模組測試
+"""
+
+from unittest.mock import patch
+
+from src.utils.cache import TTLCache
+
+class TestTTLCache:
+    """LRU + TTL 快取測試類"""
+    
+    def test_lru_eviction(self):
+        """測試超過容量時淘汰最久未使用的項目"""
+        cache = TTLCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+        cache.set('c', 3)
+        
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert cache.stats()['hits'] == 3
+        assert cache.stats()['misses'] == 1
+    
+    def test_expiry(self):
+        """測試超過存活時間的項目視為不存在"""
+        cache = TTLCache(ttl=10)
+        with patch('src.utils.cache.time.monotonic', return_value=100.0):
+            cache.set('a', 1)
+            cache.set('b', 2, ttl=100)
+        
+        with patch('src.utils.cache.time.monotonic', return_value=111.0):
+            assert cache.get('a') is None
+            assert cache.get('b') == 2
+        assert len(cache) == 1
+        assert cache.stats()['hit_ratio'] == 0.5
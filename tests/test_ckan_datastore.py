@@ -0,0 +1,103 @@
+"""
+CKAN datastore 分頁讀取模組測試
+"""
+
+import asyncio
+import pytest
+import pandas as pd
+from aiohttp import web
+
+from src.utils.ckan_datastore import DatastoreReader
+from src.utils.ckan_resources import ResourceIdCache
+from src.utils.government_data import GovernmentDataAPI
+from src.utils.http_pool import SessionPool
+from src.utils.response_cache import ResponseCache
+
+TOTAL = 23
+FIELDS = [{'id': '_id', 'type': 'int'}, {'id': '名稱', 'type': 'text'}, {'id': '經度', 'type': 'numeric'}]
+
+@pytest.fixture
+def datastore_server(http_server):
+    """模擬 CKAN datastore_search 分頁，回傳 (端點, 狀態)；with_total 為 False 時改提供 _links.next"""
+    state = {'resource': 'resource-1', 'with_total': True, 'active': 0, 'max_active': 0, 'calls': []}
+    rows = [{'_id': i + 1, '名稱': f'熱點{i + 1}', '經度': f'121.{i:05d}'} for i in range(TOTAL)]
+    
+    async def handler(request):
+        action = request.match_info['action']
+        state['calls'].append(action)
+        if action == 'package_show':
+            return web.json_response({'success': True, 'result': {'resources': [
+                {'id': state['resource'], 'datastore_active': True}
+            ]}})
+        if request.query['resource_id'] != state['resource']:
+            return web.json_response({'success': False, 'error': {'__type': 'Not Found Error'}}, status=404)
+        
+        state['active'] += 1
+        state['max_active'] = max(state['max_active'], state['active'])
+        await asyncio.sleep(0.01)
+        state['active'] -= 1
+        
+        offset, limit = int(request.query.get('offset', 0)), int(request.query.get('limit', 100))
+        result = {'fields': FIELDS, 'records': rows[offset:offset + limit]}
+        if state['with_total']:
+            result['total'] = TOTAL
+        else:
+            result['_links'] = {'next': f"/{action}?resource_id={state['resource']}&offset={offset + limit}&limit={limit}"}
+        return web.json_response({'success': True, 'result': result})
+    
+    url = http_server(handler, '/{action}')
+    return url.rsplit('/', 1)[0], state
+
+@pytest.fixture
+def pool():
+    pool = SessionPool()
+    yield pool
+    pool.close()
+
+def read(pool, base, **kwargs):
+    async def collect():
+        reader = DatastoreReader(await pool.session(), base, page_size=5, concurrency=2)
+        return [frame async for frame in reader.frames('resource-1', **kwargs)]
+    return pool.run(collect(), timeout=10)
+
+class TestDatastoreReader:
+    """分頁讀取測試類"""
+    
+    def test_reads_all_pages_in_order_with_bounded_concurrency(self, datastore_server, pool):
+        """測試以 offset 讀取所有頁面、依序產生、同時請求數不超過上限，並轉換數值欄位"""
+        base, state = datastore_server
+        frames = read(pool, base)
+        
+        assert [len(frame) for frame in frames] == [5, 5, 5, 5, 3]
+        assert [v for frame in frames for v in frame['_id']] == list(range(1, TOTAL + 1))
+        assert state['max_active'] == 2
+        assert str(frames[0]['_id'].dtype) == 'int8'
+        assert frames[0]['經度'].dtype == float
+        assert pd.api.types.is_string_dtype(frames[0]['名稱'])
+    
+    def test_follows_next_links_and_max_records(self, datastore_server, pool):
+        """測試沒有總筆數時依 _links.next 逐頁讀取，並遵守筆數上限"""
+        base, state = datastore_server
+        state['with_total'] = False
+        assert sum(len(frame) for frame in read(pool, base)) == TOTAL
+        
+        frames = read(pool, base, max_records=12)
+        assert [len(frame) for frame in frames] == [5, 5, 2]
+        assert frames[-1]['_id'].tolist() == [11, 12]
+    
+    def test_dataset_reader_recovers_from_removed_resource(self, datastore_server, pool):
+        """測試快取的 resource 已不存在時重新解析後讀取完整資料"""
+        base, state = datastore_server
+        resource_ids = ResourceIdCache(path='')
+        resource_ids.set('dataset-uuid', 'removed-resource', base)
+        api = GovernmentDataAPI(pool=pool, cache=ResponseCache(cache_dir=''), resource_ids=resource_ids)
+        api.ckan_base = base
+        
+        async def fetch():
+            async with api:
+                return await api.read_ckan_dataset('dataset-uuid')
+        
+        df = pool.run(fetch(), timeout=10)
+        assert len(df) == TOTAL and df['_id'].is_monotonic_increasing
+        assert state['calls'][:3] == ['datastore_search', 'package_show', 'datastore_search']
+        assert resource_ids.get('dataset-uuid', base) == 'resource-1'
@@ -0,0 +1,114 @@
+"""
+CKAN 資源代碼快取模組測試
+"""
+
+import os
+import pytest
+from aiohttp import web
+
+from src.utils.ckan_resources import ResourceIdCache, pick_resource_id, resource_gone
+from src.utils.config import config
+from src.utils.government_data import GovernmentDataAPI
+from src.utils.http_pool import SessionPool
+from src.utils.response_cache import ResponseCache
+
+DATASET = 'dataset-uuid'
+
+@pytest.fixture
+def ckan_server(http_server):
+    """模擬 CKAN action API，回傳 (端點, 狀態)；狀態中的 resource 可替換以模擬資源被移除"""
+    state = {'resource': 'old-resource', 'calls': []}
+    
+    async def handler(request):
+        action = request.match_info['action']
+        state['calls'].append(action)
+        if action == 'package_show':
+            return web.json_response({'success': True, 'result': {'resources': [
+                {'id': 'file-resource', 'datastore_active': False},
+                {'id': state['resource'], 'datastore_active': True}
+            ]}})
+        if request.query['resource_id'] != state['resource']:
+            return web.json_response({'success': False, 'error': {
+                '__type': 'Not Found Error', 'message': 'Not found: Resource was not found.'
+            }}, status=404)
+        return web.json_response({'success': True, 'result': {'records': [{'resource': state['resource']}]}})
+    
+    url = http_server(handler, '/{action}')
+    return url.rsplit('/', 1)[0], state
+
+@pytest.fixture
+def pool():
+    pool = SessionPool()
+    yield pool
+    pool.close()
+
+class TestResourceIdCache:
+    """資源代碼快取測試類"""
+    
+    def test_persists_and_invalidates(self, temp_directory):
+        """測試對應記錄寫入檔案、重新啟動後可讀取，失效後移除"""
+        path = os.path.join(temp_directory, 'ckan', 'resources.json')
+        cache = ResourceIdCache(path=path)
+        cache.set(DATASET, 'resource-1')
+        
+        restarted = ResourceIdCache(path=path)
+        assert restarted.get(DATASET) == 'resource-1'
+        assert restarted.get(DATASET, base='https://other.example/api/3/action') is None
+        
+        assert restarted.invalidate(DATASET)
+        assert ResourceIdCache(path=path).get(DATASET) is None
+        assert ResourceIdCache(path=path, max_age=0.0).get(DATASET) is None
+    
+    def test_default_file_outside_snapshot_directory(self):
+        """測試預設對應檔不放在資料快照目錄，清除快照時不會被刪除"""
+        cache_dir = os.path.abspath(config.DATA_CACHE_DIR)
+        resource_file = os.path.abspath(config.CKAN_RESOURCE_CACHE_FILE)
+        assert os.path.commonpath([cache_dir, resource_file]) != cache_dir
+    
+    def test_expired_entries_are_ignored(self):
+        """測試超過存活時間的對應視為不存在"""
+        cache = ResourceIdCache(path='', max_age=60)
+        cache.set(DATASET, 'resource-1')
+        cache._entries[cache.key(DATASET)]['resolved_at'] -= 120
+        assert cache.get(DATASET) is None
+        assert cache.stats()['misses'] == 1
+    
+    def test_response_helpers(self):
+        """測試 package_show 資源挑選與資源不存在的判斷"""
+        package = {'success': True, 'result': {'resources': [{'id': 'a'}, {'id': 'b', 'datastore_active': True}]}}
+        assert pick_resource_id(package) == 'b'
+        assert pick_resource_id({'success': True, 'result': {'resources': [{'id': 'a'}]}}) == 'a'
+        assert pick_resource_id({'success': False}) is None
+        
+        assert resource_gone({'success': False, 'error': {'__type': 'Not Found Error'}})
+        assert resource_gone({'success': False, 'error': {'__type': 'Validation Error', 'resource_id': ['Not found: Resource']}})
+        assert not resource_gone({'success': False, 'error': {'__type': 'Validation Error', 'q': ['invalid']}})
+        assert not resource_gone({'success': True, 'result': {}})
+
+class TestCkanResolution:
+    """CKAN 查詢使用資源代碼快取的測試類"""
+    
+    def test_skips_package_show_and_recovers_from_removed_resource(self, ckan_server, pool):
+        """測試已解析的 dataset 不再呼叫 package_show，resource 被移除時重新解析並重試"""
+        base, state = ckan_server
+        resource_ids = ResourceIdCache(path='')
+        api = GovernmentDataAPI(pool=pool, cache=ResponseCache(cache_dir=''), resource_ids=resource_ids)
+        api.ckan_base = base
+        
+        async def search(**kwargs):
+            async with api:
+                return await api._ckan_datastore_search_by_dataset(DATASET, **kwargs)
+        
+        assert pool.run(search(), timeout=10) == [{'resource': 'old-resource'}]
+        assert state['calls'] == ['package_show', 'datastore_search']
+        assert resource_ids.get(DATASET, base) == 'old-resource'
+        
+        state['calls'].clear()
+        assert pool.run(search(limit=5), timeout=10) == [{'resource': 'old-resource'}]
+        assert state['calls'] == ['datastore_search']
+        
+        state['resource'], state['calls'] = 'new-resource', []
+        assert pool.run(search(limit=7), timeout=10) == [{'resource': 'new-resource'}]
+        assert state['calls'] == ['datastore_search', 'package_show', 'datastore_search']
+        assert resource_ids.get(DATASET, base) == 'new-resource'
+        assert resource_ids.stats()['invalidations'] == 1
@@ -0,0 +1,148 @@
+"""
+聚合立方體模組測試
+"""
+
+import pytest
+import pandas as pd
+
+from src.data.area_analyzer import AreaAnalyzer
+from src.data.cube import CrimeCube
+
+@pytest.fixture
+def crime_dataframe():
+    """多年份、多地區的測試資料"""
+    return pd.DataFrame({
+        '案類': ['竊盜', '詐欺', '竊盜', '傷害', '竊盜', '竊盜', '詐欺', '竊盜'],
+        '時段': ['0-6', '6-12', '0-6', '18-24', '0-6', '12-18', '6-12', '0-6'],
+        '地點': [
+            '台北市中山區民權東路', '台北市中山區中山北路', '台北市信義區信義路',
+            '新北市板橋區中山路', '新竹縣竹北市成功路', '台北市中山區民權東路',
+            '新北市板橋區文化路', '地址不詳'
+        ],
+        '年份': [2022, 2022, 2023, 2023, 2023, 2023, 2023, 2023]
+    })
+
+class TestCrimeCube:
+    """聚合立方體測試類"""
+    
+    def test_count_and_rollup(self, crime_dataframe):
+        """測試總數與單一維度彙總"""
+        cube = CrimeCube(crime_dataframe)
+        
+        assert cube.count() == 8
+        assert cube.count(year=2023) == 6
+        assert cube.count(area='台北市', case_type='竊盜') == 3
+        assert cube.years == [2022, 2023]
+        assert cube.rollup('案類').to_dict() == crime_dataframe['案類'].value_counts().to_dict()
+        assert cube.rollup('縣市', top=1).to_dict() == {'台北市': 4}
+    
+    def test_crosstab_matches_pandas(self, crime_dataframe):
+        """測試交叉表與原始資料計算結果一致"""
+        cube = CrimeCube(crime_dataframe)
+        expected = pd.crosstab(crime_dataframe['年份'], crime_dataframe['時段'])
+        
+        result = cube.crosstab('年份', '時段')
+        
+        pd.testing.assert_frame_equal(result, expected, check_names=False, check_dtype=False,
+                                      check_index_type=False, check_column_type=False)
+    
+    def test_district_counts_matches_area_analyzer(self, crime_dataframe):
+        """測試行政區統計與 extract_district_by_area 結果一致"""
+        cube = CrimeCube(crime_dataframe)
+        analyzer = AreaAnalyzer()
+        
+        for area in ['全部地區', '台北市', '台北市中山區', '新竹縣']:
+            expected = analyzer.extract_district_by_area(crime_dataframe, area)['區'].value_counts()
+            result = cube.district_counts(area)
+            assert result.to_dict() == expected[expected > 0].to_dict()
+        
+        assert cube.district_counts('台北市', year=2022).to_dict() == {'台北市中山區': 2}
+        assert cube.district_counts('不存在的地區').empty
+    
+    def test_tai_spelling_variants(self, crime_dataframe):
+        """測試原始地點使用「臺」時，以臺或台查詢都能對應（立方體與逐列篩選結果一致）"""
+        df = crime_dataframe.assign(地點=crime_dataframe['地點'].str.replace('台北市', '臺北市'))
+        cube = CrimeCube(df)
+        analyzer = AreaAnalyzer()
+        
+        for area in ['臺北市', '台北市', '臺北市中山區']:
+            filtered = df[analyzer.location_mask(df, area)]
+            expected = analyzer.extract_district_by_area(filtered, area)['區'].value_counts()
+            result = cube.district_counts(area)
+            assert not result.empty
+            assert result.to_dict() == expected[expected > 0].to_dict()
+        
+        assert analyzer.location_mask(df, '台北市').sum() == 4
+        assert cube.count(area='臺北市') == 4
+        assert cube.count(area='臺北市', case_type='竊盜') == 3
+        assert cube.district_counts_by_year('臺北市').loc[2023, '台北市中山區'] == 1
+    
+    def test_unparsed_locations_fall_back_to_text_match(self, crime_dataframe):
+        """測試無法解析出縣市的地點仍以原始地點文字比對計入地區篩選"""
+        df = pd.concat([crime_dataframe, pd.DataFrame({
+            '案類': ['竊盜'], '時段': ['0-6'], '地點': ['中山區民權東路'], '年份': [2023]
+        })], ignore_index=True)
+        cube = CrimeCube(df)
+        analyzer = AreaAnalyzer()
+        
+        assert analyzer.get_area_columns(df)['縣市'].isna().iloc[-1]
+        assert cube.count(area='中山區') == analyzer.location_mask(df, '中山區').sum() == 4
+        assert cube.count(area='中山區', year=2023) == 2
+        assert cube.count(area='台北市') == 4
+        
+        expected = analyzer.extract_district_by_area(df, '中山區')['區'].value_counts()
+        assert expected.to_dict() == {'中山區': 4}
+        assert cube.district_counts('中山區').to_dict() == expected.to_dict()
+        assert cube.district_counts_by_year('中山區').loc[2023, '中山區'] == 2
+    
+    def test_district_counts_by_year(self, crime_dataframe):
+        """測試各年份行政區統計"""
+        result = CrimeCube(crime_dataframe).district_counts_by_year('台北市')
+        
+        assert list(result.index) == [2022, 2023]
+        assert result.loc[2023, '台北市中山區'] == 1
+        assert result.loc[2022, '台北市信義區'] == 0
+    
+    def test_processor_uses_cube(self, crime_dataframe):
+        """測試設定當前資料時建立立方體，統計結果與原始資料計算一致"""
+        from src.data.processor import DataProcessor
+        
+        processor = DataProcessor()
+        expected = processor.generate_statistics(crime_dataframe.copy())
+        
+        processor.set_current_data(crime_dataframe)
+        current = processor.get_current_data()
+        assert processor.current_cube is not None
+        assert processor.get_cube(current) is processor.current_cube
+        
+        stats = processor.generate_statistics(current)
+        assert stats['總案件數'] == expected['總案件數']
+        assert stats['年份範圍'] == expected['年份範圍']
+        assert stats['可用地區'] == expected['可用地區']
+        for key in ['年份統計', '時段統計', '案類統計']:
+            assert stats[key] == expected[key]
+        
+        processor.clear_current_data()
+        assert processor.current_cube is None
+    
+    def test_cube_swapped_together_with_data(self, crime_dataframe, monkeypatch):
+        """測試建立新立方體期間，查詢仍取得舊資料、舊立方體與舊版本"""
+        from src.data import processor as processor_module
+        
+        processor = processor_module.DataProcessor()
+        processor.set_current_data(crime_dataframe)
+        old_df, old_cube, old_version = processor.current_df, processor.current_cube, processor.data_version
+        seen = []
+        
+        class RecordingCube(CrimeCube):
+            def __init__(self, *args, **kwargs):
+                seen.append((processor.get_current_data(), processor.get_cube(old_df), processor.data_version))
+                super().__init__(*args, **kwargs)
+        
+        monkeypatch.setattr(processor_module, 'CrimeCube', RecordingCube)
+        processor.set_current_data(crime_dataframe.head(4).copy())
+        
+        assert seen == [(old_df, old_cube, old_version)]
+        assert isinstance(processor.current_cube, RecordingCube)
+        assert processor.current_cube.row_count == 4
+        assert processor.data_version == old_version + 1
@@ -5,9 +5,12 @@
 import pytest
 import pandas as pd
 import io
+import os
+import warnings
 from unittest.mock import patch, mock_open
 
 from src.data.processor import DataProcessor
+from src.data.schema import to_categories
 
 class TestDataProcessor:
     """資料處理器測試類"""
@@ -39,6 +42,43 @@ class TestDataProcessor:
         assert len(df) == 1
         assert df.iloc[0]['年份'] == 2023
     
+    def test_load_csv_data_big5_beyond_sample(self):
+        """測試取樣範圍內無法判斷編碼時，仍能回退至正確編碼"""
+        header = "ID,Type,Date,Time,Location\n"
+        ascii_rows = "".join(f"{i},theft,1120101,0-6,Taipei\n" for i in range(5000))
+        content = (header + ascii_rows + "9999,竊盜,1120101,0-6,台北市中山區\n").encode('big5')
+        
+        with patch('src.data.processor.ENCODING_SAMPLE_BYTES', 1024):
+            df = self.processor.load_csv_data(content)
+        
+        assert len(df) == 5001
+        assert df.iloc[-1]['地點'] == '台北市中山區'
+    
+    def test_load_csv_data_chunked(self):
+        """測試分批載入 CSV 並回報進度"""
+        rows = [
+            "1,竊盜,1120101,0-6,台北市中山區",
+            "2,詐欺,1120102,6-12,新北市板橋區",
+            "3,竊盜,invalid,12-18,台北市大安區",
+            "4,搶奪,1120104,18-24,台中市西區",
+            "5,竊盜,2023-01-05,0-6,台北市中山區",
+        ]
+        content = ("ID,Type,Date,Time,Location\n" + "\n".join(rows) + "\n").encode('utf-8')
+        progress = []
+        
+        df = self.processor.load_csv_data(
+            content,
+            chunk_size=2,
+            progress_callback=lambda count, ratio: progress.append((count, ratio))
+        )
+        
+        assert len(df) == 4
+        assert isinstance(df['案類'].dtype, pd.CategoricalDtype)
+        assert set(df['案類'].cat.categories) == {'竊盜', '詐欺', '搶奪'}
+        assert list(df['年份']) == [2023, 2023, 2023, 2023]
+        assert [count for count, _ in progress] == [2, 3, 4]
+        assert progress[-1][1] == pytest.approx(1.0)
+    
     def test_load_csv_data_invalid_encoding(self):
         """測試載入無效編碼的資料"""
         invalid_content = b'\xff\xfe\x00\x00invalid'
@@ -125,6 +165,22 @@ class TestDataProcessor:
         assert processed_df.iloc[0]['年份'] == 2023
         assert processed_df.iloc[1]['年份'] == 2024
     
+    def test_process_dates_minguo_with_separators(self):
+        """測試含分隔符號的民國年日期與混合格式"""
+        df = pd.DataFrame({
+            '編號': [1, 2, 3, 4],
+            '案類': ['竊盜', '詐欺', '竊盜', '詐欺'],
+            '日期': ['112/01/01', '99-3-4', '1130102', '2022/05/06'],
+            '時段': ['0-6', '6-12', '12-18', '18-24'],
+            '地點': ['台北市', '新北市', '台中市', '高雄市']
+        })
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            processed_df = self.processor._process_dates(df)
+        
+        assert processed_df['年份'].tolist() == [2023, 2010, 2024, 2022]
+    
     def test_generate_statistics(self, sample_dataframe):
         """測試統計資料生成"""
         stats = self.processor.generate_statistics(sample_dataframe)
@@ -141,7 +197,7 @@ class TestDataProcessor:
     
     @patch('builtins.open', mock_open(read_data="編號 案類 日期 時段 地點\n1 竊盜 1120101 0-6 台北市中山區"))
     @patch('os.path.exists', return_value=True)
-    def test_load_default_data(self):
+    def test_load_default_data(self, mock_exists):
         """測試載入預設資料"""
         df = self.processor.load_default_data()
         
@@ -150,13 +206,54 @@ class TestDataProcessor:
         assert '年份' in df.columns
     
     @patch('os.path.exists', return_value=False)
-    def test_load_default_data_no_file(self):
+    def test_load_default_data_no_file(self, mock_exists):
         """測試載入預設資料（檔案不存在）"""
         df = self.processor.load_default_data()
         
         assert df.empty
         assert list(df.columns) == ['編號', '案類', '日期', '時段', '地點', '年份']
     
+    def test_load_default_data_streaming(self, temp_directory, monkeypatch):
+        """測試分批串流載入與無效資料行統計"""
+        content = "\n".join([
+            "編號 案類 日期 時段 地點",
+            "1 竊盜 1120101 0-6 台北市中山區民權東路",
+            "2 詐欺 112010 6-12 新北市板橋區中山路",
+            "",
+            "3 竊盜 1130103 12-18 台北市信義區  信義路   三段",
+            "4 傷害 1120104 18-24",
+            "5 竊盜 1120105 0-6 高雄市前金區中正四路"
+        ])
+        with open(os.path.join(temp_directory, 'crime_data.txt'), 'w', encoding='utf-8') as f:
+            f.write(content)
+        monkeypatch.chdir(temp_directory)
+        
+        df = self.processor.load_default_data(chunk_size=2)
+        
+        assert list(df.columns) == ['編號', '案類', '日期', '時段', '地點', '年份']
+        assert list(df['編號']) == ['1', '3', '5']
+        assert list(df['年份']) == [2023, 2024, 2023]
+        assert df.iloc[1]['地點'] == '台北市信義區 信義路 三段'
+        assert self.processor.last_load_stats['有效筆數'] == 3
+        assert self.processor.last_load_stats['捨棄筆數'] == 2
+    
+    def test_parse_text_chunk_blank_lines_use_fast_path(self):
+        """測試只含空白或 \\r\\n 的空白行不計入行數，也不會改用逐行切割"""
+        lines = [
+            "1 竊盜 1120101 0-6 台北市中山區民權東路\r\n",
+            "   \n",
+            "\r\n",
+            "\t\n",
+            "2 詐欺 1120102 6-12 新北市板橋區  中山路\r\n"
+        ]
+        
+        with patch.object(DataProcessor, '_split_text_lines', side_effect=AssertionError('逐行切割')):
+            df, line_count = self.processor._parse_text_chunk(lines)
+        
+        assert line_count == 2
+        assert list(df['編號']) == ['1', '2']
+        assert list(df['地點']) == ['台北市中山區民權東路', '新北市板橋區 中山路']
+    
     def test_set_get_current_data(self, sample_dataframe):
         """測試設定和取得當前資料"""
         self.processor.set_current_data(sample_dataframe)
@@ -165,7 +262,7 @@ class TestDataProcessor:
         
         assert retrieved_df is not None
         assert len(retrieved_df) == 5
-        pd.testing.assert_frame_equal(retrieved_df, sample_dataframe)
+        pd.testing.assert_frame_equal(retrieved_df[sample_dataframe.columns], sample_dataframe)
     
     def test_clear_current_data(self, sample_dataframe):
         """測試清除當前資料"""
@@ -174,3 +271,92 @@ class TestDataProcessor:
         
         self.processor.clear_current_data()
         assert self.processor.get_current_data() is None
+    
+    def test_set_current_data_adds_area_columns(self, sample_dataframe):
+        """測試設定當前資料時預先解析行政區欄位"""
+        self.processor.set_current_data(sample_dataframe)
+        
+        df = self.processor.get_current_data()
+        assert {'縣市', '區/鄉/鎮', '里'} <= set(df.columns)
+        assert df.iloc[0]['區/鄉/鎮'] == '中山區'
+        # 呼叫端傳入的 DataFrame 不被修改
+        assert '縣市' not in sample_dataframe.columns
+    
+    def test_appended_rows_since_previous_version(self, sample_dataframe):
+        """測試新資料只在尾端附加時可取得新增的資料列，既有資料變動時回傳 None"""
+        self.processor.set_current_data(sample_dataframe.iloc[:3].copy())
+        base_version = self.processor.data_version
+        assert self.processor.appended_rows(base_version - 1) is None
+        
+        self.processor.set_current_data(to_categories(sample_dataframe.copy()))
+        appended = self.processor.appended_rows(base_version)
+        assert appended is not None
+        assert list(appended['編號']) == [4, 5]
+        assert self.processor.appended_rows(base_version - 1) is None
+        
+        changed = sample_dataframe.copy()
+        changed.loc[0, '案類'] = '詐欺'
+        version = self.processor.data_version
+        self.processor.set_current_data(changed)
+        assert self.processor.appended_rows(version) is None
+        
+        self.processor.clear_current_data()
+        assert self.processor.appended_rows(self.processor.data_version - 1) is None
+    
+    def test_generate_statistics_cached_per_version(self, sample_dataframe):
+        """測試當前資料的統計結果依版本快取，重新設定或清除資料後失效"""
+        self.processor.set_current_data(sample_dataframe)
+        df = self.processor.get_current_data()
+        
+        first = self.processor.generate_statistics(df)
+        second = self.processor.generate_statistics(df)
+        
+        assert second is first
+        info = self.processor.get_stats_cache_info()
+        assert (info['hits'], info['misses'], info['size']) == (1, 1, 1)
+        
+        self.processor.set_current_data(sample_dataframe.iloc[:3].copy())
+        stats = self.processor.generate_statistics(self.processor.get_current_data())
+        assert stats['總案件數'] == 3
+        assert self.processor.get_stats_cache_info()['misses'] == 2
+    
+    def test_generate_statistics_not_cached_when_data_replaced(self, sample_dataframe):
+        """測試計算期間當前資料被替換時，舊資料的統計結果不會寫入新版本的快取"""
+        self.processor.set_current_data(sample_dataframe)
+        df = self.processor.get_current_data()
+        compute = self.processor._compute_statistics
+        
+        def replace_during_compute(*args, **kwargs):
+            stats = compute(*args, **kwargs)
+            self.processor.set_current_data(sample_dataframe.iloc[:2].copy())
+            return stats
+        
+        with patch.object(self.processor, '_compute_statistics', side_effect=replace_during_compute):
+            assert self.processor.generate_statistics(df)['總案件數'] == 5
+        
+        assert self.processor.get_stats_cache_info()['size'] == 0
+        assert self.processor.generate_statistics(self.processor.get_current_data())['總案件數'] == 2
+        
+        self.processor.clear_current_data()
+        assert self.processor.get_stats_cache_info()['size'] == 0
+    
+    def test_generate_statistics_uncached_for_unknown_frame(self, sample_dataframe):
+        """測試無法識別版本的資料每次重新計算"""
+        self.processor.generate_statistics(sample_dataframe)
+        self.processor.generate_statistics(sample_dataframe)
+        
+        info = self.processor.get_stats_cache_info()
+        assert (info['hits'], info['misses'], info['size']) == (0, 2, 0)
+    
+    def test_generate_statistics_cached_by_snapshot_key(self, temp_directory):
+        """測試相同內容的 CSV 重新載入後沿用快照鍵值的統計快取"""
+        from src.data.snapshot import DataSnapshotCache
+        
+        processor = DataProcessor(snapshot_cache=DataSnapshotCache(temp_directory))
+        content = "編號,案類,日期,時段,地點\n1,竊盜,1120101,0-6,台北市中山區\n".encode('utf-8')
+        
+        first = processor.generate_statistics(processor.load_csv_data(content))
+        second = processor.generate_statistics(processor.load_csv_data(content))
+        
+        assert second is first
+        assert processor.get_stats_cache_info()['hits'] == 1
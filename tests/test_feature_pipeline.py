@@ -0,0 +1,55 @@
+"""
+特徵處理模組測試
+"""
+
+import pickle
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+from src.data.schema import roc_to_datetime
+from src.utils.feature_pipeline import FeaturePipeline, Vocabulary, UNKNOWN_LABEL
+from src.utils.ml_predictor import CrimePredictionModel
+
+class TestFeaturePipeline:
+    """特徵處理流程測試類"""
+    
+    def test_vocabulary_keeps_codes_and_maps_unknown(self):
+        """測試詞彙表新增類別時既有代碼不變，未知類別與缺值為 0"""
+        vocabulary = Vocabulary(['竊盜', '詐欺'])
+        codes = vocabulary.transform(pd.Series(['詐欺', '竊盜', '搶奪', None]))
+        
+        assert vocabulary.labels[0] == UNKNOWN_LABEL
+        assert codes.tolist() == [2, 1, 0, 0]
+        
+        vocabulary.update(pd.Series(['搶奪', '竊盜'], dtype='category'))
+        assert vocabulary.transform(pd.Series(['詐欺', '竊盜', '搶奪'])).tolist() == [2, 1, 3]
+    
+    def test_transform_unseen_labels(self, sample_dataframe):
+        """測試未見過的類別不會使轉換失敗，日期只解析一次"""
+        pipeline = FeaturePipeline().fit(sample_dataframe)
+        new_rows = sample_dataframe.assign(案類='搶奪', 時段='新時段')
+        
+        with patch('src.utils.feature_pipeline.roc_to_datetime', wraps=roc_to_datetime) as parse:
+            features = pipeline.transform(new_rows)
+        
+        assert parse.call_count == 1
+        assert len(features) == len(new_rows)
+        assert (features['案類_encoded'] == 0).all()
+        assert (features['時段_encoded'] == 0).all()
+        assert (features['地區_encoded'] > 0).all()
+        assert features['月份'].tolist() == [1, 1, 1, 1, 1]
+    
+    def test_pipeline_serialized_with_model(self, sample_dataframe, temp_directory, monkeypatch):
+        """測試特徵流程可序列化並隨模型版本保存"""
+        monkeypatch.chdir(temp_directory)
+        pipeline = pickle.loads(pickle.dumps(FeaturePipeline().fit(sample_dataframe)))
+        assert np.array_equal(pipeline.transform(sample_dataframe).to_numpy(),
+                              FeaturePipeline().fit(sample_dataframe).transform(sample_dataframe).to_numpy())
+        
+        model = CrimePredictionModel()
+        model.train_models(sample_dataframe)
+        reloaded = CrimePredictionModel()
+        assert reloaded.load_models(model.version)
+        assert reloaded.feature_pipeline.is_fitted
+        assert not reloaded.prepare_features(sample_dataframe.assign(案類='搶奪')).empty
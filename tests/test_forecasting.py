@@ -0,0 +1,103 @@
+"""
+時間序列預測模組測試
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.utils.forecasting import SeasonalForecaster, SeasonalSeriesModel
+
+def monthly_cases(months, counts, location):
+    """依每月案件數產生逐筆資料（日期為民國年）"""
+    rows = []
+    for period, count in zip(months, counts):
+        rows += [{'日期': f"{period.year - 1911}{period.month:02d}10", '地點': location}] * int(count)
+    return rows
+
+@pytest.fixture
+def seasonal_counts():
+    """36 個月、具趨勢與季節性的案件數"""
+    t = np.arange(36)
+    return np.round(20 + 0.5 * t + 8 * np.sin(2 * np.pi * t / 12)).astype(int)
+
+class TestSeasonalSeriesModel:
+    """季節性指數平滑模型測試類"""
+    
+    def test_recovers_trend_and_season(self):
+        """測試無雜訊的趨勢加季節序列可準確外推"""
+        t = np.arange(60)
+        values = 100 + 2 * t + 20 * np.sin(2 * np.pi * t / 12)
+        
+        mean, lower, upper = SeasonalSeriesModel(12).fit(values).forecast(6)
+        
+        expected = 100 + 2 * np.arange(60, 66) + 20 * np.sin(2 * np.pi * np.arange(60, 66) / 12)
+        assert mean == pytest.approx(expected, rel=1e-3)
+        assert (lower <= mean).all() and (upper >= mean).all()
+    
+    def test_short_series_without_season(self):
+        """測試不足兩個季節的序列仍可預測"""
+        model = SeasonalSeriesModel(12).fit([5, 6, 7, 8])
+        
+        mean, _, _ = model.forecast(2)
+        assert len(model.seasonals) == 1
+        assert mean[0] > 0
+
+class TestSeasonalForecaster:
+    """各地區時間序列預測器測試類"""
+    
+    def test_build_series_fills_missing_months(self):
+        """測試建立連續的每月序列並補 0"""
+        df = pd.DataFrame([
+            {'日期': '1120105', '地點': '台北市中山區民權東路'},
+            {'日期': '1120320', '地點': '台北市信義區信義路'},
+            {'日期': '1120301', '地點': '新北市板橋區中山路'},
+            {'日期': 'invalid', '地點': '新北市板橋區中山路'},
+        ])
+        
+        series = SeasonalForecaster().build_series(df)
+        
+        assert [str(p) for p in series.index] == ['2023-01', '2023-02', '2023-03']
+        assert series['台北市'].tolist() == [1, 0, 1]
+        assert series['新北市'].tolist() == [0, 0, 1]
+    
+    def test_forecast_table(self, seasonal_counts):
+        """測試預測表欄位與期間"""
+        months = pd.period_range('2021-01', periods=36, freq='M')
+        df = pd.DataFrame(monthly_cases(months, seasonal_counts, '台北市中山區民權東路'))
+        
+        table = SeasonalForecaster(n_jobs=1).fit(df).forecast(horizon=3)
+        
+        assert list(table.columns) == ['地區', '期間', '預測案件數', '下界', '上界']
+        assert table['期間'].tolist() == ['2024-01', '2024-02', '2024-03']
+        assert (table['下界'] <= table['預測案件數']).all()
+    
+    def test_forecast_with_tai_spelling(self, seasonal_counts):
+        """測試原始資料與指定地區使用「臺」時仍能取得預測"""
+        months = pd.period_range('2021-01', periods=36, freq='M')
+        df = pd.DataFrame(monthly_cases(months, seasonal_counts, '臺北市中山區民權東路'))
+        forecaster = SeasonalForecaster(n_jobs=1).fit(df)
+        
+        table = forecaster.forecast(['臺北市'], horizon=2)
+        
+        assert table['地區'].tolist() == ['台北市', '台北市']
+        pd.testing.assert_frame_equal(table, forecaster.forecast(['台北市'], horizon=2))
+    
+    def test_incremental_update(self, seasonal_counts):
+        """測試新增月份只延續狀態，回補舊月份的地區才重新擬合"""
+        months = pd.period_range('2021-01', periods=36, freq='M')
+        rows = monthly_cases(months[:30], seasonal_counts[:30], '台北市中山區民權東路')
+        rows += monthly_cases(months[:30], seasonal_counts[:30], '新北市板橋區中山路')
+        forecaster = SeasonalForecaster(n_jobs=1).fit(pd.DataFrame(rows))
+        taipei = forecaster.models['台北市']
+        
+        new_rows = monthly_cases(months[30:], seasonal_counts[30:], '台北市中山區民權東路')
+        new_rows += monthly_cases(months[30:], seasonal_counts[30:], '新北市板橋區中山路')
+        new_rows += monthly_cases(months[:1], [3], '新北市板橋區中山路')
+        refit = forecaster.update(pd.DataFrame(new_rows))
+        
+        assert refit == ['新北市']
+        assert forecaster.models['台北市'] is taipei
+        assert taipei.n_obs == 36
+        assert str(forecaster.last_period) == '2023-12'
+        assert forecaster.models['新北市'].history[0] == seasonal_counts[0] + 3
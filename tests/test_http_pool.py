@@ -0,0 +1,176 @@
+"""
+HTTP 連線池模組測試
+"""
+
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+
+from src.utils import http_pool
+from src.utils.government_data import GovernmentDataAPI
+from src.utils.http_pool import SessionPool, SingleFlight
+from src.utils.response_cache import ResponseCache
+
+async def json_handler(request):
+    return web.json_response({'success': True})
+
+class TestSessionPool:
+    """共用連線池測試類"""
+    
+    def test_sync_callers_share_session_and_connections(self, http_server):
+        """測試同步程式多次查詢共用同一個 session 並重複使用連線"""
+        url = http_server(json_handler)
+        pool = SessionPool(limit_per_host=2)
+        
+        async def fetch():
+            async with GovernmentDataAPI(pool=pool) as api:
+                return api.session, await api.fetch_data(url)
+        
+        try:
+            first_session, first = pool.run(fetch(), timeout=10)
+            second_session, second = pool.run(fetch(), timeout=10)
+            
+            assert first == second == {'success': True}
+            assert first_session is second_session and not first_session.closed
+            stats = pool.stats()
+            assert stats['sessions_created'] == 1
+            assert stats['requests'] == 2
+            assert stats['connections_created'] == 1
+            assert stats['connections_reused'] == 1
+            assert stats['reuse_ratio'] == 0.5
+        finally:
+            pool.close()
+        
+        assert first_session.closed
+        assert pool.stats()['active_sessions'] == 0
+    
+    def test_one_session_per_event_loop(self):
+        """測試不同事件迴圈各自使用自己的 session"""
+        pool = SessionPool()
+        
+        async def get_sessions():
+            session = await pool.session()
+            same = await pool.session()
+            await pool.aclose()
+            return session, same
+        
+        first, same = asyncio.run(get_sessions())
+        second, _ = asyncio.run(get_sessions())
+        
+        assert first is same
+        assert first is not second
+        assert first.closed and second.closed
+        assert pool.stats()['sessions_created'] == 2
+    
+    def test_run_times_out_and_cancels(self, monkeypatch):
+        """測試未指定逾時時以連線池逾時加上緩衝為上限，逾時後取消協程"""
+        pool = SessionPool(timeout=0.1)
+        cancelled = threading.Event()
+        
+        async def stuck():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        monkeypatch.setattr(http_pool, 'RUN_TIMEOUT_MARGIN_SECONDS', 0.1)
+        try:
+            with pytest.raises(TimeoutError):
+                pool.run(stuck())
+            assert cancelled.wait(5)
+            assert pool.run(asyncio.sleep(0, result='ok')) == 'ok'
+        finally:
+            pool.close()
+
+class TestSingleFlight:
+    """並行請求合併測試類"""
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """測試相同鍵值的並行呼叫只執行一次，例外也傳給所有等待者"""
+        flight = SingleFlight()
+        calls = []
+        
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            if value == 'bad':
+                raise ValueError(value)
+            return value
+        
+        async def main():
+            results = await asyncio.gather(*(flight.do('a', lambda: work('a')) for _ in range(5)))
+            errors = await asyncio.gather(*(flight.do('b', lambda: work('bad')) for _ in range(3)),
+                                          return_exceptions=True)
+            again = await flight.do('a', lambda: work('a'))
+            return results, errors, again
+        
+        results, errors, again = asyncio.run(main())
+        
+        assert results == ['a'] * 5 and again == 'a'
+        assert all(isinstance(error, ValueError) for error in errors)
+        assert calls == ['a', 'bad', 'a']
+        assert flight.stats() == {'executed': 3, 'coalesced': 6, 'coalesced_ratio': 0.667, 'in_flight': 0}
+    
+    def test_leader_cancellation_does_not_cancel_followers(self):
+        """測試第一個呼叫者被取消時，請求繼續執行，其他等待者仍取得結果"""
+        flight = SingleFlight()
+        calls = []
+        
+        async def work():
+            calls.append('a')
+            await asyncio.sleep(0.05)
+            return 'a'
+        
+        async def main():
+            leader = asyncio.ensure_future(flight.do('a', work))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do('a', work))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            result = await follower
+            return leader, result
+        
+        leader, result = asyncio.run(main())
+        
+        assert leader.cancelled()
+        assert result == 'a'
+        assert calls == ['a']
+        assert flight.stats()['in_flight'] == 0
+    
+    def test_concurrent_dataset_requests_download_once(self, http_server):
+        """測試多位使用者同時查詢同一資料集時只下載一次，並各自取得 DataFrame"""
+        requests = []
+        
+        async def slow_handler(request):
+            requests.append(request.path)
+            await asyncio.sleep(0.05)
+            return web.json_response({'result': {'results': [{'案件': 1}, {'案件': 2}]}})
+        
+        url = http_server(slow_handler)
+        pool = SessionPool()
+        api = GovernmentDataAPI(pool=pool, cache=ResponseCache(cache_dir=''))
+        api.single_flight = SingleFlight()
+        original_get = api._get_cached
+        
+        async def redirect(_, dataset, **kwargs):
+            return await original_get(url, dataset, **kwargs)
+        
+        api._get_cached = redirect
+        
+        async def burst():
+            async with api:
+                return await asyncio.gather(*(api.get_bike_theft_data() for _ in range(10)))
+        
+        try:
+            frames = pool.run(burst(), timeout=10)
+        finally:
+            pool.close()
+        
+        assert requests == ['/data']
+        assert all(len(df) == 2 for df in frames)
+        frames[0]['新欄位'] = 1
+        assert '新欄位' not in frames[1].columns
+        assert api.single_flight.stats()['coalesced'] == 9
@@ -0,0 +1,278 @@
+"""
+機器學習預測模組測試
+"""
+
+import os
+import threading
+import pytest
+import numpy as np
+from unittest.mock import patch
+import pandas as pd
+
+from src.utils.ml_predictor import CrimePredictionModel, MODEL_CANDIDATES, time_ordered_folds
+
+@pytest.fixture
+def training_dataframe():
+    """兩年份、三縣市的訓練資料"""
+    rows = []
+    for year, roc in ((2022, 111), (2023, 112)):
+        for i, location in enumerate(['台北市中山區民權東路', '台北市信義區信義路', '新北市板橋區中山路', '新竹縣竹北市成功路']):
+            for month in (1, 6):
+                rows.append({
+                    '編號': len(rows),
+                    '案類': '竊盜' if i % 2 else '詐欺',
+                    '日期': f"{roc}{month:02d}15",
+                    '時段': '0-6',
+                    '地點': location,
+                    '年份': year
+                })
+    rows.append({'編號': len(rows), '案類': '竊盜', '日期': '1120301', '時段': '0-6', '地點': '地址不詳', '年份': 2023})
+    return pd.DataFrame(rows)
+
+class TestCrimePredictionModel:
+    """犯罪預測模型測試類"""
+    
+    @pytest.fixture(autouse=True)
+    def work_in_temp_directory(self, temp_directory, monkeypatch):
+        """模型檔寫入暫存目錄"""
+        monkeypatch.chdir(temp_directory)
+    
+    def test_model_directory_created_on_save(self, training_dataframe, temp_directory):
+        """測試建立模型時不建立模型目錄，重新載入的模型在預測時才反序列化"""
+        model = CrimePredictionModel()
+        assert not os.path.exists(os.path.join(temp_directory, 'models'))
+        assert not model.load_models()
+        
+        model.train_models(training_dataframe)
+        reloaded = CrimePredictionModel()
+        assert reloaded.load_models()
+        assert reloaded.models.loaded == []
+        assert reloaded.predict_crime_trends('台北市', [2024]) == pytest.approx(model.predict_crime_trends('台北市', [2024]))
+        assert reloaded.models.loaded == [reloaded.best_model]
+    
+    def test_build_targets_default_keys(self, training_dataframe):
+        """測試依年份與縣市統計案件數，無法解析的地點不計入"""
+        targets = CrimePredictionModel().build_targets(training_dataframe)
+        
+        assert list(targets.columns) == ['年份', '縣市', '案件數']
+        counts = {(row.年份, row.縣市): row.案件數 for row in targets.itertuples()}
+        assert counts == {
+            (2022, '台北市'): 4, (2022, '新北市'): 2, (2022, '新竹縣'): 2,
+            (2023, '台北市'): 4, (2023, '新北市'): 2, (2023, '新竹縣'): 2,
+        }
+    
+    def test_build_targets_extra_keys(self, training_dataframe):
+        """測試以區/鄉/鎮、案類與月份細分"""
+        model = CrimePredictionModel()
+        targets = model.build_targets(training_dataframe, ['年份', '縣市', '區/鄉/鎮', '案類', '月份'])
+        
+        assert targets['案件數'].sum() == 16
+        assert set(targets['月份']) == {1, 6}
+        row = targets[(targets['年份'] == 2023) & (targets['區/鄉/鎮'] == '信義區') & (targets['月份'] == 6)]
+        assert row['案件數'].tolist() == [1]
+        
+        with pytest.raises(ValueError, match="不支援的分組欄位"):
+            model.build_targets(training_dataframe, ['年份', '地點'])
+    
+    def test_train_and_predict_with_extra_keys(self, training_dataframe):
+        """測試以額外分組欄位訓練後，預測值為該縣市自己細項的加總"""
+        model = CrimePredictionModel()
+        results = model.train_models(training_dataframe, extra_keys=['案類', '月份'])
+        
+        assert 'random_forest' in results
+        assert model.feature_names == ['年份', '地區_encoded', '案類_encoded', '月份']
+        assert set(model.get_feature_importance()) == set(model.feature_names)
+        
+        # 每個細項每年都是 1 件：台北市有兩種案類 × 兩個月份，新北市與新竹縣各只有一種案類
+        predictions = model.predict_crime_trends('台北市', [2024])
+        assert predictions[2024] == pytest.approx(4)
+        table = model.predict_batch(['新北市', '新竹縣'], [2024])
+        assert table['預測案件數'].tolist() == pytest.approx([2, 2])
+        
+        reloaded = CrimePredictionModel()
+        reloaded.load_models()
+        assert reloaded.feature_names == model.feature_names
+        assert reloaded.predict_crime_trends('台北市', [2024]) == pytest.approx(predictions)
+        
+        # 以行政區細分時不加總其他縣市的行政區
+        districts = CrimePredictionModel()
+        districts.train_models(training_dataframe, extra_keys=['區/鄉/鎮'])
+        table = districts.predict_batch(['台北市', '新北市', '新竹縣'], [2024])
+        assert table['預測案件數'].tolist() == pytest.approx([4, 2, 2])
+    
+    def test_train_reuses_registered_version(self, training_dataframe):
+        """測試相同資料與設定再次訓練時直接載入已登錄的版本"""
+        model = CrimePredictionModel()
+        results = model.train_models(training_dataframe)
+        
+        other = CrimePredictionModel()
+        with patch('src.utils.ml_predictor.RandomForestRegressor.fit') as fit:
+            reused = other.train_models(training_dataframe)
+        
+        fit.assert_not_called()
+        assert other.version == model.version
+        assert reused.keys() == results.keys()
+        assert other.registry.versions() == [model.version]
+        
+        assert not other.load_for_data(training_dataframe.iloc[:-1])
+        assert other.load_for_data(training_dataframe)
+    
+    def test_predict_batch_matches_single_predictions(self, training_dataframe):
+        """測試批次預測與逐一預測結果一致，並回傳整齊的資料表"""
+        model = CrimePredictionModel()
+        model.train_models(training_dataframe, extra_keys=['月份'])
+        
+        table = model.predict_batch(['台北市', '新北市', '火星市'], [2024, 2025])
+        
+        assert list(table.columns) == ['地區', '年份', '預測案件數']
+        assert len(table) == 6
+        estimator = model.models[model.best_model]
+        for area in ('台北市', '新北市'):
+            code = model.encoders['target_area_encoder'].transform([area])[0]
+            for year in (2024, 2025):
+                expected = sum(
+                    max(estimator.predict([[year, code, month]])[0], 0)
+                    for month in model.target_levels['月份']
+                )
+                row = table[(table['地區'] == area) & (table['年份'] == year)]
+                assert row['預測案件數'].item() == pytest.approx(expected)
+        assert model.predict_crime_trends('台北市', [2024])[2024] == pytest.approx(
+            table[(table['地區'] == '台北市') & (table['年份'] == 2024)]['預測案件數'].item()
+        )
+        assert (table['預測案件數'] >= 0).all()
+    
+    def test_prediction_cache_tied_to_model_version(self, training_dataframe):
+        """測試相同模型版本的預測結果由快取提供，換模型後重新計算"""
+        model = CrimePredictionModel()
+        model.train_models(training_dataframe)
+        
+        first = model.predict_crime_trends('台北市', [2024, 2025])
+        with patch.object(model.models[model.best_model], 'predict') as predict:
+            assert model.predict_crime_trends('台北市', [2024, 2025]) == first
+            predict.assert_not_called()
+        model.get_feature_importance()
+        model.get_feature_importance()
+        assert model.prediction_cache.stats()['hits'] == 2
+        
+        model.train_models(training_dataframe.iloc[:-1])
+        assert len(model.prediction_cache) == 0
+    
+    def test_feature_importance_waits_for_state_swap(self, training_dataframe):
+        """測試替換模型狀態期間取得特徵重要性會等待替換完成，讀到的是新版本"""
+        model = CrimePredictionModel()
+        model.train_models(training_dataframe)
+        state = model.get_state()
+        result = {}
+        
+        with model._state_lock:
+            reader = threading.Thread(target=lambda: result.update(importance=model.get_feature_importance()))
+            reader.start()
+            reader.join(timeout=0.2)
+            assert reader.is_alive()
+            model.models, model.feature_names = {}, []
+            model.set_state({**state, 'version': 'swapped'})
+        reader.join(timeout=5)
+        
+        assert set(result['importance']) == set(state['feature_names'])
+        assert model.prediction_cache.get(('importance', 'swapped')) is not None
+    
+    def test_predict_with_tai_spelling(self, training_dataframe, caplog):
+        """測試原始資料與查詢都使用「臺」時仍對應到訓練時的縣市，不會當成未知地區"""
+        df = training_dataframe.assign(地點=training_dataframe['地點'].str.replace('台北市', '臺北市'))
+        extra = df.iloc[:2].assign(地點='台中市西屯區台灣大道')
+        model = CrimePredictionModel()
+        model.train_models(pd.concat([df, extra], ignore_index=True))
+        
+        classes = model.encoders['target_area_encoder'].classes_
+        assert classes[0] == '台中市'
+        assert classes[model._encode_areas(['臺北市'])[0]] == '台北市'
+        
+        with caplog.at_level('WARNING'):
+            table = model.predict_batch(['臺北市', '台北市'], [2024])
+        assert '未知地區' not in caplog.text
+        assert list(table['地區']) == ['臺北市', '台北市']
+        assert table['預測案件數'].iloc[0] == table['預測案件數'].iloc[1]
+    
+    def test_time_ordered_folds(self):
+        """測試交叉驗證的驗證年份一律晚於訓練年份"""
+        years = np.array([2020, 2020, 2021, 2021, 2022, 2023, 2023])
+        
+        folds = time_ordered_folds(years, n_splits=2)
+        
+        assert [sorted(set(years[test])) for _, test in folds] == [[2022], [2023]]
+        for train, test in folds:
+            assert years[train].max() < years[test].min()
+        assert len(time_ordered_folds(np.array([2023] * 5))) == 1
+    
+    def test_search_selects_best_model_by_mae(self, training_dataframe):
+        """測試候選模型搜尋回報每組設定的 MAE 與耗時，並以 MAE 最低者預測"""
+        model = CrimePredictionModel()
+        results = model.train_models(training_dataframe)
+        
+        assert set(results) == set(MODEL_CANDIDATES)
+        for entry in results.values():
+            assert entry['mae'] == min(candidate['mae'] for candidate in entry['candidates'])
+            assert all(candidate['seconds'] >= 0 for candidate in entry['candidates'])
+        assert model.best_model == min(results, key=lambda name: results[name]['mae'])
+        assert model.registry.load(model.version)['best_model'] == model.best_model
+    
+    def test_update_models_accumulates_new_rows(self, training_dataframe):
+        """測試增量更新只聚合新增資料，累加後的目標表與完整訓練一致且不重新搜尋超參數"""
+        history = training_dataframe[training_dataframe['年份'] == 2022]
+        new_rows = training_dataframe[training_dataframe['年份'] == 2023]
+        model = CrimePredictionModel()
+        model.train_models(history)
+        base_version, params = model.version, model.model_params
+        
+        with patch.object(model, 'search_models') as search:
+            results = model.update_models(new_rows)
+        
+        search.assert_not_called()
+        assert set(results) == set(params)
+        assert model.model_params == params
+        assert model.version != base_version
+        assert model.registry.exists(model.version)
+        
+        expected = model.build_targets(training_dataframe).rename(columns={'縣市': '地區'})
+        assert model.targets[['年份', '地區', '案件數']].astype({'地區': object}).values.tolist() == \
+            expected.astype({'地區': object}).values.tolist()
+        assert model.predict_crime_trends('新竹縣', [2024])[2024] >= 0
+        
+        reloaded = CrimePredictionModel()
+        assert reloaded.load_models(model.version)
+        assert reloaded.targets['案件數'].sum() == 16
+    
+    def test_update_models_applies_same_rows_once(self, training_dataframe):
+        """測試同一批新增資料重複傳入時不會重複累加"""
+        history = training_dataframe[training_dataframe['年份'] == 2022]
+        new_rows = training_dataframe[training_dataframe['年份'] == 2023]
+        model = CrimePredictionModel()
+        model.train_models(history)
+        
+        assert model.update_models(new_rows)
+        version, total = model.version, model.targets['案件數'].sum()
+        
+        assert model.update_models(new_rows.copy()) == {}
+        assert model.version == version
+        assert model.targets['案件數'].sum() == total == model.build_targets(training_dataframe)['案件數'].sum()
+        
+        reloaded = CrimePredictionModel()
+        assert reloaded.load_models(version)
+        assert reloaded.update_models(new_rows) == {}
+    
+    def test_update_models_adds_new_area_and_keeps_old_model_on_failure(self, training_dataframe):
+        """測試新增資料出現新地區時更新編碼器；沒有聚合目標時不替換模型"""
+        model = CrimePredictionModel()
+        assert model.update_models(training_dataframe) == {}
+        assert not model.is_trained
+        
+        model.train_models(training_dataframe)
+        new_rows = pd.DataFrame([{
+            '編號': 100, '案類': '竊盜', '日期': '1130115', '時段': '0-6', '地點': '高雄市苓雅區四維路', '年份': 2024
+        }])
+        old_encoder = model.encoders['target_area_encoder']
+        
+        assert model.update_models(new_rows)
+        assert '高雄市' in model.encoders['target_area_encoder'].classes_
+        assert '高雄市' not in old_encoder.classes_
+        assert model.update_models(new_rows.assign(地點='地址不詳')) == {}
@@ -0,0 +1,77 @@
+"""
+模型版本登錄模組測試
+"""
+
+import os
+import pytest
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.utils.model_registry import LazyModels, ModelRegistry
+
+def make_state():
+    """建立簡單的模型狀態"""
+    model = LinearRegression().fit([[0], [1]], [0, 1])
+    return {
+        'models': {'linear_regression': model},
+        'encoders': {},
+        'feature_names': ['年份'],
+        'target_levels': {}
+    }
+
+class TestModelRegistry:
+    """模型版本登錄測試類"""
+    
+    def test_fingerprint_depends_on_content_and_params(self):
+        """測試指紋只取決於資料內容與超參數，不受欄位型別影響"""
+        df = pd.DataFrame({'案類': ['竊盜', '詐欺'], '年份': [2023, 2024]})
+        categorical = df.assign(案類=df['案類'].astype('category'))
+        
+        key = ModelRegistry.fingerprint(df, {'n_estimators': 100})
+        assert ModelRegistry.fingerprint(categorical, {'n_estimators': 100}) == key
+        assert ModelRegistry.fingerprint(df, {'n_estimators': 50}) != key
+        assert ModelRegistry.fingerprint(df.iloc[::-1], {'n_estimators': 100}) != key
+    
+    def test_save_and_load(self, temp_directory):
+        """測試儲存後可載入相同版本的模型與評估結果"""
+        registry = ModelRegistry(temp_directory)
+        
+        assert registry.load('missing') is None
+        assert registry.save('v1', make_state(), metrics={'linear_regression': {'mae': 0.0}}, rows=2)
+        
+        state = registry.load('v1')
+        assert state['version'] == 'v1'
+        assert state['models']['linear_regression'].predict([[2]])[0] == pytest.approx(2)
+        assert registry.metadata('v1')['metrics'] == {'linear_regression': {'mae': 0.0}}
+        assert not any(name.startswith('.tmp') for name in os.listdir(temp_directory))
+    
+    def test_keeps_latest_versions(self, temp_directory):
+        """測試只保留最近使用的版本"""
+        registry = ModelRegistry(temp_directory, keep=2)
+        
+        for i, key in enumerate(['v1', 'v2', 'v3']):
+            registry.save(key, make_state())
+            os.utime(os.path.join(temp_directory, key, 'metadata.json'), (i, i))
+        registry.save('v4', make_state())
+        
+        assert registry.versions() == ['v4', 'v3']
+        assert registry.latest() == 'v4'
+    
+    def test_models_loaded_lazily(self, temp_directory):
+        """測試載入版本時只讀取描述資訊，模型在第一次取用時才反序列化"""
+        registry = ModelRegistry(temp_directory, compress=0)
+        registry.save('v1', make_state())
+        
+        state = registry.load('v1')
+        models = state['models']
+        assert isinstance(models, LazyModels)
+        assert list(models) == ['linear_regression'] and models.loaded == []
+        
+        assert models['linear_regression'].predict([[3]])[0] == pytest.approx(3)
+        assert models.loaded == ['linear_regression']
+        assert registry.metadata('v1')['compress'] == 0
+        assert models.mmap_mode == 'r'
+        
+        compressed = ModelRegistry(temp_directory, compress=3)
+        compressed.save('v2', make_state())
+        assert compressed.load('v2')['models'].mmap_mode is None
@@ -0,0 +1,95 @@
+"""
+外部 API 回應快取模組測試
+"""
+
+import pytest
+from aiohttp import web
+
+from src.utils.government_data import GovernmentDataAPI
+from src.utils.http_pool import SessionPool
+from src.utils.response_cache import ResponseCache
+
+ETAG = '"v1"'
+
+@pytest.fixture
+def etag_server(http_server):
+    """支援 ETag 條件請求的伺服器，回傳 (網址, 請求紀錄)"""
+    requests = []
+    
+    async def handler(request):
+        requests.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == ETAG:
+            return web.Response(status=304, headers={'ETag': ETAG})
+        return web.json_response({'result': {'results': [{'案件': 1}, {'案件': 2}]}}, headers={'ETag': ETAG})
+    
+    return http_server(handler), requests
+
+@pytest.fixture
+def pool():
+    pool = SessionPool()
+    yield pool
+    pool.close()
+
+class TestResponseCache:
+    """回應快取測試類"""
+    
+    def test_fresh_hit_then_revalidate(self, etag_server, pool):
+        """測試存活時間內直接使用快取，過期後以 ETag 重新驗證而不重新下載"""
+        url, requests = etag_server
+        cache = ResponseCache(max_entries=8, cache_dir='')
+        api = GovernmentDataAPI(pool=pool, cache=cache)
+        
+        async def fetch():
+            async with api:
+                return await api._get_cached(url, 'bike_theft')
+        
+        first = pool.run(fetch(), timeout=10)
+        assert pool.run(fetch(), timeout=10) == first
+        assert requests == [None]
+        
+        cache.get(cache.key(url)).expires_at = 0
+        assert pool.run(fetch(), timeout=10) == first
+        assert requests == [None, ETAG]
+        assert cache.get(cache.key(url)).is_fresh
+        
+        stats = cache.stats()
+        assert (stats['downloads'], stats['hits'], stats['revalidated']) == (1, 1, 1)
+        assert stats['bytes_saved'] == 2 * len(first)
+    
+    def test_disk_tier_survives_restart(self, etag_server, pool, temp_directory):
+        """測試磁碟層保存的回應可供新的快取實例使用與重新驗證"""
+        url, requests = etag_server
+        
+        async def fetch(cache):
+            async with GovernmentDataAPI(pool=pool, cache=cache) as api:
+                return await api._get_cached(url, 'bike_theft', params={'limit': 10})
+        
+        body = pool.run(fetch(ResponseCache(cache_dir=temp_directory)), timeout=10)
+        
+        restarted = ResponseCache(cache_dir=temp_directory)
+        assert pool.run(fetch(restarted), timeout=10) == body
+        assert requests == [None]
+        assert restarted.stats()['disk_hits'] == 1
+        
+        restarted.clear()
+        entry = restarted.get(restarted.key(url, {'limit': 10}))
+        assert entry.etag == ETAG and entry.body == body
+    
+    def test_dataset_parser_uses_cache(self, etag_server, pool):
+        """測試資料集方法透過快取取得內容，重複查詢不重新下載"""
+        url, requests = etag_server
+        api = GovernmentDataAPI(pool=pool, cache=ResponseCache(cache_dir=''))
+        
+        async def fetch():
+            async with api:
+                original_get = api._get_cached
+                
+                async def redirect(_, dataset, **kwargs):
+                    return await original_get(url, dataset, **kwargs)
+                
+                api._get_cached = redirect
+                return await api.get_bike_theft_data()
+        
+        assert len(pool.run(fetch(), timeout=10)) == 2
+        assert len(pool.run(fetch(), timeout=10)) == 2
+        assert requests == [None]
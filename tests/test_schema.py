@@ -0,0 +1,80 @@
+"""
+資料結構模組測試
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+
+from src.data.schema import normalize_schema, roc_to_datetime, map_unique
+
+class TestSchema:
+    """資料型別精簡測試類"""
+    
+    def test_normalize_schema_dtypes(self):
+        """測試欄位型別轉換"""
+        df = pd.DataFrame({
+            '編號': ['1', '2', '3', '4'],
+            '案類': ['竊盜', '竊盜', '詐欺', '竊盜'],
+            '日期': ['1120101', '1120102', '0991231', '1120101'],
+            '時段': ['0-6', '0-6', '6-12', '0-6'],
+            '地點': ['台北市中山區', '台北市中山區', '台北市中山區', '新北市板橋區'],
+            '年份': [2023, 2023, 2010, 2023]
+        })
+        
+        result, report = normalize_schema(df)
+        
+        assert isinstance(result['案類'].dtype, pd.CategoricalDtype)
+        assert isinstance(result['時段'].dtype, pd.CategoricalDtype)
+        assert isinstance(result['地點'].dtype, pd.CategoricalDtype)
+        assert result['日期'].dtype == np.int32
+        assert result['年份'].dtype == np.int16
+        assert report['精簡後記憶體'] < report['原始記憶體']
+        # 原始資料不應被修改
+        assert df['日期'].dtype != np.int32
+    
+    def test_normalize_schema_western_dates(self):
+        """測試西元日期轉為 datetime"""
+        df = pd.DataFrame({'日期': ['2023-01-01', '2024-01-02'], '年份': [2023, 2024]})
+        
+        result, _ = normalize_schema(df)
+        
+        assert pd.api.types.is_datetime64_any_dtype(result['日期'])
+    
+    def test_roc_to_datetime(self):
+        """測試民國年日期轉換（含 int32 去除前導零的情況）"""
+        dates = pd.Series([1120101, 991231], dtype=np.int32)
+        
+        result = roc_to_datetime(dates)
+        
+        assert result.iloc[0] == pd.Timestamp('2023-01-01')
+        assert result.iloc[1] == pd.Timestamp('2010-12-31')
+    
+    def test_map_unique(self):
+        """測試只對不重複值執行轉換並展開回每一列"""
+        series = pd.Series(['竊盜', '詐欺', '竊盜', None, '竊盜'])
+        calls = []
+        
+        def transform(value):
+            calls.append(value)
+            return value + '案'
+        
+        result = map_unique(series, transform)
+        
+        assert calls == ['竊盜', '詐欺']
+        assert result.iloc[0] == '竊盜案'
+        assert result.iloc[1] == '詐欺案'
+        assert pd.isna(result.iloc[3])
+        
+        categorical = map_unique(series.astype('category'), len, as_category=True)
+        assert isinstance(categorical.dtype, pd.CategoricalDtype)
+        assert list(categorical.iloc[[0, 1, 4]]) == [2, 2, 2]
+    
+    def test_map_unique_vectorized(self):
+        """測試向量化轉換與缺值填補"""
+        series = pd.Series(['台北市中山區', None, '新北市板橋區', '台北市中山區'])
+        
+        mask = map_unique(series, lambda uniques: uniques.str.contains('台北市').to_numpy(), vectorized=True, fill_value=False)
+        
+        assert mask.dtype == bool
+        assert list(mask) == [True, False, False, True]
@@ -0,0 +1,96 @@
+"""
+資料快照模組測試
+"""
+
+import pytest
+import pandas as pd
+import os
+from unittest.mock import patch
+
+from src.data.snapshot import DataSnapshotCache
+from src.data.processor import DataProcessor
+
+class TestDataSnapshotCache:
+    """資料快照快取測試類"""
+    
+    def test_save_and_load(self, temp_directory, sample_dataframe):
+        """測試儲存與載入快照"""
+        cache = DataSnapshotCache(temp_directory)
+        key = cache.key_for_bytes('csv', b'content')
+        
+        assert cache.load(key) is None
+        assert cache.save(key, sample_dataframe)
+        
+        loaded = cache.load(key)
+        assert loaded is not None
+        assert list(loaded.columns) == list(sample_dataframe.columns)
+        assert list(loaded['地點']) == list(sample_dataframe['地點'])
+        assert list(loaded['年份']) == list(sample_dataframe['年份'])
+    
+    def test_key_depends_on_content(self, temp_directory):
+        """測試不同內容產生不同鍵值"""
+        cache = DataSnapshotCache(temp_directory)
+        
+        assert cache.key_for_bytes('csv', b'a') == cache.key_for_bytes('csv', b'a')
+        assert cache.key_for_bytes('csv', b'a') != cache.key_for_bytes('csv', b'b')
+        assert cache.key_for_bytes('csv', b'a') != cache.key_for_bytes('text', b'a')
+    
+    def test_invalidate(self, temp_directory, sample_dataframe):
+        """測試清除快照"""
+        cache = DataSnapshotCache(temp_directory)
+        key_a = cache.key_for_bytes('csv', b'a')
+        key_b = cache.key_for_bytes('csv', b'b')
+        cache.save(key_a, sample_dataframe)
+        cache.save(key_b, sample_dataframe)
+        
+        assert cache.invalidate(key_a) == 1
+        assert cache.load(key_a) is None
+        assert cache.load(key_b) is not None
+        
+        assert cache.invalidate() == 1
+        assert cache.load(key_b) is None
+    
+    def test_invalidate_keeps_other_files(self, temp_directory, sample_dataframe):
+        """測試清除全部快照時不刪除目錄中的其他檔案"""
+        cache = DataSnapshotCache(temp_directory)
+        cache.save(cache.key_for_bytes('csv', b'a'), sample_dataframe)
+        other = os.path.join(temp_directory, 'ckan_resources.json')
+        with open(other, 'w', encoding='utf-8') as f:
+            f.write('{}')
+        
+        assert cache.invalidate() == 1
+        assert os.path.exists(other)
+    
+    def test_save_evicts_least_recently_used(self, temp_directory, sample_dataframe):
+        """測試儲存時只保留最近使用的 keep 個快照"""
+        cache = DataSnapshotCache(temp_directory, keep=2)
+        keys = [cache.key_for_bytes('csv', content) for content in (b'a', b'b', b'c')]
+        for age, key in zip((300, 200), keys[:2]):
+            cache.save(key, sample_dataframe)
+            path = cache.snapshot_files()[0]
+            os.utime(path, (os.path.getmtime(path) - age,) * 2)
+        
+        # 載入較舊的快照後，它成為最近使用者
+        assert cache.load(keys[0]) is not None
+        cache.save(keys[2], sample_dataframe)
+        
+        assert len(cache.snapshot_files()) == 2
+        assert cache.load(keys[0]) is not None
+        assert cache.load(keys[1]) is None
+        assert cache.load(keys[2]) is not None
+    
+    def test_processor_uses_snapshot(self, temp_directory, temp_csv_file):
+        """測試資料處理器重複載入相同內容時使用快照"""
+        processor = DataProcessor(snapshot_cache=DataSnapshotCache(temp_directory))
+        with open(temp_csv_file, 'rb') as f:
+            content = f.read()
+        
+        first = processor.load_csv_data(content)
+        assert len(os.listdir(temp_directory)) == 1
+        
+        # 第二次載入不應再進行編碼檢測與解析
+        with patch('src.data.processor.chardet.detect', side_effect=AssertionError):
+            second = processor.load_csv_data(content)
+        
+        pd.testing.assert_frame_equal(first, second, check_dtype=False)
+        assert processor.invalidate_snapshots() == 1
@@ -0,0 +1,186 @@
+"""
+模型訓練工作模組測試
+"""
+
+import threading
+
+import pytest
+import pandas as pd
+
+from src.utils import training_jobs
+from src.utils.ml_predictor import CrimePredictionModel
+from src.utils.training_jobs import TrainingJobManager, JOB_DONE, JOB_FAILED
+
+@pytest.fixture
+def training_dataframe():
+    """兩年份、兩縣市的訓練資料"""
+    locations = ['台北市中山區民權東路', '新北市板橋區中山路'] * 4
+    return pd.DataFrame({
+        '案類': ['竊盜'] * 8,
+        '日期': ['1110101'] * 4 + ['1120101'] * 4,
+        '時段': ['0-6'] * 8,
+        '地點': locations,
+        '年份': [2022] * 4 + [2023] * 4
+    })
+
+class TestTrainingJobManager:
+    """背景訓練工作管理器測試類"""
+    
+    @pytest.fixture(autouse=True)
+    def work_in_temp_directory(self, temp_directory, monkeypatch):
+        """模型檔寫入暫存目錄"""
+        monkeypatch.chdir(temp_directory)
+    
+    def test_submit_deduplicates_and_swaps_model(self, training_dataframe):
+        """測試相同資料只訓練一次，完成後才替換模型"""
+        model = CrimePredictionModel()
+        manager = TrainingJobManager(model, use_processes=False)
+        
+        job = manager.submit(training_dataframe, key=1)
+        assert manager.submit(training_dataframe, key=1) is job
+        
+        manager.wait(job, timeout=30)
+        assert job.status == JOB_DONE
+        assert model.is_trained
+        assert manager.trained_key == 1
+        assert manager.ensure_trained(training_dataframe, key=1) is None
+        assert manager.status()['latest_job']['status'] == JOB_DONE
+        manager.shutdown()
+    
+    def test_failed_job_keeps_previous_state(self):
+        """測試訓練失敗時保留舊模型狀態並記錄錯誤"""
+        model = CrimePredictionModel()
+        manager = TrainingJobManager(model, use_processes=False)
+        
+        job = manager.wait(manager.submit(pd.DataFrame({'年份': []}), key='empty'), timeout=30)
+        
+        assert job.status == JOB_FAILED
+        assert job.error
+        assert job.error != "模型訓練失敗"
+        assert not model.is_trained
+        manager.shutdown()
+    
+    def test_failed_version_backs_off(self):
+        """測試訓練失敗的資料版本在退避時間內不會每次請求都重新提交"""
+        model = CrimePredictionModel()
+        manager = TrainingJobManager(model, use_processes=False, retry_seconds=60)
+        empty = pd.DataFrame({'年份': []})
+        
+        job = manager.wait(manager.ensure_trained(empty, key='empty'), timeout=30)
+        
+        assert job.status == JOB_FAILED
+        assert manager.failure_count('empty') == 1
+        assert manager.ensure_trained(empty, key='empty') is None
+        assert manager.latest_job() is job
+        assert manager.failed_job() is job
+        status = manager.status()
+        assert status['state'] == 'failed' and not status['model_ready']
+        assert status['error'] == job.error
+        assert 0 < status['retry_after_seconds'] <= 60
+        
+        # 退避時間結束後才重新提交
+        manager.retry_seconds = 0
+        manager._failures['empty'] = (1, 0)
+        retry = manager.wait(manager.ensure_trained(empty, key='empty'), timeout=30)
+        assert retry is not job
+        assert manager.failure_count('empty') == 2
+        manager.shutdown()
+    
+    def test_training_key_memoised_per_version(self, training_dataframe, monkeypatch):
+        """測試同一資料版本只計算一次資料指紋，工作進行中時不查詢模型登錄"""
+        model = CrimePredictionModel()
+        manager = TrainingJobManager(model, use_processes=False)
+        release = threading.Event()
+        original_run = training_jobs._run_training
+        monkeypatch.setattr(training_jobs, '_run_training', lambda *args: release.wait(30) and original_run(*args))
+        calls, lookups = [], []
+        original_key = model.training_key
+        monkeypatch.setattr(model, 'training_key', lambda df, extra_keys=None: calls.append(1) or original_key(df, extra_keys))
+        original_load = model.load_for_data
+        monkeypatch.setattr(model, 'load_for_data', lambda *args, **kwargs: lookups.append(1) or original_load(*args, **kwargs))
+        
+        job = manager.ensure_trained(training_dataframe, key=1)
+        assert manager.ensure_trained(training_dataframe, key=1) is job
+        assert len(lookups) == 1
+        
+        release.set()
+        manager.wait(job, timeout=30)
+        assert job.status == JOB_DONE
+        manager.trained_key = None
+        assert manager.ensure_trained(training_dataframe, key=1) is None
+        assert len(calls) == 1
+        manager.shutdown()
+    
+    def test_appended_rows_update_model_in_background(self, training_dataframe, monkeypatch):
+        """測試資料只附加新資料列時提交增量更新工作，完成前沿用舊模型，重複呼叫也不重複累加"""
+        history = training_dataframe[training_dataframe['年份'] == 2022]
+        new_rows = training_dataframe[training_dataframe['年份'] == 2023]
+        model = CrimePredictionModel()
+        manager = TrainingJobManager(model, use_processes=False)
+        manager.wait(manager.submit(history, key=1), timeout=30)
+        base_version = model.version
+        release = threading.Event()
+        original_update = training_jobs._run_update
+        monkeypatch.setattr(training_jobs, '_run_update', lambda *args: release.wait(30) and original_update(*args))
+        
+        job = manager.ensure_trained(training_dataframe, key=2, base_key=1, new_rows=new_rows)
+        assert job is not None and job.kind == 'update'
+        assert manager.ensure_trained(training_dataframe, key=2, base_key=1, new_rows=new_rows) is job
+        assert model.version == base_version
+        assert manager.trained_key == 1
+        
+        release.set()
+        manager.wait(job, timeout=30)
+        assert job.status == JOB_DONE
+        assert manager.trained_key == 2
+        assert model.version != base_version
+        assert model.targets['案件數'].sum() == len(training_dataframe)
+        
+        # 更新後的版本與完整資料的 training_key 相同，重新啟動後可由模型登錄直接載入
+        assert model.version == model.training_key(training_dataframe)
+        restarted = TrainingJobManager(CrimePredictionModel(), use_processes=False)
+        assert restarted.ensure_trained(training_dataframe, key=2) is None
+        assert restarted.model.version == model.version
+        restarted.shutdown()
+        
+        assert manager.ensure_trained(training_dataframe, key=2, base_key=1, new_rows=new_rows) is None
+        assert model.targets['案件數'].sum() == len(training_dataframe)
+        
+        # 模型不是以 base_key 的資料訓練時改為完整訓練（相同資料已登錄，改用不同資料）
+        job = manager.ensure_trained(training_dataframe.assign(時段='6-12'), key=3, base_key=1, new_rows=new_rows)
+        assert job is not None and job.kind == 'train'
+        manager.wait(job, timeout=30)
+        manager.shutdown()
+    
+    def test_failed_update_falls_back_to_full_training(self, training_dataframe, monkeypatch):
+        """測試增量更新失敗後同一資料版本立即改為完整訓練"""
+        history = training_dataframe[training_dataframe['年份'] == 2022]
+        new_rows = training_dataframe[training_dataframe['年份'] == 2023]
+        model = CrimePredictionModel()
+        manager = TrainingJobManager(model, use_processes=False)
+        manager.wait(manager.submit(history, key=1), timeout=30)
+        
+        def failing_update(state, rows, version):
+            raise ValueError('更新失敗')
+        monkeypatch.setattr(training_jobs, '_run_update', failing_update)
+        
+        job = manager.wait(manager.ensure_trained(training_dataframe, key=2, base_key=1, new_rows=new_rows), timeout=30)
+        assert job.status == JOB_FAILED and 'ValueError: 更新失敗' in job.error
+        
+        retry = manager.wait(manager.ensure_trained(training_dataframe, key=2, base_key=1, new_rows=new_rows), timeout=30)
+        assert retry.kind == 'train' and retry.status == JOB_DONE
+        assert manager.trained_key == 2
+        manager.shutdown()
+    
+    def test_train_in_worker_process(self, training_dataframe):
+        """測試於工作行程訓練後將模型傳回主行程"""
+        model = CrimePredictionModel()
+        manager = TrainingJobManager(model)
+        
+        job = manager.wait(manager.submit(training_dataframe, key='process'), timeout=60)
+        
+        assert job.status == JOB_DONE
+        assert model.predict_crime_trends('台北市', [2024])[2024] >= 0
+        assert manager._executor._mp_context.get_start_method() == 'spawn'
+        assert manager.status()['state'] == 'ready'
+        manager.shutdown()